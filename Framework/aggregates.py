@@ -0,0 +1,103 @@
+""" Running aggregates over the edges and one numeric node field of a Graph. """
+
+from framework.graph import GraphObserver
+from framework.indexed_heap import IndexedHeap
+
+
+def is_number(value):
+    return isinstance(value, (int, long, float)) and not isinstance(value, bool)
+
+
+class GraphAggregates(GraphObserver):
+    """ Count, total, minimum and maximum of the edge weights of a Graph and of a
+    numeric field of its node data, maintained as the Graph changes.
+
+    Edges are kept in a min and a max IndexedHeap keyed by (start key, end key)
+    with priority (weight, start key, end key); nodes are kept the same way keyed
+    by key with priority (value, key). Every change costs O(log n) and every read
+    is O(1). Nodes whose data has no numeric value in the field are left out.
+    """
+    def __init__(self, graph, value_field):
+        self.value_field = value_field
+        self.edge_total = 0
+        self.shortest_edges = IndexedHeap()
+        self.longest_edges = IndexedHeap(max_heap=True)
+        self.value_total = 0
+        self.smallest_values = IndexedHeap()
+        self.largest_values = IndexedHeap(max_heap=True)
+        all_nodes = graph.get_all_nodes()
+        for key in all_nodes:
+            self.node_added(key, all_nodes[key].get_data())
+            connected_nodes = all_nodes[key].get_connected_nodes()
+            for end_key in connected_nodes:
+                self.connection_added(key, end_key, connected_nodes[end_key], None)
+        graph.add_observer(self)
+
+    def get_edge_count(self):
+        return len(self.shortest_edges)
+
+    def get_edge_total(self):
+        return self.edge_total
+
+    def get_shortest_edge(self):
+        """ :return: (weight, start key, end key) of the lightest edge, or None """
+        entry = self.shortest_edges.peek()
+        return entry[0] if entry else None
+
+    def get_longest_edge(self):
+        """ :return: (weight, start key, end key) of the heaviest edge, or None """
+        entry = self.longest_edges.peek()
+        return entry[0] if entry else None
+
+    def get_value_count(self):
+        return len(self.smallest_values)
+
+    def get_value_total(self):
+        return self.value_total
+
+    def get_smallest_value(self):
+        """ :return: (value, key) of the node with the smallest value, or None """
+        entry = self.smallest_values.peek()
+        return entry[0] if entry else None
+
+    def get_largest_value(self):
+        """ :return: (value, key) of the node with the largest value, or None """
+        entry = self.largest_values.peek()
+        return entry[0] if entry else None
+
+    def add_value(self, key, data):
+        value = data.get(self.value_field) if isinstance(data, dict) else None
+        if is_number(value):
+            self.value_total += value
+            self.smallest_values.push(key, (value, key))
+            self.largest_values.push(key, (value, key))
+
+    def remove_value(self, key):
+        if key in self.smallest_values:
+            self.value_total -= self.smallest_values.get_priority(key)[0]
+            self.smallest_values.remove(key)
+            self.largest_values.remove(key)
+
+    def node_added(self, key, data):
+        self.add_value(key, data)
+
+    def node_deleted(self, key, data, removed_edges):
+        self.remove_value(key)
+        for start_key, end_key, weight in removed_edges:
+            self.connection_deleted(start_key, end_key, weight)
+
+    def node_changed(self, key, old_data, new_data):
+        self.remove_value(key)
+        self.add_value(key, new_data)
+
+    def connection_added(self, start_key, end_key, weight, old_weight):
+        if old_weight is not None:
+            self.edge_total -= old_weight
+        self.edge_total += weight
+        self.shortest_edges.push((start_key, end_key), (weight, start_key, end_key))
+        self.longest_edges.push((start_key, end_key), (weight, start_key, end_key))
+
+    def connection_deleted(self, start_key, end_key, weight):
+        self.edge_total -= weight
+        self.shortest_edges.remove((start_key, end_key))
+        self.longest_edges.remove((start_key, end_key))
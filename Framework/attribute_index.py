@@ -0,0 +1,116 @@
+""" Secondary indexes of the nodes of a Graph by fields of their data. """
+
+from framework.graph import GraphObserver
+
+
+class AttributeIndex(GraphObserver):
+    """ Secondary indexes mapping the values of node data fields to node keys.
+
+    For each indexed field the index maps every value to the set of keys whose
+    data holds it. The indexed values of each node are also remembered, so a node
+    whose data dictionary was edited in place before Graph.set_node is still
+    removed from the right sets. Values that cannot be hashed are not indexed.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        self.keys_by_value = {}
+        self.node_values = {}
+        graph.add_observer(self)
+
+    def get_fields(self):
+        return list(self.keys_by_value)
+
+    def add_field(self, field):
+        if field in self.keys_by_value:
+            return
+        self.keys_by_value[field] = {}
+        all_nodes = self.graph.get_all_nodes()
+        for key in all_nodes:
+            self.index_value(key, field, all_nodes[key].get_data())
+
+    def get_values(self, field):
+        return list(self.keys_by_value[field])
+
+    def get_keys(self, field, value):
+        """ :return: set of the keys whose data holds the value in the field """
+        try:
+            return self.keys_by_value[field].get(value, frozenset())
+        except TypeError:
+            return frozenset()
+
+    def find_keys(self, criteria):
+        """ Finds the keys matching every field=value criterion by intersecting the
+        indexed sets, starting from the smallest, so only candidate keys are visited.
+
+        :param criteria: dict of indexed field to required value
+        :return: set of matching keys
+        """
+        for field in criteria:
+            if field not in self.keys_by_value:
+                raise ValueError("No index on field: %s" % field)
+        candidate_sets = sorted((self.get_keys(field, criteria[field]) for field in criteria), key=len)
+        if not candidate_sets:
+            return set(self.graph.get_all_nodes())
+        matching_keys = set(candidate_sets[0])
+        for candidate_set in candidate_sets[1:]:
+            if not matching_keys:
+                break
+            matching_keys.intersection_update(candidate_set)
+        return matching_keys
+
+    def index_value(self, key, field, data):
+        if not isinstance(data, dict) or field not in data:
+            return
+        value = data[field]
+        try:
+            self.keys_by_value[field].setdefault(value, set()).add(key)
+        except TypeError:
+            return
+        self.node_values.setdefault(key, {})[field] = value
+
+    def index_node(self, key, data):
+        for field in self.keys_by_value:
+            self.index_value(key, field, data)
+
+    def forget_node(self, key):
+        for field, value in self.node_values.pop(key, {}).items():
+            keys = self.keys_by_value[field][value]
+            keys.discard(key)
+            if not keys:
+                del self.keys_by_value[field][value]
+
+    def node_added(self, key, data):
+        self.index_node(key, data)
+
+    def node_deleted(self, key, data, removed_edges):
+        self.forget_node(key)
+
+    def node_changed(self, key, old_data, new_data):
+        self.forget_node(key)
+        self.index_node(key, new_data)
+
+
+def create_index(graph, fields):
+    """ Indexes the nodes of the graph by the given fields of their data.
+
+    :param graph: Graph to index
+    :param fields: Fields of the node data to index
+    :return: AttributeIndex of the graph
+    """
+    attribute_index = graph.get_observer(AttributeIndex) or AttributeIndex(graph)
+    for field in fields:
+        attribute_index.add_field(field)
+    return attribute_index
+
+
+def find_nodes(graph, criteria):
+    """ Finds the keys of the nodes whose data matches every field=value given.
+
+    :param graph: Graph indexed with create_index
+    :param criteria: dict of indexed field to required value
+    :return: set of matching keys
+    """
+    attribute_index = graph.get_observer(AttributeIndex)
+    if not attribute_index:
+        raise ValueError("No index on fields: %s" % ", ".join(criteria))
+    return attribute_index.find_keys(criteria)
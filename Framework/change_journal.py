@@ -0,0 +1,187 @@
+""" Journal of the changes made to a Graph since its last checkpoint. """
+
+from framework.graph import GraphObserver
+
+ADD_NODE = "add_node"
+DELETE_NODE = "delete_node"
+SET_DATA = "set_data"
+ADD_CONNECTION = "add_connection"
+DELETE_CONNECTION = "delete_connection"
+
+
+class ChangeJournal(GraphObserver):
+    """ Append-only list of the operations made on a Graph, kept as the Graph
+    changes.
+
+    Each change is recorded as an operation that can be made again on another
+    Graph, such as (ADD_CONNECTION, start key, end key, weight), so replaying
+    the changes with apply_changes takes a copy of the Graph at the checkpoint
+    to its current state. A checkpoint marks that everything so far has been
+    saved; it drops the changes and remembers a label for where they went.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        self.changes = []
+        self.checkpoint_label = None
+        graph.add_observer(self)
+
+    def get_changes(self):
+        """ :return: list of the operations made since the last checkpoint, oldest first """
+        return self.changes
+
+    def get_checkpoint_label(self):
+        return self.checkpoint_label
+
+    def checkpoint(self, label=None):
+        self.changes = []
+        self.checkpoint_label = label
+
+    def node_added(self, key, data):
+        self.changes.append((ADD_NODE, key, data))
+
+    def node_deleted(self, key, data, removed_edges):
+        if not self.graph.get_node(key):  # A node that is replaced keeps its key and is recorded as added.
+            self.changes.append((DELETE_NODE, key))
+
+    def node_changed(self, key, old_data, new_data):
+        self.changes.append((SET_DATA, key, new_data))
+
+    def connection_added(self, start_key, end_key, weight, old_weight):
+        self.changes.append((ADD_CONNECTION, start_key, end_key, weight))
+
+    def connection_deleted(self, start_key, end_key, weight):
+        self.changes.append((DELETE_CONNECTION, start_key, end_key))
+
+
+class GraphOutline:
+    """ The keys and connections of a Graph with changes played on top of them,
+    leaving the Graph itself untouched, so a whole list of changes can be checked
+    before any of it is made. The connections of a key are copied from the Graph
+    the first time a change touches them, so checking costs time in the size of
+    the changes rather than of the Graph.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        self.nodes = {}
+        self.outgoing = {}
+        self.incoming = {}
+
+    def has_node(self, key):
+        if key in self.nodes:
+            return self.nodes[key]
+        return self.graph.get_node(key) is not None
+
+    def get_outgoing(self, key):
+        if key not in self.outgoing:
+            node = self.graph.get_node(key)
+            self.outgoing[key] = set(node.get_connected_nodes()) if node else set()
+        return self.outgoing[key]
+
+    def get_incoming(self, key):
+        if key not in self.incoming:
+            self.incoming[key] = set(self.graph.get_incoming_nodes(key))
+        return self.incoming[key]
+
+    def forget_outgoing(self, key):
+        for end_key in self.get_outgoing(key):
+            self.get_incoming(end_key).discard(key)
+        self.outgoing[key] = set()
+
+    def check_change(self, change):
+        """ :param change: Operation recorded by a ChangeJournal
+        :return: Why the operation cannot be made after the changes played so far, or None if it can
+        """
+        operation = change[0]
+        if operation not in (ADD_NODE, DELETE_NODE, SET_DATA, ADD_CONNECTION, DELETE_CONNECTION):
+            return "unknown operation"
+        if operation == ADD_NODE:
+            return None
+        for key in change[1:2] if operation in (DELETE_NODE, SET_DATA) else change[1:3]:
+            if not self.has_node(key):
+                return "%s is not in the graph" % key
+        if operation == DELETE_CONNECTION and change[2] not in self.get_outgoing(change[1]):
+            return "no connection from %s to %s" % (change[1], change[2])
+        return None
+
+    def play_change(self, change):
+        """ Plays an operation that check_change accepted, the way the Graph would make it. """
+        operation = change[0]
+        if operation == ADD_NODE:
+            if self.has_node(change[1]):
+                self.forget_outgoing(change[1])  # A replaced node loses the edges that leave it.
+            self.nodes[change[1]] = True
+        elif operation == DELETE_NODE:
+            self.forget_outgoing(change[1])
+            for start_key in self.get_incoming(change[1]):
+                self.get_outgoing(start_key).discard(change[1])
+            self.incoming[change[1]] = set()
+            self.nodes[change[1]] = False
+        elif operation == ADD_CONNECTION:
+            self.get_outgoing(change[1]).add(change[2])
+            self.get_incoming(change[2]).add(change[1])
+        elif operation == DELETE_CONNECTION:
+            self.get_outgoing(change[1]).discard(change[2])
+            self.get_incoming(change[2]).discard(change[1])
+
+
+def apply_changes(graph, changes):
+    """ Makes the operations recorded by a ChangeJournal on a Graph. Every change is
+    checked on a GraphOutline before the Graph is touched, so changes recorded on a
+    different Graph are refused with a ValueError naming the first one that does
+    not apply, and the Graph is left as it was.
+
+    :param graph: Graph to change
+    :param changes: Operations in the order they were made
+    :return: The changed Graph
+    """
+    check_changes(GraphOutline(graph), changes)
+    return make_changes(graph, changes)
+
+
+def check_changes(graph_outline, changes):
+    """ Checks operations one after the other, playing each on the outline.
+
+    :param graph_outline: GraphOutline of the Graph to change, with any earlier changes played on it
+    :param changes: Operations in the order they were made
+    :raises ValueError: naming the first operation that does not apply
+    """
+    for number, change in enumerate(changes, 1):
+        problem = graph_outline.check_change(change)
+        if problem:
+            raise ValueError("Change %i (%s) does not apply: %s" % (number, change[0], problem))
+        graph_outline.play_change(change)
+
+
+def make_changes(graph, changes):
+    """ Makes operations that check_changes accepted. Runs of added nodes and added
+    connections go through the Graph's bulk methods.
+
+    :param graph: Graph to change
+    :param changes: Operations in the order they were made
+    :return: The changed Graph
+    """
+    nodes = []
+    connections = []
+    for change in changes:
+        operation = change[0]
+        if operation != ADD_NODE and nodes:
+            graph.add_nodes(nodes)
+            nodes = []
+        if operation != ADD_CONNECTION and connections:
+            graph.add_connections(connections)
+            connections = []
+        if operation == ADD_NODE:
+            nodes.append((change[1], change[2]))
+        elif operation == ADD_CONNECTION:
+            connections.append((change[1], change[2], change[3]))
+        elif operation == DELETE_NODE:
+            graph.delete_node(change[1])
+        elif operation == SET_DATA:
+            graph.set_node(change[1], change[2])
+        else:
+            graph.delete_connection(change[1], change[2])
+    if nodes:
+        graph.add_nodes(nodes)
+    if connections:
+        graph.add_connections(connections)
+    return graph
@@ -0,0 +1,82 @@
+""" Index of the nodes of a Graph by their number of outgoing edges. """
+
+import bisect
+import heapq
+
+from framework.graph import GraphObserver
+
+
+class DegreeIndex(GraphObserver):
+    """ Buckets of node keys by degree (number of outgoing edges), kept up to date
+    as the Graph changes.
+
+    The distinct degrees are kept in a sorted list next to the buckets, so the
+    nodes with at least k edges are found by a binary search for k followed by a
+    walk over the buckets above it, and an edge change only moves one key between
+    two buckets.
+    """
+    def __init__(self, graph):
+        self.degrees = {}
+        self.buckets = {}
+        self.sorted_degrees = []
+        all_nodes = graph.get_all_nodes()
+        for key in all_nodes:
+            self.set_degree(key, len(all_nodes[key].get_connected_nodes()))
+        graph.add_observer(self)
+
+    def get_degree(self, key):
+        return self.degrees.get(key)
+
+    def get_nodes_with_degree(self, min_degree, max_degree=None):
+        """ :return: list of (degree, set of keys) in ascending degree, for every degree
+            from min_degree up to max_degree inclusive
+        """
+        start = bisect.bisect_left(self.sorted_degrees, min_degree)
+        end = len(self.sorted_degrees) if max_degree is None else \
+            bisect.bisect_right(self.sorted_degrees, max_degree)
+        return [(degree, self.buckets[degree]) for degree in self.sorted_degrees[start:end]]
+
+    def get_top_nodes(self, count):
+        """ :return: list of (degree, key) of the count nodes with the most edges, ties
+            broken by the smallest key
+        """
+        top_nodes = []
+        for degree in reversed(self.sorted_degrees):
+            if len(top_nodes) >= count:
+                break
+            top_nodes.extend((degree, key) for key in heapq.nsmallest(count - len(top_nodes), self.buckets[degree]))
+        return top_nodes
+
+    def set_degree(self, key, degree):
+        self.remove_key(key)
+        if degree not in self.buckets:
+            self.buckets[degree] = set()
+            bisect.insort(self.sorted_degrees, degree)
+        self.buckets[degree].add(key)
+        self.degrees[key] = degree
+
+    def remove_key(self, key):
+        degree = self.degrees.pop(key, None)
+        if degree is None:
+            return
+        bucket = self.buckets[degree]
+        bucket.discard(key)
+        if not bucket:
+            del self.buckets[degree]
+            del self.sorted_degrees[bisect.bisect_left(self.sorted_degrees, degree)]
+
+    def node_added(self, key, data):
+        self.set_degree(key, 0)
+
+    def node_deleted(self, key, data, removed_edges):
+        self.remove_key(key)
+        for start_key, end_key, weight in removed_edges:
+            if start_key != key:
+                self.set_degree(start_key, self.degrees[start_key] - 1)
+
+    def connection_added(self, start_key, end_key, weight, old_weight):
+        if old_weight is None:
+            self.set_degree(start_key, self.degrees[start_key] + 1)
+
+    def connection_deleted(self, start_key, end_key, weight):
+        self.set_degree(start_key, self.degrees[start_key] - 1)
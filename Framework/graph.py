@@ -4,6 +4,12 @@ Source used to understand python classes:
 http://www.bogotobogo.com/python/python_graph_data_structures.php
 """
 
+import bisect
+import itertools
+import numbers
+from array import array
+from collections import Mapping
+
 
 class Node:
     """ Node class to store data in the graph.
@@ -32,6 +38,30 @@ class Node:
         self.data = data
 
 
+class GraphObserver:
+    """ Base class for structures derived from a Graph that are kept up to date as
+    the Graph is modified. Observers registered with Graph.add_observer are told
+    about every change after it has been made; each method is a no-op here so
+    that observers only override the changes they care about.
+    """
+    def node_added(self, key, data):
+        pass
+
+    def node_deleted(self, key, data, removed_edges):
+        """ removed_edges lists the (start key, end key, weight) edges deleted with the node. """
+        pass
+
+    def node_changed(self, key, old_data, new_data):
+        pass
+
+    def connection_added(self, start_key, end_key, weight, old_weight):
+        """ old_weight is the weight the edge replaced, or None for a new edge. """
+        pass
+
+    def connection_deleted(self, start_key, end_key, weight):
+        pass
+
+
 class Graph:
     """ Graph class to hold data about all nodes.
 
@@ -39,37 +69,319 @@ class Graph:
     that maps a key that the user provides to each node in the Graph. The Graph
     also adds an edge from both start to end as well as end to start each time a
     new connection is created to ensure each pair of nodes are connected both ways.
+
+    Alongside the adjacency lists, the Graph keeps a reverse index that maps each
+    key to the set of keys with an edge to it, so deleting a node only touches
+    its real predecessors.
+
+    Every modification moves the Graph to a new version. Versions are drawn from a
+    single counter shared by all Graphs, so a version number identifies both the
+    Graph and its state and can be used to key cached results. Structures that
+    must follow each modification register themselves as GraphObservers.
+    Secondary indexes on fields of the node data are declared with create_index
+    and queried with find_nodes.
     """
+    version_counter = itertools.count(1)
+
     def __init__(self):
         self.nodes = {}
+        self.incoming = {}
+        self.observers = []
+        self.version = next(Graph.version_counter)
 
     def get_all_nodes(self):
         return self.nodes
 
+    def get_incoming_nodes(self, key):
+        return self.incoming.get(key, set())
+
+    def get_version(self):
+        return self.version
+
+    def modified(self):
+        self.version = next(Graph.version_counter)
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def get_observer(self, observer_class):
+        for observer in self.observers:
+            if isinstance(observer, observer_class):
+                return observer
+        return None
+
     def get_node(self, key):
         if key in self.nodes:
             return self.nodes[key]
         else:
             return None
 
+    def create_index(self, *fields):
+        """ Indexes the nodes by the given fields of their data. """
+        from framework.attribute_index import create_index  # The index module builds on this one.
+        return create_index(self, fields)
+
+    def find_nodes(self, **criteria):
+        """ Finds the keys of the nodes whose data matches every field=value given.
+        Every field must have been indexed with create_index.
+        """
+        from framework.attribute_index import find_nodes
+        return find_nodes(self, criteria)
+
     def add_node(self, key, data):
-        node = Node(data)
-        self.nodes[key] = node
+        self.add_nodes([(key, data)])
+
+    def add_nodes(self, nodes):
+        """ Adds many (key, data) pairs at once, moving to a new version only once.
+        Adding a key that is already in the Graph replaces its node, dropping the
+        edges that leave it.
+        """
+        for key, data in nodes:
+            if key in self.nodes:
+                old_data = self.nodes[key].get_data()
+                removed_edges = self.forget_outgoing_edges(key)
+                for observer in self.observers:
+                    observer.node_deleted(key, old_data, removed_edges)
+            self.nodes[key] = Node(data)
+            self.incoming.setdefault(key, set())
+            for observer in self.observers:
+                observer.node_added(key, data)
+        self.modified()
 
     def set_node(self, key, data):
         if key in self.nodes:
+            old_data = self.nodes[key].get_data()
             self.nodes[key].set_data(data)
+            for observer in self.observers:
+                observer.node_changed(key, old_data, data)
+            self.modified()
             return True
         else:
             return False
 
     def delete_node(self, key):
-        del self.nodes[key]
+        """ Deletes a node along with every edge leaving it or pointing to it. """
+        removed_edges = self.forget_outgoing_edges(key)
+        node = self.nodes.pop(key)
+        for start_key in self.incoming.pop(key, ()):
+            if start_key in self.nodes:
+                start_node = self.nodes[start_key]
+                removed_edges.append((start_key, key, start_node.get_connected_nodes()[key]))
+                start_node.delete_edge(key)
+        for observer in self.observers:
+            observer.node_deleted(key, node.get_data(), removed_edges)
+        self.modified()
+
+    def forget_outgoing_edges(self, key):
+        connected_nodes = self.nodes[key].get_connected_nodes()
+        for end_key in connected_nodes:
+            self.incoming[end_key].discard(key)
+        return [(key, end_key, connected_nodes[end_key]) for end_key in connected_nodes]
 
     def add_connection(self, start_key, end_key, weight):
-        start_node = self.nodes[start_key]
-        start_node.add_edge(end_key, weight)
+        self.add_connections([(start_key, end_key, weight)])
+
+    def add_connections(self, connections):
+        """ Adds many (start key, end key, weight) edges at once, moving to a new version only once. """
+        nodes = self.nodes
+        incoming = self.incoming
+        observers = self.observers
+        for start_key, end_key, weight in connections:
+            connected_nodes = nodes[start_key].get_connected_nodes()
+            old_weight = connected_nodes.get(end_key)
+            connected_nodes[end_key] = weight
+            if end_key in incoming:
+                incoming[end_key].add(start_key)
+            else:
+                incoming[end_key] = set([start_key])
+            for observer in observers:
+                observer.connection_added(start_key, end_key, weight, old_weight)
+        self.modified()
 
     def delete_connection(self, start_key, end_key):
         start_node = self.nodes[start_key]
+        weight = start_node.get_connected_nodes()[end_key]
         start_node.delete_edge(end_key)
+        self.incoming[end_key].discard(start_key)
+        for observer in self.observers:
+            observer.connection_deleted(start_key, end_key, weight)
+        self.modified()
+
+    def freeze(self):
+        return FrozenGraph(self)
+
+
+class FrozenGraph:
+    """ Immutable snapshot of a Graph in compressed sparse row form.
+
+    Each node is given an integer id by its position in keys. The edges leaving
+    node i are targets[offsets[i]:offsets[i + 1]] (sorted by id) with the matching
+    weights, all held in flat arrays instead of a dictionary per Node. The
+    snapshot keeps the version of the Graph it was made from and offers the same
+    read-only accessors as the Graph, returning lightweight views of its nodes.
+    The reverse edges are kept in the same form, built the first time the
+    incoming nodes of a key are asked for.
+    """
+    def __init__(self, graph):
+        all_nodes = graph.get_all_nodes()
+        self.keys = list(all_nodes)
+        self.ids = dict((key, i) for i, key in enumerate(self.keys))
+        self.data = [all_nodes[key].get_data() for key in self.keys]
+        self.offsets = array("l", [0])
+        targets = []
+        weights = []
+        for key in self.keys:
+            connected_nodes = all_nodes[key].get_connected_nodes()
+            for target_id, end_key in sorted((self.ids[end_key], end_key) for end_key in connected_nodes):
+                targets.append(target_id)
+                weights.append(connected_nodes[end_key])
+            self.offsets.append(len(targets))
+        self.targets = array("l", targets)
+        integral = all(isinstance(weight, numbers.Integral) for weight in weights)
+        self.weights = array("l" if integral else "d", weights)
+        self.version = graph.get_version()
+        self.observers = []
+        self.incoming_offsets = None
+        self.sources = None
+
+    def get_all_nodes(self):
+        return FrozenNodes(self)
+
+    def get_incoming_nodes(self, key):
+        if key not in self.ids:
+            return set()
+        if self.incoming_offsets is None:
+            self.build_incoming_edges()
+        node_id = self.ids[key]
+        return set(self.keys[source_id] for source_id in
+                   self.sources[self.incoming_offsets[node_id]:self.incoming_offsets[node_id + 1]])
+
+    def build_incoming_edges(self):
+        """ Sorts the edges by target id, so the edges entering node i come from
+        sources[incoming_offsets[i]:incoming_offsets[i + 1]].
+        """
+        incoming_offsets = array("l", [0] * (len(self.keys) + 1))
+        for target_id in self.targets:
+            incoming_offsets[target_id + 1] += 1
+        for node_id in xrange(len(self.keys)):
+            incoming_offsets[node_id + 1] += incoming_offsets[node_id]
+        positions = array("l", incoming_offsets[:-1])
+        sources = array("l", [0] * len(self.targets))
+        for source_id in xrange(len(self.keys)):
+            for position in xrange(self.offsets[source_id], self.offsets[source_id + 1]):
+                target_id = self.targets[position]
+                sources[positions[target_id]] = source_id
+                positions[target_id] += 1
+        self.incoming_offsets = incoming_offsets
+        self.sources = sources
+
+    def add_observer(self, observer):
+        self.observers.append(observer)  # Never notified, as the snapshot cannot change.
+
+    def get_observer(self, observer_class):
+        for observer in self.observers:
+            if isinstance(observer, observer_class):
+                return observer
+        return None
+
+    def get_node(self, key):
+        if key in self.ids:
+            return FrozenNode(self, self.ids[key])
+        else:
+            return None
+
+    def create_index(self, *fields):
+        """ Indexes the nodes by the given fields of their data. The index is built
+        once, as the snapshot cannot change.
+        """
+        from framework.attribute_index import create_index
+        return create_index(self, fields)
+
+    def find_nodes(self, **criteria):
+        """ Finds the keys of the nodes whose data matches every field=value given.
+        Every field must have been indexed with create_index.
+        """
+        from framework.attribute_index import find_nodes
+        return find_nodes(self, criteria)
+
+    def get_version(self):
+        return self.version
+
+    def get_id(self, key):
+        return self.ids[key]
+
+    def get_key(self, node_id):
+        return self.keys[node_id]
+
+
+class FrozenNode:
+    """ Read-only view of one node of a FrozenGraph with the accessors of a Node. """
+    def __init__(self, frozen_graph, node_id):
+        self.frozen_graph = frozen_graph
+        self.node_id = node_id
+
+    def get_connected_nodes(self):
+        return FrozenConnections(self.frozen_graph, self.node_id)
+
+    def get_data(self):
+        return self.frozen_graph.data[self.node_id]
+
+
+class FrozenNodes(Mapping):
+    """ Read-only mapping of every key of a FrozenGraph to a view of its node. """
+    def __init__(self, frozen_graph):
+        self.frozen_graph = frozen_graph
+
+    def __getitem__(self, key):
+        return FrozenNode(self.frozen_graph, self.frozen_graph.ids[key])
+
+    def __iter__(self):
+        return iter(self.frozen_graph.keys)
+
+    def __len__(self):
+        return len(self.frozen_graph.keys)
+
+    def __contains__(self, key):
+        return key in self.frozen_graph.ids
+
+
+class FrozenConnections(Mapping):
+    """ Read-only mapping of the connected keys of one node to their weights,
+    read straight from the compressed sparse row arrays.
+    """
+    def __init__(self, frozen_graph, node_id):
+        self.frozen_graph = frozen_graph
+        self.start = frozen_graph.offsets[node_id]
+        self.end = frozen_graph.offsets[node_id + 1]
+
+    def find(self, key):
+        target_id = self.frozen_graph.ids.get(key)
+        if target_id is None:
+            return -1
+        position = bisect.bisect_left(self.frozen_graph.targets, target_id, self.start, self.end)
+        if position < self.end and self.frozen_graph.targets[position] == target_id:
+            return position
+        return -1
+
+    def __getitem__(self, key):
+        position = self.find(key)
+        if position < 0:
+            raise KeyError(key)
+        return self.frozen_graph.weights[position]
+
+    def __iter__(self):
+        keys = self.frozen_graph.keys
+        targets = self.frozen_graph.targets
+        return (keys[targets[position]] for position in xrange(self.start, self.end))
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __contains__(self, key):
+        return self.find(key) >= 0
+
+    def items(self):
+        keys = self.frozen_graph.keys
+        targets = self.frozen_graph.targets
+        weights = self.frozen_graph.weights
+        return [(keys[targets[position]], weights[position]) for position in xrange(self.start, self.end)]
@@ -0,0 +1,85 @@
+""" Binary heap whose entries can be found, re-prioritised and removed by key.
+
+Source used to understand binary heaps:
+https://docs.python.org/2/library/heapq.html#theory
+"""
+
+
+class IndexedHeap:
+    """ Heap of (priority, key) entries with at most one entry per key.
+
+    Alongside the heap list, the IndexedHeap keeps a dictionary mapping each key
+    to its position in the list. That lets an entry be updated or removed in
+    O(log n) instead of searching the whole heap for it. The top entry holds the
+    smallest priority, or the largest one for a max heap.
+    """
+    def __init__(self, max_heap=False):
+        self.max_heap = max_heap
+        self.entries = []
+        self.positions = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    def peek(self):
+        if not self.entries:
+            return None
+        return self.entries[0]
+
+    def get_priority(self, key):
+        return self.entries[self.positions[key]][0]
+
+    def push(self, key, priority):
+        """ Adds an entry for the key, or changes the priority of its existing entry. """
+        if key in self.positions:
+            position = self.positions[key]
+            self.entries[position] = (priority, key)
+            self.sift_up(position)
+            self.sift_down(self.positions[key])
+        else:
+            self.entries.append((priority, key))
+            self.positions[key] = len(self.entries) - 1
+            self.sift_up(len(self.entries) - 1)
+
+    def remove(self, key):
+        position = self.positions.pop(key)
+        last_entry = self.entries.pop()
+        if position < len(self.entries):
+            self.entries[position] = last_entry
+            self.positions[last_entry[1]] = position
+            self.sift_up(position)
+            self.sift_down(self.positions[last_entry[1]])
+
+    def before(self, first_entry, second_entry):
+        if self.max_heap:
+            return first_entry > second_entry
+        return first_entry < second_entry
+
+    def swap(self, first_position, second_position):
+        entries = self.entries
+        entries[first_position], entries[second_position] = entries[second_position], entries[first_position]
+        self.positions[entries[first_position][1]] = first_position
+        self.positions[entries[second_position][1]] = second_position
+
+    def sift_up(self, position):
+        while position > 0:
+            parent = (position - 1) // 2
+            if not self.before(self.entries[position], self.entries[parent]):
+                break
+            self.swap(position, parent)
+            position = parent
+
+    def sift_down(self, position):
+        num_entries = len(self.entries)
+        while True:
+            best = position
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < num_entries and self.before(self.entries[child], self.entries[best]):
+                    best = child
+            if best == position:
+                break
+            self.swap(position, best)
+            position = best
@@ -0,0 +1,46 @@
+""" Bounded least recently used cache.
+
+Source used to understand LRU caches on top of an ordered dictionary:
+https://docs.python.org/2/library/collections.html#ordereddict-examples-and-recipes
+"""
+
+from collections import OrderedDict
+
+
+class LRUCache:
+    """ Cache holding at most capacity entries.
+
+    Entries are kept in an OrderedDict from least to most recently used, so the
+    entry to evict when the cache is full is always the first one. The cache
+    counts its hits, misses and evictions.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        if key not in self.entries:
+            self.misses += 1
+            return default
+        self.hits += 1
+        value = self.entries.pop(key)
+        self.entries[key] = value
+        return value
+
+    def put(self, key, value):
+        if key in self.entries:
+            del self.entries[key]
+        elif len(self.entries) >= self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        self.entries[key] = value
+
+    def clear(self):
+        self.entries.clear()
+
+    def get_statistics(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "size": len(self.entries), "capacity": self.capacity}
@@ -2,11 +2,15 @@
 
 from scripts.user_prompts import prompt_user_for_input
 from scripts.graph_functions import add_file_data_to_graph
+from scripts.contraction_hierarchy import attach_saved_contraction_hierarchy
+from scripts.path_matrix import attach_saved_path_matrix
 
 
 def main():
     """ Main function to create graph and prompt user for input. """
-    airline_network = add_file_data_to_graph()
+    airline_network = add_file_data_to_graph(use_snapshot=True)
+    attach_saved_path_matrix(airline_network, "data/map_data.json")
+    attach_saved_contraction_hierarchy(airline_network, "data/map_data.json")
     break_condition = True
     while break_condition:
         break_condition = prompt_user_for_input(airline_network)
@@ -0,0 +1,370 @@
+""" Contraction hierarchy for fast shortest path queries on large networks.
+
+Preprocessing contracts the cities one at a time, least important first. When
+a city is contracted, a shortcut route is added between each pair of its
+remaining neighbours whose shortest connection runs through it, unless a
+witness search finds another route that is no longer. Every route then leads
+either up or down the order. A query is a bidirectional search that only
+climbs from both ends, so it settles a small fraction of the network, and the
+shortcuts on the route it finds are expanded back into real routes.
+
+The hierarchy is cached per network version in memory, and on disk next to
+the network's JSON file under a fingerprint of the network's contents, so it
+is only rebuilt when the network changes. Building it is an offline step; at
+start-up a saved hierarchy is only attached if it matches the network. A
+hierarchy rebuilt after the network is edited is kept in memory only: the
+file on disk belongs to the unedited network file, which is what is loaded
+at the next start-up.
+
+Usage: python -m scripts.contraction_hierarchy [data/map_data.json]
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import sys
+import weakref
+
+from scripts.routing import ShortestPath
+
+WITNESS_SEARCH_LIMIT = 500  # Cities a witness search may settle before a shortcut is added anyway.
+
+contraction_hierarchies = weakref.WeakKeyDictionary()
+
+
+class ContractionHierarchy:
+    """ Cities in contraction order and the routes and shortcuts between them.
+
+    ranks maps each city to its position in the contraction order. weights maps
+    each (start, end) route or shortcut to its distance and middles maps each
+    shortcut to the city it bypasses. upward_routes[city] lists the routes
+    leaving the city towards higher ranked cities, and downward_routes[city]
+    lists the routes arriving at it from higher ranked cities, reversed.
+    """
+    def __init__(self, ranks, weights, middles, fingerprint):
+        self.ranks = ranks
+        self.weights = weights
+        self.middles = middles
+        self.fingerprint = fingerprint
+        self.upward_routes = dict((city_code, []) for city_code in ranks)
+        self.downward_routes = dict((city_code, []) for city_code in ranks)
+        for (start_code, end_code), weight in weights.items():
+            if ranks[end_code] > ranks[start_code]:
+                self.upward_routes[start_code].append((end_code, weight))
+            else:
+                self.downward_routes[end_code].append((start_code, weight))
+
+    def get_fingerprint(self):
+        return self.fingerprint
+
+    def get_shortest_path(self, start_city, end_city):
+        """ :return: ShortestPath between two cities, or None if there is no route """
+        if start_city not in self.ranks or end_city not in self.ranks:
+            return None
+        distances = ({start_city: 0}, {end_city: 0})
+        previous_nodes = ({}, {})
+        settled = (set(), set())
+        queues = ([(0, start_city)], [(0, end_city)])
+        routes = (self.upward_routes, self.downward_routes)
+        best_distance = None
+        meeting_city = None
+        while queues[0] or queues[1]:
+            side = 0 if queues[0] and (not queues[1] or queues[0][0] <= queues[1][0]) else 1
+            current_distance, current_city = heapq.heappop(queues[side])
+            if best_distance is not None and current_distance >= best_distance:
+                del queues[side][:]  # Nothing left on this side can improve the route.
+                continue
+            if current_city in settled[side]:
+                continue
+            settled[side].add(current_city)
+            if current_city in distances[1 - side]:
+                route_distance = current_distance + distances[1 - side][current_city]
+                if best_distance is None or route_distance < best_distance:
+                    best_distance = route_distance
+                    meeting_city = current_city
+            distance = distances[side]
+            for connected_code, weight in routes[side][current_city]:
+                new_distance = current_distance + weight
+                if connected_code not in distance or new_distance < distance[connected_code]:
+                    distance[connected_code] = new_distance
+                    previous_nodes[side][connected_code] = current_city
+                    heapq.heappush(queues[side], (new_distance, connected_code))
+        if best_distance is None:
+            return None
+        hierarchy_path = [meeting_city]
+        while hierarchy_path[-1] != start_city:
+            hierarchy_path.append(previous_nodes[0][hierarchy_path[-1]])
+        hierarchy_path.reverse()
+        while hierarchy_path[-1] != end_city:
+            hierarchy_path.append(previous_nodes[1][hierarchy_path[-1]])
+        return self.expand_path(hierarchy_path, start_city, end_city)
+
+    def expand_path(self, hierarchy_path, start_city, end_city):
+        """ Replaces every shortcut on a route by the routes it bypasses. The distance
+        is added up along the real routes from the start, as Dijkstra's algorithm does.
+        """
+        path = [start_city]
+        distance = 0
+        for i in range(1, len(hierarchy_path)):
+            pending_routes = [(hierarchy_path[i - 1], hierarchy_path[i])]
+            while pending_routes:
+                start_code, end_code = pending_routes.pop()
+                middle_code = self.middles.get((start_code, end_code))
+                if middle_code is None:
+                    distance += self.weights[(start_code, end_code)]
+                    path.append(end_code)
+                else:
+                    pending_routes.append((middle_code, end_code))
+                    pending_routes.append((start_code, middle_code))
+        path[-1] = end_city
+        return ShortestPath(path, distance)
+
+
+def get_network_fingerprint(airline_network):
+    """ Hash of the cities and routes of a network, which identifies its contents
+    across processes, unlike its version.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: hexadecimal digest
+    """
+    digest = hashlib.sha1()
+    all_metros = airline_network.get_all_nodes()
+    for city_code in sorted(all_metros):
+        connected_nodes = all_metros[city_code].get_connected_nodes()
+        digest.update(json.dumps([city_code, sorted((end_code, repr(connected_nodes[end_code]))
+                                                    for end_code in connected_nodes)]))
+    return digest.hexdigest()
+
+
+def find_witness_distances(outgoing, start_code, skipped_code, targets, max_distance):
+    """ Dijkstra search from a neighbour of the city being contracted that avoids
+    that city, stopping once every target is settled, max_distance is passed or
+    WITNESS_SEARCH_LIMIT cities are settled.
+
+    :return: distance of each target that was reached
+    """
+    distance = {start_code: 0}
+    settled = set()
+    queue = [(0, start_code)]
+    targets_left = set(targets)
+    while queue and targets_left and len(settled) < WITNESS_SEARCH_LIMIT:
+        current_distance, current_city = heapq.heappop(queue)
+        if current_city in settled:
+            continue
+        if current_distance > max_distance:
+            break
+        settled.add(current_city)
+        targets_left.discard(current_city)
+        for connected_code, weight in outgoing[current_city].items():
+            if connected_code == skipped_code:
+                continue
+            new_distance = current_distance + weight
+            if connected_code not in distance or new_distance < distance[connected_code]:
+                distance[connected_code] = new_distance
+                heapq.heappush(queue, (new_distance, connected_code))
+    return dict((target, distance[target]) for target in targets if target in distance)
+
+
+def find_shortcuts(outgoing, incoming, city_code):
+    """ Lists the shortcuts needed to contract a city.
+
+    :return: list of (start, end, distance) shortcuts through the city
+    """
+    shortcuts = []
+    targets = outgoing[city_code]
+    for start_code, in_weight in incoming[city_code].items():
+        end_codes = [end_code for end_code in targets if end_code != start_code]
+        if not end_codes:
+            continue
+        max_distance = in_weight + max(targets[end_code] for end_code in end_codes)
+        witness_distances = find_witness_distances(outgoing, start_code, city_code, end_codes, max_distance)
+        for end_code in end_codes:
+            via_distance = in_weight + targets[end_code]
+            if witness_distances.get(end_code, via_distance + 1) > via_distance:
+                shortcuts.append((start_code, end_code, via_distance))
+    return shortcuts
+
+
+def get_contraction_priority(outgoing, incoming, contracted_neighbours, city_code):
+    """ Edge difference plus contracted neighbours: cities whose contraction adds few
+    shortcuts and whose area is not yet contracted go first.
+    """
+    num_shortcuts = len(find_shortcuts(outgoing, incoming, city_code))
+    return num_shortcuts - len(outgoing[city_code]) - len(incoming[city_code]) + contracted_neighbours[city_code]
+
+
+def build_contraction_hierarchy(airline_network):
+    """ Contracts every city of a network, least important first, choosing the next
+    city lazily: a city is taken only if its priority, recomputed when it reaches
+    the front of the queue, is still no worse than the next one's.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: ContractionHierarchy of the network
+    """
+    all_metros = airline_network.get_all_nodes()
+    outgoing = dict((city_code, {}) for city_code in all_metros)
+    incoming = dict((city_code, {}) for city_code in all_metros)
+    weights = {}
+    for city_code in all_metros:
+        connected_nodes = all_metros[city_code].get_connected_nodes()
+        for end_code in connected_nodes:
+            if end_code != city_code:
+                outgoing[city_code][end_code] = incoming[end_code][city_code] = connected_nodes[end_code]
+                weights[(city_code, end_code)] = connected_nodes[end_code]
+    middles = {}
+    ranks = {}
+    contracted_neighbours = dict((city_code, 0) for city_code in all_metros)
+    queue = [(get_contraction_priority(outgoing, incoming, contracted_neighbours, city_code), city_code)
+             for city_code in sorted(all_metros)]
+    heapq.heapify(queue)
+    while queue:
+        city_code = heapq.heappop(queue)[1]
+        priority = get_contraction_priority(outgoing, incoming, contracted_neighbours, city_code)
+        if queue and (priority, city_code) > queue[0]:
+            heapq.heappush(queue, (priority, city_code))
+            continue
+        for start_code, end_code, via_distance in find_shortcuts(outgoing, incoming, city_code):
+            if end_code not in outgoing[start_code] or via_distance < outgoing[start_code][end_code]:
+                outgoing[start_code][end_code] = incoming[end_code][start_code] = via_distance
+                weights[(start_code, end_code)] = via_distance
+                middles[(start_code, end_code)] = city_code
+        ranks[city_code] = len(ranks)
+        for neighbour_code in set(outgoing[city_code]) | set(incoming[city_code]):
+            outgoing[neighbour_code].pop(city_code, None)
+            incoming[neighbour_code].pop(city_code, None)
+            contracted_neighbours[neighbour_code] += 1
+        del outgoing[city_code]
+        del incoming[city_code]
+    return ContractionHierarchy(ranks, weights, middles, get_network_fingerprint(airline_network))
+
+
+def get_hierarchy_file_path(map_file_path):
+    """ The hierarchy of a network file is stored next to it, e.g. data/map_data.hierarchy.json
+
+    :param map_file_path: The File Path of the network's JSON File
+    :return: The File Path of the hierarchy
+    """
+    return os.path.splitext(map_file_path)[0] + ".hierarchy.json"
+
+
+def save_contraction_hierarchy(contraction_hierarchy, hierarchy_file_path):
+    """ Writes a hierarchy to disk.
+
+    :param contraction_hierarchy: ContractionHierarchy to save
+    :param hierarchy_file_path: The File Path to write to
+    """
+    codes = sorted(contraction_hierarchy.ranks, key=contraction_hierarchy.ranks.get)
+    indexes = dict((city_code, i) for i, city_code in enumerate(codes))
+    routes = [[indexes[start_code], indexes[end_code], weight,
+               indexes.get(contraction_hierarchy.middles.get((start_code, end_code)), -1)]
+              for (start_code, end_code), weight in contraction_hierarchy.weights.items()]
+    with open(hierarchy_file_path, "w") as hierarchy_file:
+        json.dump({"fingerprint": contraction_hierarchy.fingerprint, "codes": codes, "routes": routes},
+                  hierarchy_file, separators=(",", ":"))
+
+
+def load_contraction_hierarchy(hierarchy_file_path):
+    """ Reads a hierarchy written by save_contraction_hierarchy.
+
+    :param hierarchy_file_path: The File Path of the hierarchy
+    :return: ContractionHierarchy that was saved
+    """
+    with open(hierarchy_file_path, "r") as hierarchy_file:
+        hierarchy_data = json.load(hierarchy_file)
+    codes = hierarchy_data["codes"]
+    weights = {}
+    middles = {}
+    for start_index, end_index, weight, middle_index in hierarchy_data["routes"]:
+        weights[(codes[start_index], codes[end_index])] = weight
+        if middle_index >= 0:
+            middles[(codes[start_index], codes[end_index])] = codes[middle_index]
+    ranks = dict((city_code, rank) for rank, city_code in enumerate(codes))
+    return ContractionHierarchy(ranks, weights, middles, hierarchy_data["fingerprint"])
+
+
+def attach_contraction_hierarchy(airline_network, map_file_path):
+    """ Gives a network loaded from a network file the hierarchy saved next to that
+    file, building and saving it first if it is missing or was built from
+    different contents.
+
+    :param airline_network: Graph Object loaded from the network file
+    :param map_file_path: The File Path of the network's JSON File
+    :return: ContractionHierarchy of the network
+    """
+    hierarchy_file_path = get_hierarchy_file_path(map_file_path)
+    fingerprint = get_network_fingerprint(airline_network)
+    try:
+        contraction_hierarchy = load_contraction_hierarchy(hierarchy_file_path)
+    except (IOError, OSError, ValueError, KeyError, IndexError, TypeError):
+        contraction_hierarchy = None
+    if not contraction_hierarchy or contraction_hierarchy.get_fingerprint() != fingerprint:
+        contraction_hierarchy = build_contraction_hierarchy(airline_network)
+        save_contraction_hierarchy(contraction_hierarchy, hierarchy_file_path)
+    contraction_hierarchies[airline_network] = (airline_network.get_version(), contraction_hierarchy)
+    return contraction_hierarchy
+
+
+def attach_saved_contraction_hierarchy(airline_network, map_file_path):
+    """ Uses the hierarchy saved next to a network file to answer queries on a
+    network that was just loaded from that file, without ever building one.
+
+    :param airline_network: Graph Object loaded from the network file
+    :param map_file_path: The File Path of the network's JSON File
+    :return: Whether a hierarchy was attached
+    """
+    hierarchy_file_path = get_hierarchy_file_path(map_file_path)
+    if not os.path.exists(hierarchy_file_path):
+        return False
+    try:
+        contraction_hierarchy = load_contraction_hierarchy(hierarchy_file_path)
+    except (IOError, OSError, ValueError, KeyError, IndexError, TypeError):
+        return False
+    if contraction_hierarchy.get_fingerprint() != get_network_fingerprint(airline_network):
+        return False
+    contraction_hierarchies[airline_network] = (airline_network.get_version(), contraction_hierarchy)
+    return True
+
+
+def has_contraction_hierarchy(airline_network):
+    """ :return: Whether the network has a hierarchy that is up to date, so a query
+        does not have to build one first
+    """
+    version = contraction_hierarchies.get(airline_network, (None, None))[0]
+    return version == airline_network.get_version()
+
+
+def get_contraction_hierarchy(airline_network):
+    """ Gets the hierarchy of a network, building it again only if the network has
+    been modified since it was built. A rebuilt hierarchy is not saved, since it
+    no longer matches the network file its saved hierarchy belongs to.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: ContractionHierarchy of the network
+    """
+    version, contraction_hierarchy = contraction_hierarchies.get(airline_network, (None, None))
+    if version != airline_network.get_version():
+        contraction_hierarchy = build_contraction_hierarchy(airline_network)
+        contraction_hierarchies[airline_network] = (airline_network.get_version(), contraction_hierarchy)
+    return contraction_hierarchy
+
+
+def find_shortest_path_in_hierarchy(airline_network, start_city, end_city):
+    """ Answers a shortest path query from the network's contraction hierarchy.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param start_city: The starting city of the route
+    :param end_city: The end city of the route
+    :return: ShortestPath with the route and its distance, or None if there is no route
+    """
+    if not airline_network.get_node(start_city) or not airline_network.get_node(end_city):
+        return None
+    return get_contraction_hierarchy(airline_network).get_shortest_path(start_city, end_city)
+
+
+if __name__ == "__main__":
+    from scripts.graph_functions import add_file_data_to_graph
+    from framework.graph import Graph
+    network_file_path = sys.argv[1] if len(sys.argv) > 1 else "data/map_data.json"
+    attach_contraction_hierarchy(add_file_data_to_graph(Graph(), network_file_path), network_file_path)
+    print "Contraction hierarchy written to " + get_hierarchy_file_path(network_file_path)
@@ -2,69 +2,216 @@
 
 import webbrowser
 import json
-import math
-from Queue import PriorityQueue
+import os
+import struct
 
+from framework.aggregates import GraphAggregates
+from framework.change_journal import ChangeJournal, GraphOutline, apply_changes, check_changes, make_changes
+from framework.degree_index import DegreeIndex
 from framework.graph import Graph
+from framework.lru_cache import LRUCache
+from scripts.contraction_hierarchy import find_shortest_path_in_hierarchy, has_contraction_hierarchy
+from scripts.itineraries import evaluate_itinerary
+from scripts.json_stream import find_top_level_value, get_route_tuple, iterate_network_file, open_network_file
+from scripts.network_statistics import PERCENTILES, get_network_statistics
+from scripts.network_writer import write_network_file, write_patch_file
+from scripts.path_matrix import find_shortest_path_in_matrix, get_path_matrix
+from scripts.reachability import find_reachable_cities
+from scripts.routing import find_cheapest_path, find_fastest_path, find_k_shortest_paths, find_shortest_path, \
+    find_shortest_path_astar, find_shortest_path_bidirectional
+from scripts.snapshot import get_snapshot_file_path, is_snapshot_fresh, read_snapshot, write_snapshot
+from scripts.travel_times import calculate_flight_time, calculate_layover_time
 
 MAP_BASE_URL = "http://www.gcmap.com/mapui?P="
-ACCELERATION = ((750.0/60)**2)/(2*200)  # a = v^2/(2*d) in km/min^2
+MAX_MAP_URL_LENGTH = 2000  # Longest URL that every common browser and server accepts.
+ROUTING_ALGORITHMS = {"dijkstra": find_shortest_path, "astar": find_shortest_path_astar,
+                      "bidirectional": find_shortest_path_bidirectional, "hierarchy": find_shortest_path_in_hierarchy,
+                      "matrix": find_shortest_path_in_matrix, "fastest": find_fastest_path,
+                      "cheapest": find_cheapest_path}
+INDEXED_FIELDS = ("continent", "country", "region", "timezone")
+QUERY_CACHE_SIZE = 1024
+STREAM_BATCH_SIZE = 1000
+MAX_PATCH_FILES = 10  # Patches saved next to an output file before they are folded back into it.
 
+query_cache = LRUCache(QUERY_CACHE_SIZE)  # Keyed by graph version, so modified networks never hit.
 
-def add_file_data_to_graph(airline_network=Graph(), map_file_path="data/map_data.json"):
+
+def add_file_data_to_graph(airline_network=Graph(), map_file_path="data/map_data.json", use_snapshot=False,
+                           streaming=False):
     """ Creates graph object from JSON File with data about airline mappings. This
-    includes making each connection bidirectional between the cities.
+    includes making each connection bidirectional between the cities. A patch file
+    written by download_changes_to_json is replayed on the graph instead.
 
     :param airline_network: If no airline network graph provided, create new network.
     :param map_file_path: The File Path to use to get the Graph data
+    :param use_snapshot: Whether to read the file's binary snapshot when it is newer than
+        the file, and to write a new snapshot whenever the JSON File has to be parsed
+    :param streaming: Whether to parse the JSON File incrementally instead of loading it whole
     :return: graph object that is created
     """
+    if use_snapshot and is_snapshot_fresh(map_file_path):
+        try:
+            metros, routes, unidirectional = read_snapshot(get_snapshot_file_path(map_file_path))
+            return add_network_data_to_graph(airline_network, metros, routes, unidirectional)
+        except (IOError, ValueError, struct.error):
+            pass  # Unreadable snapshot, parse the JSON File instead.
     try:
-        map_data_file = open(map_file_path, "r")
+        map_data_file = open_network_file(map_file_path) if streaming else open(map_file_path, "r")
     except Exception, e:
         print e
         return False
-    map_data = json.load(map_data_file)
+    if streaming:
+        with map_data_file:
+            unidirectional = find_top_level_value(map_file_path, "unidirectional", False)
+            return stream_network_data_to_graph(airline_network, map_data_file, unidirectional)
+    with map_data_file:
+        map_data = json.load(map_data_file)
+    if "changes" in map_data:
+        return apply_changes(airline_network, map_data["changes"])
+    if use_snapshot:
+        try:
+            write_snapshot(map_data, get_snapshot_file_path(map_file_path))
+        except (IOError, OSError), e:
+            print e
     if "unidirectional" in map_data:
         unidirectional = map_data["unidirectional"]
     else:
         unidirectional = False
-    for metro in map_data["metros"]:
-        airline_network.add_node(metro["code"], metro)
-    for route in map_data["routes"]:
-        start_city_code = route["ports"][0]
-        end_city_code = route["ports"][1]
+    routes = (get_route_tuple(route) for route in map_data["routes"])
+    return add_network_data_to_graph(airline_network, map_data["metros"], routes, unidirectional)
+
+
+def add_network_data_to_graph(airline_network, metros, routes, unidirectional):
+    """ Adds metros and routes read from a network file to the graph. Routes to or
+    from cities that are not in the network are skipped.
+
+    :param airline_network: Graph Object to add the data to
+    :param metros: Data about each metro
+    :param routes: (start city code, end city code, distance) of each route, followed by
+        the route's own unidirectional flag when it has one
+    :param unidirectional: Whether the routes without a flag only go from start to end
+    :return: graph object that is created
+    """
+    airline_network.add_nodes((metro["code"], metro) for metro in metros)
+    airline_network.add_connections(resolve_routes(airline_network, routes, unidirectional))
+    return airline_network
+
+
+def stream_network_data_to_graph(airline_network, map_data_file, unidirectional, batch_size=STREAM_BATCH_SIZE):
+    """ Adds metros and routes to the graph while the network file is being read,
+    in batches through the graph's bulk methods. Routes to cities that appear
+    later in the file are retried at the end. The batches read so far are added
+    before a "changes" array is replayed, since the changes may refer to them.
+
+    :param airline_network: Graph Object to add the data to
+    :param map_data_file: Open network file
+    :param unidirectional: Whether the routes without a flag only go from start to end
+    :param batch_size: Number of metros or routes to add at a time
+    :return: graph object that is created
+    """
+    metros = []
+    routes = []
+    waiting_routes = []
+    for kind, value in iterate_network_file(map_data_file):
+        if kind == "metro":
+            metros.append((value["code"], value))
+            if len(metros) >= batch_size:
+                airline_network.add_nodes(metros)
+                metros = []
+        elif kind == "route":
+            if metros:
+                airline_network.add_nodes(metros)
+                metros = []
+            route = get_route_tuple(value)
+            if not airline_network.get_node(route[0]) or not airline_network.get_node(route[1]):
+                waiting_routes.append(route)
+                continue
+            routes.append(route)
+            if len(routes) >= batch_size:
+                airline_network.add_connections(resolve_routes(airline_network, routes, unidirectional))
+                routes = []
+        elif kind == "changes":
+            airline_network.add_nodes(metros)
+            airline_network.add_connections(resolve_routes(airline_network, routes, unidirectional))
+            metros = []
+            routes = []
+            apply_changes(airline_network, value)
+    airline_network.add_nodes(metros)
+    airline_network.add_connections(resolve_routes(airline_network, routes + waiting_routes, unidirectional))
+    return airline_network
+
+
+def resolve_routes(airline_network, routes, unidirectional):
+    """ Turns routes into the connections to add to the graph. Routes to or from
+    cities that are not in the network are reported and skipped.
+
+    :param airline_network: Graph Object the routes are added to
+    :param routes: (start city code, end city code, distance) of each route, followed by
+        the route's own unidirectional flag when it has one
+    :param unidirectional: Whether the routes without a flag only go from start to end
+    :return: (start city code, end city code, distance) of each connection
+    """
+    for route in routes:
+        start_city_code, end_city_code, distance = route[:3]
         if not airline_network.get_node(start_city_code):
             print "%s not in Network. Route(s) to/from %s Not Created" % (start_city_code, end_city_code)
             continue
         if not airline_network.get_node(end_city_code):
             print "%s not in Network. Route(s) to/from %s Not Created" % (end_city_code, start_city_code)
             continue
-        airline_network.add_connection(start_city_code, end_city_code, route["distance"])
-        if not unidirectional:
-            airline_network.add_connection(end_city_code, start_city_code, route["distance"])
-    return airline_network
+        yield start_city_code, end_city_code, distance
+        if not (route[3] if len(route) > 3 else unidirectional):
+            yield end_city_code, start_city_code, distance
 
 
-def get_map_of_routes(airline_network, open_route_url=True):
-    """ Creates a URL and opens it if the flag is True to show a map of the CSAir Network
+def get_map_of_routes(airline_network, open_route_url=True, max_url_length=MAX_MAP_URL_LENGTH):
+    """ Creates the URLs of a map of the CSAir Network and opens them if the flag is True.
+    A network too large for one URL is split over several maps.
 
     http://stackoverflow.com/questions/4302027/how-to-open-a-url-in-python
     :param airline_network: Graph Object with CSAir Information
-    :param open_route_url: Whether or not to open the url automatically
-    :return:
+    :param open_route_url: Whether or not to open the urls automatically
+    :param max_url_length: Longest URL to create
+    :return: The URLs, one per line
+    """
+    route_urls = get_map_urls(airline_network, max_url_length)
+    if open_route_url:
+        for route_url in route_urls:
+            webbrowser.open(route_url)
+    return "\n".join(route_urls)
+
+
+def get_map_urls(airline_network, max_url_length=MAX_MAP_URL_LENGTH):
+    """ Builds map URLs drawing every route once: a route flown in both directions
+    becomes a single segment. Segments are listed in order and packed into as few
+    URLs of at most max_url_length characters as possible; a segment never spans
+    two URLs.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param max_url_length: Longest URL to create
+    :return: list of URLs
     """
     all_metros = airline_network.get_all_nodes()
-    route_url = MAP_BASE_URL
+    segments = set()
     for city_code in all_metros:
-        metro = all_metros[city_code]
-        connected_nodes = metro.get_connected_nodes()
-        for destination_code in connected_nodes:
-            destination = airline_network.get_node(destination_code)
-            route_url += "%s-%s," % (city_code, destination.get_data()["code"])
-    if open_route_url:
-        webbrowser.open(route_url)
-    return route_url
+        for destination_code in all_metros[city_code].get_connected_nodes():
+            segments.add((min(city_code, destination_code), max(city_code, destination_code)))
+    route_urls = []
+    url_segments = []
+    url_length = len(MAP_BASE_URL)
+    for start_code, end_code in sorted(segments):
+        segment = "%s-%s" % (start_code, end_code)
+        separator_length = 1 if url_segments else 0
+        if url_segments and url_length + separator_length + len(segment) > max_url_length:
+            route_urls.append(MAP_BASE_URL + ",".join(url_segments))
+            url_segments = []
+            url_length = len(MAP_BASE_URL)
+            separator_length = 0
+        url_segments.append(segment)
+        url_length += separator_length + len(segment)
+    if url_segments or not route_urls:
+        route_urls.append(MAP_BASE_URL + ",".join(url_segments))
+    return route_urls
 
 
 def get_all_cities(airline_network):
@@ -86,43 +233,117 @@ def get_hub_cities(airline_network, min_hub):
 
     :param airline_network: Graph Object with CSAir Information
     :param min_hub: Minimum number of routes for a city to be considered a hub
-    :return: list of hub cities and how many routes they have
-    """
-    all_metros = airline_network.get_all_nodes().values()
-    hubs = {}
-    for metro in all_metros:
-        connected_routes = metro.get_connected_nodes()
-        num_routes = len(connected_routes)
-        if num_routes >= min_hub:
-            if num_routes in hubs:
-                hubs[num_routes] += ", " + metro.get_data()["name"]
-            else:
-                hubs[num_routes] = metro.get_data()["name"]
+    :return: list of hub cities and how many routes they have, by number of routes
+    """
     hub_list_string = ""
-    for num_routes in hubs:
-        hub_list_string += "%i routes: %s\n" % (num_routes, hubs[num_routes])
+    for num_routes, city_codes in get_degree_index(airline_network).get_nodes_with_degree(min_hub):
+        hub_list_string += "%i routes: %s\n" % (num_routes, ", ".join(get_city_names(airline_network, city_codes)))
     return hub_list_string
 
 
+def get_top_hub_cities(airline_network, num_hubs):
+    """ Gets the cities with the most routes.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param num_hubs: Number of hub cities to list
+    :return: list of the hub cities and how many routes they have, most routes first
+    """
+    return "".join("%s (%i routes)\n" % (get_city_name(airline_network, city_code), num_routes)
+                   for num_routes, city_code in get_degree_index(airline_network).get_top_nodes(num_hubs))
+
+
+def get_degree_index(airline_network):
+    """ Gets the index of the cities by number of routes, kept up to date by the network.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: DegreeIndex of the network
+    """
+    degree_index = airline_network.get_observer(DegreeIndex)
+    if not degree_index:
+        degree_index = DegreeIndex(airline_network)
+    return degree_index
+
+
 def get_cities_by_continent(airline_network):
     """ List of cities by each continent they are in.
 
     :param airline_network: Graph Object with CSAir Information
     :return: Mapping of continents to all cities in them
     """
-    all_metros = airline_network.get_all_nodes().values()
-    continents_served = {}
-    for metro in all_metros:
-        metro_data = metro.get_data()
-        continent = metro_data["continent"]
-        if continent in continents_served:
-            continents_served[continent] += ", " + metro_data["name"]
-        else:
-            continents_served[continent] = metro_data["name"]
-    continents_list_string = ""
-    for continent in continents_served:
-        continents_list_string += "%s: %s\n" % (continent, continents_served[continent])
-    return continents_list_string
+    attribute_index = get_attribute_index(airline_network)
+    continent_list_string = ""
+    for continent in sorted(attribute_index.get_values("continent")):
+        city_names = get_city_names(airline_network, attribute_index.get_keys("continent", continent))
+        continent_list_string += "%s: %s\n" % (continent, ", ".join(city_names))
+    return continent_list_string
+
+
+def get_cities_by_attribute(airline_network, **criteria):
+    """ Lists the cities matching every given field, such as country="US" and region=2.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param criteria: Values of the indexed fields (continent, country, region, timezone)
+    :return: Names of the matching cities
+    """
+    get_attribute_index(airline_network)
+    city_codes = airline_network.find_nodes(**criteria) if criteria else ()
+    if not city_codes:
+        return "No cities match."
+    return ", ".join(get_city_names(airline_network, city_codes))
+
+
+def get_attribute_index(airline_network):
+    """ Gets the secondary indexes of the cities on INDEXED_FIELDS, kept up to date by the network.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: AttributeIndex of the network
+    """
+    return airline_network.create_index(*INDEXED_FIELDS)
+
+
+def get_network_distribution(airline_network):
+    """ Describes how routes, flight distances, populations, timezones, regions and
+    coordinates are spread over the network and over each continent.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: Number of cities per number of routes, percentiles of flight distance and population,
+        cities per timezone and region, the extent of the coordinates and a summary of each continent
+    """
+    network_statistics = get_network_statistics(airline_network)
+    route_count_histogram = network_statistics.route_count_histogram
+    distribution_string = "".join("%i routes: %i cities\n" % (num_routes, route_count_histogram[num_routes])
+                                  for num_routes in sorted(route_count_histogram))
+    for label, percentiles in (("Flight Distance", network_statistics.distance_percentiles),
+                               ("Population", network_statistics.population_percentiles)):
+        if percentiles:
+            distribution_string += "%s: %s\n" % (label, ", ".join(
+                "p%i %s" % (percent, round(value, 1)) for percent, value in zip(PERCENTILES, percentiles)))
+    for label, value_format, histogram in (("Timezones", "UTC%+g", network_statistics.timezone_histogram),
+                                           ("Regions", "Region %s", network_statistics.region_histogram)):
+        if histogram:
+            distribution_string += "%s: %s\n" % (label, ", ".join(
+                "%s %i cities" % (value_format % value, histogram[value]) for value in sorted(histogram)))
+    if network_statistics.coordinate_extent:
+        southmost, northmost, westmost, eastmost = network_statistics.coordinate_extent
+        distribution_string += "Coordinates: %s to %s, %s to %s\n" % (
+            get_degrees(southmost, "N", "S"), get_degrees(northmost, "N", "S"), get_degrees(westmost, "E", "W"),
+            get_degrees(eastmost, "E", "W"))
+    continent_summaries = network_statistics.continent_summaries
+    for continent in sorted(continent_summaries):
+        continent_summary = continent_summaries[continent]
+        distribution_string += "%s: %i cities" % (continent, continent_summary.num_cities)
+        if continent_summary.average_population is not None:
+            distribution_string += ", average population %s, biggest %s, smallest %s" % (
+                round(continent_summary.average_population, 1),
+                get_city_name(airline_network, continent_summary.biggest_city),
+                get_city_name(airline_network, continent_summary.smallest_city))
+        distribution_string += "\n"
+    return distribution_string
+
+
+def get_degrees(value, positive_direction, negative_direction):
+    """ :return: Signed degrees written with their direction, such as 33S """
+    return "%g%s" % (abs(value), positive_direction if value >= 0 else negative_direction)
 
 
 def get_average_population(airline_network):
@@ -131,14 +352,8 @@ def get_average_population(airline_network):
     :param airline_network: Graph Object with CSAir Information
     :return: Average Population
     """
-    all_metros = airline_network.get_all_nodes().values()
-    all_populations = 0
-    num_cities = 0
-    for metro in all_metros:
-        metro_data = metro.get_data()
-        all_populations += metro_data["population"]
-        num_cities += 1
-    return "Average population: " + str(all_populations / num_cities)
+    network_aggregates = get_network_aggregates(airline_network)
+    return "Average population: " + str(network_aggregates.get_value_total() / network_aggregates.get_value_count())
 
 
 def get_smallest_city(airline_network):
@@ -147,13 +362,8 @@ def get_smallest_city(airline_network):
     :param airline_network: Graph Object with CSAir Information
     :return: Smallest City
     """
-    all_metros = airline_network.get_all_nodes().values()
-    smallest_metro = None
-    for metro in all_metros:
-        metro_data = metro.get_data()
-        if not smallest_metro or metro_data["population"] < smallest_metro["population"]:
-            smallest_metro = metro_data
-    return "Smallest City: " + smallest_metro["name"] + " with population " + str(smallest_metro["population"])
+    population, city_code = get_network_aggregates(airline_network).get_smallest_value()
+    return "Smallest City: " + get_city_name(airline_network, city_code) + " with population " + str(population)
 
 
 def get_biggest_city(airline_network):
@@ -162,13 +372,8 @@ def get_biggest_city(airline_network):
     :param airline_network: Graph Object with CSAir Information
     :return: Biggest City
     """
-    all_metros = airline_network.get_all_nodes().values()
-    biggest_metro = None
-    for metro in all_metros:
-        metro_data = metro.get_data()
-        if not biggest_metro or metro_data["population"] > biggest_metro["population"]:
-            biggest_metro = metro_data
-    return "Biggest City: " + biggest_metro["name"] + " with population " + str(biggest_metro["population"])
+    population, city_code = get_network_aggregates(airline_network).get_largest_value()
+    return "Biggest City: " + get_city_name(airline_network, city_code) + " with population " + str(population)
 
 
 def get_average_distance(airline_network):
@@ -177,15 +382,9 @@ def get_average_distance(airline_network):
     :param airline_network: Graph Object with CSAir Information
     :return: Average Distance
     """
-    all_metros = airline_network.get_all_nodes().values()
-    total_distance = 0
-    num_routes = 0
-    for metro in all_metros:
-        connected_routes = metro.get_connected_nodes()
-        for destination in connected_routes:
-            total_distance += connected_routes[destination]
-            num_routes += 1
-    return "Average Distance of Flights: " + str(total_distance / num_routes)
+    network_aggregates = get_network_aggregates(airline_network)
+    return "Average Distance of Flights: " + str(network_aggregates.get_edge_total() /
+                                                 network_aggregates.get_edge_count())
 
 
 def get_shortest_single_flight(airline_network):
@@ -194,19 +393,9 @@ def get_shortest_single_flight(airline_network):
     :param airline_network: Graph Object with CSAir Information
     :return: Shortest flight.
     """
-    all_metros = airline_network.get_all_nodes().values()
-    shortest_distance = None
-    start_city = None
-    end_city = None
-    for metro in all_metros:
-        connected_routes = metro.get_connected_nodes()
-        for destination_code in connected_routes:
-            if not shortest_distance or shortest_distance > connected_routes[destination_code]:
-                start_city = metro.get_data()["name"]
-                destination_node = airline_network.get_node(destination_code)
-                end_city = destination_node.get_data()["name"]
-                shortest_distance = connected_routes[destination_code]
-    return "Shortest Flight: from %s to %s (%i)" % (start_city, end_city, shortest_distance)
+    distance, start_code, end_code = get_network_aggregates(airline_network).get_shortest_edge()
+    return "Shortest Flight: from %s to %s (%i)" % (get_city_name(airline_network, start_code),
+                                                    get_city_name(airline_network, end_code), distance)
 
 
 def get_longest_single_flight(airline_network):
@@ -215,33 +404,41 @@ def get_longest_single_flight(airline_network):
     :param airline_network: Graph Object with CSAir Information
     :return: Longest flight.
     """
-    all_metros = airline_network.get_all_nodes().values()
-    longest_distance = None
-    start_city = None
-    end_city = None
-    for metro in all_metros:
-        connected_routes = metro.get_connected_nodes()
-        for destination_code in connected_routes:
-            if not longest_distance or longest_distance < connected_routes[destination_code]:
-                start_city = metro.get_data()["name"]
-                destination_node = airline_network.get_node(destination_code)
-                end_city = destination_node.get_data()["name"]
-                longest_distance = connected_routes[destination_code]
-    return "Longest Flight: from %s to %s (%i)" % (start_city, end_city, longest_distance)
+    distance, start_code, end_code = get_network_aggregates(airline_network).get_longest_edge()
+    return "Longest Flight: from %s to %s (%i)" % (get_city_name(airline_network, start_code),
+                                                   get_city_name(airline_network, end_code), distance)
+
+
+def get_network_aggregates(airline_network):
+    """ Gets the running flight and population aggregates of the network. They are
+    built by one scan the first time and then kept up to date by the network
+    itself, so the statistics above stay O(1) while the network is edited.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: GraphAggregates over the flight distances and city populations
+    """
+    network_aggregates = airline_network.get_observer(GraphAggregates)
+    if not network_aggregates:
+        network_aggregates = GraphAggregates(airline_network, "population")
+    return network_aggregates
+
+
+def get_city_name(airline_network, city_code):
+    return airline_network.get_node(city_code).get_data()["name"]
+
+
+def get_city_names(airline_network, city_codes):
+    return sorted(get_city_name(airline_network, city_code) for city_code in city_codes)
 
 
 def delete_city(airline_network, delete_city_code):
-    """ Delete a city and all references to it from the network
+    """ Delete a city and all references to it from the network. The network's
+    reverse index limits the work to the cities with a route to the deleted city.
 
     :param airline_network: Graph Object with CSAir Information
     :param delete_city_code: City Code of City to be Deleted
     """
     airline_network.delete_node(delete_city_code)
-    all_cities = airline_network.get_all_nodes()
-    for city_code in all_cities:
-        connections_to_city = all_cities[city_code].get_connected_nodes()
-        if delete_city_code in connections_to_city.keys():
-            del connections_to_city[delete_city_code]
 
 
 def delete_route(airline_network, start_city_code, end_city_code, bidirectional):
@@ -281,27 +478,129 @@ def add_route(airline_network, bidirectional, start_route, end_route, weight):
         airline_network.add_connection(end_route, start_route, weight)
 
 
-def download_data_to_json(airline_network):
-    """Re-download all the data to an output json file.
+def download_data_to_json(airline_network, output_file_path="data/output_data.json", compact=False):
+    """Re-download all the data to an output json file. Routes flown both ways at the
+    same distance are written once, as in the source files. Patches saved next to
+    the file are deleted, since the file now holds their changes.
 
-    http://stackoverflow.com/questions/12309269/how-do-i-write-json-data-to-a-file-in-python
-    http://stackoverflow.com/questions/12943819/how-to-python-prettyprint-a-json-file
     :param airline_network: Graph Object with CSAir Information
+    :param output_file_path: The File Path to write to
+    :param compact: Whether to leave out indentation and whitespace
     """
-    compiled_json = {"unidirectional": True, "metros": [], "routes": []}
-    all_nodes = airline_network.get_all_nodes()
-    for city_code in all_nodes:
-        node_data = all_nodes[city_code].get_data()
-        compiled_json["metros"].append(node_data)
-        connections = all_nodes[city_code].get_connected_nodes()
-        for destination_code in connections:
-            route = {"ports": [node_data["code"], destination_code], "distance": connections[destination_code]}
-            compiled_json["routes"].append(route)
-    with open("data/output_data.json", 'w') as json_file:
-        json.dump(compiled_json, json_file, indent=4, sort_keys=True)
+    write_network_file(airline_network, output_file_path, compact)
+    for patch_file_path in get_patch_file_paths(output_file_path):
+        os.remove(patch_file_path)
+    change_journal = airline_network.get_observer(ChangeJournal)
+    if change_journal:
+        change_journal.checkpoint(output_file_path)
+
+
+def download_changes_to_json(airline_network, output_file_path="data/output_data.json", compact=False,
+                             max_patch_files=MAX_PATCH_FILES):
+    """ Saves the network by writing only the changes made since it was last saved
+    to the output file, as a patch file next to it. The whole network is written
+    instead the first time, and once max_patch_files patches have piled up.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param output_file_path: The File Path of the full output file
+    :param compact: Whether to leave out indentation and whitespace
+    :param max_patch_files: Number of patches kept before they are folded into the output file
+    :return: The File Path written, or None if nothing changed since the last save
+    """
+    change_journal = get_change_journal(airline_network)
+    patch_file_paths = get_patch_file_paths(output_file_path)
+    if change_journal.get_checkpoint_label() != output_file_path or not os.path.exists(output_file_path) \
+            or len(patch_file_paths) >= max_patch_files:
+        download_data_to_json(airline_network, output_file_path, compact)
+        return output_file_path
+    if not change_journal.get_changes():
+        return None
+    patch_file_path = get_patch_file_path(output_file_path, len(patch_file_paths) + 1)
+    write_patch_file(change_journal.get_changes(), patch_file_path, compact)
+    change_journal.checkpoint(output_file_path)
+    return patch_file_path
+
+
+def add_saved_data_to_graph(airline_network, output_file_path="data/output_data.json"):
+    """ Loads a network saved by download_changes_to_json: the output file, then each
+    of its patches in order. Every patch is checked before any of them is made, so
+    when one was saved against a different network the network is left as the
+    output file left it.
+
+    :param airline_network: Graph Object to add the data to
+    :param output_file_path: The File Path of the full output file
+    :return: graph object that is created
+    :raises ValueError: if a patch was saved against a different network
+    """
+    add_file_data_to_graph(airline_network, output_file_path)
+    graph_outline = GraphOutline(airline_network)
+    patches = []
+    for patch_file_path in get_patch_file_paths(output_file_path):
+        with open(patch_file_path, "r") as patch_file:
+            changes = json.load(patch_file)["changes"]
+        try:
+            check_changes(graph_outline, changes)
+        except ValueError, e:
+            raise ValueError("%s: %s" % (patch_file_path, e))
+        patches.append(changes)
+    for changes in patches:
+        make_changes(airline_network, changes)
+    return airline_network
+
+
+def get_change_journal(airline_network):
+    """ Gets the journal of the changes made to the network, recording from now on
+    if the network has none.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: ChangeJournal of the network
+    """
+    return airline_network.get_observer(ChangeJournal) or ChangeJournal(airline_network)
+
+
+def get_patch_file_path(output_file_path, patch_number):
+    """ Patches are stored next to their output file, e.g. data/output_data.patch1.json """
+    return "%s.patch%i.json" % (os.path.splitext(output_file_path)[0], patch_number)
+
+
+def get_patch_file_paths(output_file_path):
+    """ :return: File Paths of the patches of an output file, in the order they were written """
+    patch_file_paths = []
+    patch_number = 1
+    while os.path.exists(get_patch_file_path(output_file_path, patch_number)):
+        patch_file_paths.append(get_patch_file_path(output_file_path, patch_number))
+        patch_number += 1
+    return patch_file_paths
+
+
+def get_cache_statistics():
+    """ Describes how well the query cache is working.
+
+    :return: Hit, miss and eviction counts of the query cache
+    """
+    statistics = query_cache.get_statistics()
+    return "Query Cache: %i hits, %i misses, %i evictions (%i of %i entries used)" \
+           % (statistics["hits"], statistics["misses"], statistics["evictions"],
+              statistics["size"], statistics["capacity"])
 
 
 def get_route_data(airline_network, city_codes):
+    """ Get the metadata about a route, reusing the answer from the query cache
+    while the network is unchanged.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param city_codes: List of city codes in the route from start to finish.
+    :return: String explaining the metadata about the route
+    """
+    cache_key = ("route_data", airline_network.get_version(), tuple(city_codes))
+    route_data = query_cache.get(cache_key)
+    if route_data is None:
+        route_data = calculate_route_data(airline_network, city_codes)
+        query_cache.put(cache_key, route_data)
+    return route_data
+
+
+def calculate_route_data(airline_network, city_codes):
     """ Get specific information about a route across multiple cities. Specifically,
     get the total distance, total cost, and total time of the journey using given
     information about cost and acceleration of the flight.
@@ -310,40 +609,24 @@ def get_route_data(airline_network, city_codes):
     :param city_codes: List of city codes in the route from start to finish.
     :return: String explaining the metadata about the route
     """
-    if len(city_codes) < 2:
-        return "Not enough city codes entered"
-    total_distance = 0
-    total_cost = 0
-    total_time = 0
-    cost_per_kilometer = 0.35
-    start_code = city_codes[0]
-    start_city = airline_network.get_node(start_code)
-    for i in range(1, len(city_codes)):
-        if not start_city:
-            return "Invalid City Code: " + start_city
-        city_code = city_codes[i]
-        start_connections = start_city.get_connected_nodes()
-        current_city = airline_network.get_node(city_code)
-        if not current_city:
-            return "Invalid City Code: " + city_code
-        current_connections = current_city.get_connected_nodes()
-        if city_code not in start_connections:
-            return "Invalid Route"
-        distance = start_connections[city_code]
-        total_distance += distance
-        total_cost += distance * cost_per_kilometer
-        if cost_per_kilometer >= 0.05:
-            cost_per_kilometer -= 0.05
-        total_time += calculate_time(distance, city_codes, current_connections, i)
-        start_city = airline_network.get_node(city_code)
+    return describe_itinerary(evaluate_itinerary(airline_network, city_codes))
+
+
+def describe_itinerary(itinerary_data):
+    """ Formats the metadata about a route.
+
+    :param itinerary_data: ItineraryData of the route
+    :return: String explaining the metadata about the route
+    """
+    if itinerary_data.error:
+        return itinerary_data.error
     return "Total Distance = %i\nTotal Cost = $%.2f\nTotal Time = %ihrs %imins" \
-           % (total_distance, total_cost, total_time/60, total_time % 60)
+           % (itinerary_data.distance, itinerary_data.cost, itinerary_data.time/60, itinerary_data.time % 60)
 
 
 def calculate_time(distance, city_codes, current_connections, i):
     """ Helper function to calculate the time between cities and the layover time.
-    The acceleration is understood to take 200 meters to hit 750 kmph. The time is
-    returned in minutes.
+    The time is returned in minutes.
 
     :param distance: Distance in this portion of the route.
     :param city_codes: A list of the codes in the route.
@@ -351,84 +634,118 @@ def calculate_time(distance, city_codes, current_connections, i):
     :param i: Which city code is currently being considered
     :return: The time it takes to travel the given distance
     """
-    total_time = 0
-    if distance >= 400:
-        acceleration_time = math.sqrt((2 * 200) / ACCELERATION)  # t = sqrt(2d/a) in minutes
-        cruising_time = (distance - 400.0) / (750.0 / 60)  # t = d/v in minutes
-        total_time += 2 * acceleration_time + cruising_time  # cruising time + acceleration + deceleration
-    else:
-        acceleration_time = math.sqrt((2 * distance / 2) / ACCELERATION)  # in minutes
-        total_time += 2 * acceleration_time  # acceleration + deceleration
+    total_time = calculate_flight_time(distance)
     if i != len(city_codes) - 1:
-        layover_time = 120 - 10 * (len(current_connections) - 1)  # in minutes
-        if layover_time < 0:
-            layover_time = 0
-        total_time += layover_time
+        total_time += calculate_layover_time(len(current_connections))
     return total_time
 
 
-def initialize_dictionaries(all_cities, start_city):
-    """ Helper function to initialize all the dictionaries regarding visited, distance,
-    and previous nodes.
+def get_shortest_path(airline_network, start_city, end_city, algorithm="dijkstra"):
+    """ Finds the shortest route between two cities with the routing engine and
+    describes it along with the metadata about the route.
 
-    :param all_cities: All the cities in the network
-    :param start_city: The start city of the route
-    :return: The initialized dictionaries
+    :param airline_network: Graph Object with CSAir Information
+    :param start_city: The starting city of the route
+    :param end_city: The end city of the route
+    :param algorithm: Search to use: "dijkstra", "astar" (great-circle guided),
+        "bidirectional" (searching from both cities at once), "hierarchy" (query on
+        the contraction hierarchy), "matrix" (lookup in the precomputed all-pairs
+        matrix), "fastest" (smallest total travel time instead of distance) or
+        "cheapest" (smallest total cost)
+    :return: The route taken and the metadata about the route.
+    """
+    if algorithm not in ROUTING_ALGORITHMS:
+        raise ValueError("Unknown routing algorithm: %s" % algorithm)
+    cache_key = ("shortest_path", airline_network.get_version(), start_city, end_city, algorithm)
+    route_description = query_cache.get(cache_key)
+    if route_description is None:
+        route_description = describe_shortest_path(airline_network, start_city, end_city, algorithm)
+        query_cache.put(cache_key, route_description)
+    return route_description
+
+
+def get_fastest_path(airline_network, start_city, end_city):
+    """ Finds the route with the smallest total travel time between two cities,
+    layovers included, and describes it along with the metadata about the route.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param start_city: The starting city of the route
+    :param end_city: The end city of the route
+    :return: The route taken and the metadata about the route.
     """
-    distance = {}
-    previous_node = {}
-    visited = {}
-    for city_code in all_cities:
-        if city_code == start_city:
-            visited[city_code] = False
-            distance[start_city] = 0
+    return get_shortest_path(airline_network, start_city, end_city, "fastest")
+
+
+def get_cheapest_path(airline_network, start_city, end_city):
+    """ Finds the route with the smallest total cost between two cities, with the
+    fare falling on every leg, and describes it along with the metadata about the route.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param start_city: The starting city of the route
+    :param end_city: The end city of the route
+    :return: The route taken and the metadata about the route.
+    """
+    return get_shortest_path(airline_network, start_city, end_city, "cheapest")
+
+
+def get_alternative_routes(airline_network, start_city, end_city, num_routes):
+    """ Finds the shortest routes between two cities that never visit a city twice
+    and describes each one along with the metadata about the route. The network
+    is not modified.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param start_city: The starting city of the route
+    :param end_city: The end city of the route
+    :param num_routes: Number of routes to list
+    :return: The routes, shortest first, and the metadata about each route.
+    """
+    cache_key = ("alternative_routes", airline_network.get_version(), start_city, end_city, num_routes)
+    routes_description = query_cache.get(cache_key)
+    if routes_description is None:
+        shortest_paths = find_k_shortest_paths(airline_network, start_city, end_city, num_routes)
+        if not shortest_paths:
+            routes_description = "No Route from %s to %s" % (start_city, end_city)
         else:
-            distance[city_code] = float("inf")
-            previous_node[city_code] = None
-            visited[city_code] = False
-    return distance, previous_node, visited
+            routes_description = "\n".join("%i. %s\n%s" % (i + 1, shortest_path.path,
+                                                            get_route_data(airline_network, shortest_path.path))
+                                           for i, shortest_path in enumerate(shortest_paths))
+        query_cache.put(cache_key, routes_description)
+    return routes_description
+
+
+def get_reachable_cities(airline_network, origin_city, max_distance=None, max_time=None):
+    """ Lists every city that can be reached from a city within a distance, or within
+    a travel time including layovers.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param origin_city: The city to start from
+    :param max_distance: Largest total distance of the route
+    :param max_time: Largest total time of the itinerary in minutes
+    :return: The reachable cities, nearest first, with the distance and time to each
+    """
+    if not airline_network.get_node(origin_city):
+        return "Invalid City Code: " + origin_city
+    reachable_cities = find_reachable_cities(airline_network, origin_city, max_distance, max_time)
+    if not reachable_cities:
+        return "No cities reachable from %s" % origin_city
+    return "".join("%s (%s): %i km, %ihrs %imins\n" % (get_city_name(airline_network, reachable_city.city_code),
+                                                      reachable_city.city_code, reachable_city.distance,
+                                                      reachable_city.time/60, reachable_city.time % 60)
+                   for reachable_city in reachable_cities)
 
 
-def get_shortest_path(airline_network, start_city, end_city):
-    """ Dijsktra's algorithm implementation using a Priority Queue to sort shortest paths,
-    a distance dictionary to store the shortest distance to each city, the previous node for
-    each city to get there in that distance, and whether or not each city has been visited.
+def describe_shortest_path(airline_network, start_city, end_city, algorithm):
+    """ Runs the routing algorithm and describes the route it finds.
 
     :param airline_network: Graph Object with CSAir Information
     :param start_city: The starting city of the route
     :param end_city: The end city of the route
+    :param algorithm: Key of the search in ROUTING_ALGORITHMS
     :return: The route taken and the metadata about the route.
     """
-    all_cities = airline_network.get_all_nodes()
-    queue = PriorityQueue()
-    distance, previous_node, visited = initialize_dictionaries(all_cities, start_city)
-    current_city = start_city
-    current_node = all_cities[current_city]
-    connected_cities = current_node.get_connected_nodes()
-    for connected_code in connected_cities:
-        queue.put([connected_cities[connected_code], connected_code, current_city])
-
-    while not queue.empty():
-        visited[current_city] = True
-        closest_values = queue.get()
-        connected_city = closest_values[1]
-        if distance[connected_city] > closest_values[0]:
-            distance[connected_city] = closest_values[0]
-            previous_node[connected_city] = closest_values[2]
-        current_city = connected_city
-        if current_city == end_city:
-            break
-        current_node = airline_network.get_node(current_city)
-        connected_cities = current_node.get_connected_nodes()
-        for connected_code in connected_cities:
-            if not visited[connected_code]:
-                queue.put([distance[current_city] + connected_cities[connected_code], connected_code, current_city])
-
-    route = []
-    current_city = end_city
-    while current_city != start_city:
-        route.insert(0, current_city)
-        current_city = previous_node[current_city]
-    route.insert(0, start_city)
+    shortest_path = ROUTING_ALGORITHMS[algorithm](airline_network, start_city, end_city)
+    if not shortest_path:
+        return "No Route from %s to %s" % (start_city, end_city)
+    route = shortest_path.path
     route_data = get_route_data(airline_network, route)
     return str(route) + "\n" + route_data
@@ -0,0 +1,135 @@
+""" Batch evaluation of itineraries over the CSAir network.
+
+An itinerary is a sequence of city codes flown in order. Each one is validated
+and priced in a single pass over its legs, and the result is returned as an
+ItineraryData record rather than as text. Large batches can be split into chunks
+and spread over a process pool; every worker receives a frozen copy of the
+network once.
+"""
+
+import re
+from collections import namedtuple
+
+from scripts.parallel import map_over_network
+from scripts.travel_times import get_travel_time_table
+
+ItineraryData = namedtuple("ItineraryData", ["city_codes", "distance", "cost", "time", "error"])
+
+FIRST_COST_PER_KILOMETER = 0.35
+COST_DECREMENT = 0.05
+CHUNK_SIZE = 1000
+
+
+def get_cost_per_kilometer_by_leg():
+    """ The fare falls by COST_DECREMENT after every leg for as long as it is at least
+    COST_DECREMENT, then stays where it is. The fares are produced by the same
+    repeated subtraction, so the floating point values are identical to pricing
+    the legs one after the other.
+
+    :return: list of the fare of each leg; legs past the end pay the last fare
+    """
+    cost_per_kilometer = FIRST_COST_PER_KILOMETER
+    fares = [cost_per_kilometer]
+    while cost_per_kilometer >= COST_DECREMENT:
+        cost_per_kilometer -= COST_DECREMENT
+        fares.append(cost_per_kilometer)
+    return fares
+
+COST_PER_KILOMETER_BY_LEG = get_cost_per_kilometer_by_leg()
+
+
+def evaluate_itinerary(airline_network, city_codes, travel_time_table=None):
+    """ Validates and prices one itinerary.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param city_codes: City codes in the route from start to finish
+    :param travel_time_table: TravelTimeTable of the network, looked up if not given
+    :return: ItineraryData. When the itinerary is not valid, error says why and the
+        distance, cost and time are None.
+    """
+    city_codes = tuple(city_codes)
+    if len(city_codes) < 2:
+        return ItineraryData(city_codes, None, None, None, "Not enough city codes entered")
+    if travel_time_table is None:
+        travel_time_table = get_travel_time_table(airline_network)
+    total_distance = 0
+    total_cost = 0
+    total_time = 0
+    last_fare = len(COST_PER_KILOMETER_BY_LEG) - 1
+    start_code = city_codes[0]
+    start_city = airline_network.get_node(start_code)
+    if not start_city:
+        return ItineraryData(city_codes, None, None, None, "Invalid City Code: " + start_code)
+    for i in range(1, len(city_codes)):
+        city_code = city_codes[i]
+        current_city = airline_network.get_node(city_code)
+        if not current_city:
+            return ItineraryData(city_codes, None, None, None, "Invalid City Code: " + city_code)
+        start_connections = start_city.get_connected_nodes()
+        if city_code not in start_connections:
+            return ItineraryData(city_codes, None, None, None, "Invalid Route")
+        distance = start_connections[city_code]
+        total_distance += distance
+        total_cost += distance * COST_PER_KILOMETER_BY_LEG[min(i - 1, last_fare)]
+        total_time += travel_time_table.get_leg_time(start_code, city_code, i == len(city_codes) - 1)
+        start_code = city_code
+        start_city = current_city
+    return ItineraryData(city_codes, total_distance, total_cost, total_time, None)
+
+
+def evaluate_itinerary_chunk(airline_network, itineraries):
+    """ Evaluates a chunk of itineraries in a worker process.
+
+    :param airline_network: Network of the worker
+    :param itineraries: list of city code sequences
+    :return: list of ItineraryData
+    """
+    travel_time_table = get_travel_time_table(airline_network)
+    return [evaluate_itinerary(airline_network, city_codes, travel_time_table) for city_codes in itineraries]
+
+
+def evaluate_itineraries(airline_network, itineraries, processes=1, chunk_size=CHUNK_SIZE):
+    """ Validates and prices many itineraries.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param itineraries: Iterable of city code sequences
+    :param processes: Number of worker processes. 1 runs inline, None uses every CPU.
+    :param chunk_size: Number of itineraries sent to a worker at a time
+    :return: list of ItineraryData in the order of the itineraries
+    """
+    if processes == 1:
+        return evaluate_itinerary_chunk(airline_network, itineraries)
+    itineraries = list(itineraries)
+    chunks = [itineraries[start:start + chunk_size] for start in range(0, len(itineraries), chunk_size)]
+    if len(chunks) < 2:
+        return evaluate_itinerary_chunk(airline_network, itineraries)
+    results = []
+    for chunk_results in map_over_network(evaluate_itinerary_chunk, chunks, airline_network.freeze(), processes):
+        results.extend(chunk_results)
+    return results
+
+
+def read_itinerary_file(itinerary_file_path):
+    """ Reads itineraries from a text file with one itinerary per line, its city
+    codes separated by commas, dashes or whitespace. Blank lines and lines starting
+    with # are skipped.
+
+    :param itinerary_file_path: The File Path of the itinerary file
+    :return: generator of city code lists
+    """
+    with open(itinerary_file_path, "r") as itinerary_file:
+        for line in itinerary_file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield [city_code.upper() for city_code in re.split(r"[\s,\-]+", line) if city_code]
+
+
+def evaluate_itinerary_file(airline_network, itinerary_file_path, processes=1):
+    """ Validates and prices every itinerary of a file.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param itinerary_file_path: The File Path of the itinerary file
+    :param processes: Number of worker processes. 1 runs inline, None uses every CPU.
+    :return: list of ItineraryData in file order
+    """
+    return evaluate_itineraries(airline_network, read_itinerary_file(itinerary_file_path), processes)
@@ -0,0 +1,141 @@
+""" Incremental reader for network files too large to hold in memory at once.
+
+The file is read in chunks and the "metros" and "routes" arrays are decoded one
+element at a time with the standard library's JSONDecoder.raw_decode, so only
+the element being decoded is held in memory next to the graph.
+"""
+
+import io
+import json
+
+CHUNK_SIZE = 1 << 16
+WHITESPACE = " \t\n\r"
+STREAMED_ARRAYS = {"metros": "metro", "routes": "route"}
+
+
+class JSONStream:
+    """ Buffered reader over a JSON document that decodes one value at a time. """
+    def __init__(self, json_file, chunk_size=CHUNK_SIZE):
+        self.json_file = json_file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = u""
+        self.position = 0
+        self.end_of_file = False
+
+    def read_chunk(self):
+        if self.position > self.chunk_size:
+            self.buffer = self.buffer[self.position:]  # Drop what has been consumed.
+            self.position = 0
+        chunk = self.json_file.read(self.chunk_size)
+        if not chunk:
+            self.end_of_file = True
+        self.buffer += chunk
+
+    def peek(self):
+        """ Skips whitespace and returns the next character, or None at the end of the file. """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if self.end_of_file:
+                return None
+            self.read_chunk()
+
+    def expect(self, character):
+        if self.peek() != character:
+            raise ValueError("Expected %r at offset %i of the buffer" % (character, self.position))
+        self.position += 1
+
+    def decode_value(self):
+        """ Decodes the next value, reading more of the file until it is complete. A
+        value that ends exactly at the end of the buffer is only accepted at the end
+        of the file, since a number could continue in the next chunk.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                if end < len(self.buffer) or self.end_of_file:
+                    self.position = end
+                    return value
+            except ValueError:
+                if self.end_of_file:
+                    raise
+            self.read_chunk()
+
+
+def iterate_network_file(json_file, chunk_size=CHUNK_SIZE):
+    """ Reads a network file one top-level member at a time. Each element of the
+    "metros" and "routes" arrays is produced on its own as a ("metro", metro) or
+    ("route", route) pair; any other member is produced as a (key, value) pair.
+
+    :param json_file: Open network file
+    :param chunk_size: Number of characters to read at a time
+    :return: generator of (kind, value) pairs in file order
+    """
+    stream = JSONStream(json_file, chunk_size)
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.decode_value()
+        stream.expect(":")
+        if key in STREAMED_ARRAYS and stream.peek() == "[":
+            stream.expect("[")
+            if stream.peek() != "]":
+                while True:
+                    yield STREAMED_ARRAYS[key], stream.decode_value()
+                    if stream.peek() != ",":
+                        break
+                    stream.expect(",")
+            stream.expect("]")
+        else:
+            yield key, stream.decode_value()
+        if stream.peek() != ",":
+            break
+        stream.expect(",")
+    stream.expect("}")
+
+
+def get_route_tuple(route):
+    """ :param route: Data about a route in a network file
+    :return: (start city code, end city code, distance), followed by the route's own
+        unidirectional flag when it has one
+    """
+    if "unidirectional" in route:
+        return route["ports"][0], route["ports"][1], route["distance"], route["unidirectional"]
+    return route["ports"][0], route["ports"][1], route["distance"]
+
+
+def open_network_file(map_file_path):
+    return io.open(map_file_path, "r", encoding="utf-8")
+
+
+def find_top_level_value(map_file_path, key, default=None, chunk_size=CHUNK_SIZE):
+    """ Finds the value of one top-level member of a network file without keeping
+    the file in memory. Files that never mention the key are ruled out by a plain
+    text scan; otherwise the file is read until the member is found.
+
+    :param map_file_path: The File Path of the network file
+    :param key: Key of the top-level member
+    :param default: Value to return when the file has no such member
+    :param chunk_size: Number of characters to read at a time
+    :return: The member's value
+    """
+    quoted_key = json.dumps(key)
+    with open_network_file(map_file_path) as json_file:
+        tail = u""
+        while True:
+            chunk = json_file.read(chunk_size)
+            if not chunk:
+                return default
+            if quoted_key in tail + chunk:
+                break
+            tail = chunk[-len(quoted_key):]
+    with open_network_file(map_file_path) as json_file:
+        for kind, value in iterate_network_file(json_file, chunk_size):
+            if kind == key:
+                return value
+    return default
@@ -0,0 +1,119 @@
+""" Loader that merges many network files, such as hub extensions, into one network.
+
+The files are parsed in parallel by a process pool. The metros of every file are
+added before any route, so a route resolves no matter which file defines the
+metros it connects. Routes that still cannot be resolved are collected into a
+single report instead of being printed one at a time.
+"""
+
+import glob
+import json
+import os
+import re
+from collections import namedtuple
+
+from scripts.json_stream import get_route_tuple
+from scripts.parallel import map_over_network
+
+# Files written next to a network file: its path matrix, contraction hierarchy and saved patches.
+SIDECAR_FILE_PATTERN = re.compile(r"\.(paths|hierarchy|patch\d+)\.json$")
+
+UnresolvedRoute = namedtuple("UnresolvedRoute", ["map_file_path", "start_city", "end_city", "missing_city"])
+
+
+def find_network_files(path_or_pattern):
+    """ Lists the network files in a folder, or matching a glob pattern, in name order.
+    The path matrices, hierarchies and patches saved next to network files are left out.
+
+    :param path_or_pattern: Folder of JSON Files or a glob pattern such as data/*_hub.json
+    :return: sorted list of File Paths
+    """
+    if os.path.isdir(path_or_pattern):
+        path_or_pattern = os.path.join(path_or_pattern, "*.json")
+    return sorted(map_file_path for map_file_path in glob.glob(path_or_pattern)
+                  if not SIDECAR_FILE_PATTERN.search(map_file_path))
+
+
+def parse_network_file(unused_network, map_file_path):
+    """ Reads one network file in a worker process.
+
+    :param unused_network: Network state of the worker (not needed for parsing)
+    :param map_file_path: The File Path of the network file
+    :return: (metros, routes as (start, end, distance) tuples followed by the route's own
+        unidirectional flag when it has one, unidirectional), or None
+        if the file cannot be read or is not a network file
+    """
+    try:
+        with open(map_file_path, "r") as map_data_file:
+            map_data = json.load(map_data_file)
+        routes = [get_route_tuple(route) for route in map_data["routes"]]
+        return map_data["metros"], routes, map_data.get("unidirectional", False)
+    except (IOError, ValueError, KeyError, TypeError, IndexError):
+        return None
+
+
+def merge_network_files(airline_network, map_file_paths, processes=None):
+    """ Parses the network files in parallel and merges them into the network. When
+    several files define the same metro, the file listed last wins.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param map_file_paths: File Paths of the network files
+    :param processes: Number of worker processes, defaults to the number of CPUs
+    :return: (UnresolvedRoute list, File Paths that could not be read)
+    """
+    map_file_paths = list(map_file_paths)
+    parsed_files = map_over_network(parse_network_file, map_file_paths, None, processes)
+    unreadable_files = [map_file_path for map_file_path, parsed_file in zip(map_file_paths, parsed_files)
+                        if parsed_file is None]
+    network_files = [(map_file_path, parsed_file) for map_file_path, parsed_file in zip(map_file_paths, parsed_files)
+                     if parsed_file is not None]
+    for map_file_path, (metros, routes, unidirectional) in network_files:
+        airline_network.add_nodes((metro["code"], metro) for metro in metros)
+    all_metros = airline_network.get_all_nodes()
+    connections = []
+    unresolved_routes = []
+    for map_file_path, (metros, routes, unidirectional) in network_files:
+        for route in routes:
+            start_city, end_city, distance = route[:3]
+            for city_code in (start_city, end_city):
+                if city_code not in all_metros:
+                    unresolved_routes.append(UnresolvedRoute(map_file_path, start_city, end_city, city_code))
+                    break
+            else:
+                connections.append((start_city, end_city, distance))
+                if not (route[3] if len(route) > 3 else unidirectional):
+                    connections.append((end_city, start_city, distance))
+    airline_network.add_connections(connections)
+    return unresolved_routes, unreadable_files
+
+
+def describe_merge(map_file_paths, unresolved_routes, unreadable_files):
+    """ Builds the consolidated report of a merge.
+
+    :param map_file_paths: File Paths of the network files
+    :param unresolved_routes: UnresolvedRoute list returned by merge_network_files
+    :param unreadable_files: File Paths that could not be read
+    :return: Report of what was merged and which routes were not created
+    """
+    report = ["Merged %i of %i network files." % (len(map_file_paths) - len(unreadable_files), len(map_file_paths))]
+    for map_file_path in unreadable_files:
+        report.append("Not a readable network file: %s" % map_file_path)
+    if unresolved_routes:
+        report.append("%i route(s) not created because a city is not in the network:" % len(unresolved_routes))
+        for unresolved_route in unresolved_routes:
+            report.append("\t%s-%s (%s missing) in %s" % (unresolved_route.start_city, unresolved_route.end_city,
+                                                         unresolved_route.missing_city, unresolved_route.map_file_path))
+    return "\n".join(report)
+
+
+def load_network_files(airline_network, path_or_pattern, processes=None):
+    """ Merges every network file in a folder, or matching a glob pattern, into the network.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param path_or_pattern: Folder of JSON Files or a glob pattern such as data/*_hub.json
+    :param processes: Number of worker processes, defaults to the number of CPUs
+    :return: Consolidated report of the merge
+    """
+    map_file_paths = find_network_files(path_or_pattern)
+    unresolved_routes, unreadable_files = merge_network_files(airline_network, map_file_paths, processes)
+    return describe_merge(map_file_paths, unresolved_routes, unreadable_files)
@@ -0,0 +1,311 @@
+""" Distribution statistics of the CSAir network.
+
+The number of cities per number of routes, per timezone and per region, the
+percentiles of flight distance and population, a summary of each continent and
+the extent of the cities' coordinates are computed in one traversal, and the
+result is cached against the version of the network, so asking for them again
+costs nothing until the network is modified.
+
+The other statistics of graph_functions are not computed here. They are kept
+up to date change by change by observers of the network instead of being
+recomputed per version: flight distance and population totals and extremes by
+GraphAggregates, cities per continent by the attribute index and hub cities by
+DegreeIndex.
+
+Two interchangeable backends compute the statistics. The Python backend walks
+the node data dictionaries; the NumPy backend exports populations, timezones,
+regions, coordinates, continents and flight distances as arrays once and
+reduces them with vectorized operations. Both give exactly the same answers,
+and the NumPy backend is used whenever NumPy can be imported.
+"""
+
+import math
+from collections import namedtuple
+
+from framework.lru_cache import LRUCache
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+STATISTICS_CACHE_SIZE = 16
+PERCENTILES = (0, 10, 25, 50, 75, 90, 100)
+
+NetworkStatistics = namedtuple("NetworkStatistics", [
+    "route_count_histogram", "distance_percentiles", "population_percentiles", "continent_summaries",
+    "timezone_histogram", "region_histogram", "coordinate_extent"])
+ContinentSummary = namedtuple("ContinentSummary", ["num_cities", "average_population", "biggest_city",
+                                                   "smallest_city"])
+NetworkColumns = namedtuple("NetworkColumns", [
+    "route_counts", "distances", "populations", "timezones", "regions", "latitudes", "longitudes", "continents",
+    "continent_codes", "continent_populations"])
+
+statistics_cache = LRUCache(STATISTICS_CACHE_SIZE)
+
+
+def is_number(value):
+    return isinstance(value, (int, long, float)) and not isinstance(value, bool)
+
+
+def get_default_backend():
+    return "numpy" if numpy is not None else "python"
+
+
+def get_network_statistics(airline_network):
+    """ Gets the statistics of the network, computing them only if the network has
+    been modified since they were last computed.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: NetworkStatistics of the network
+    """
+    network_statistics = statistics_cache.get(airline_network.get_version())
+    if network_statistics is None:
+        network_statistics = compute_network_statistics(airline_network)
+        statistics_cache.put(airline_network.get_version(), network_statistics)
+    return network_statistics
+
+
+def compute_network_statistics(airline_network, backend=None):
+    """ Computes every statistic of the network.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param backend: "python" or "numpy", defaults to NumPy when it is installed
+    :return: NetworkStatistics of the network. The histograms map a number of routes,
+        a timezone or a region to how many cities have it, the percentiles line up with
+        PERCENTILES, the ContinentSummary of each continent names its biggest and
+        smallest city by population, ties going to the city code, and the coordinate
+        extent is (southmost, northmost, westmost, eastmost) in signed degrees.
+    """
+    backend = backend or get_default_backend()
+    if backend == "numpy":
+        if numpy is None:
+            raise ValueError("The numpy statistics backend needs NumPy, which is not installed")
+        return compute_numpy_statistics(airline_network)
+    if backend == "python":
+        return compute_python_statistics(airline_network)
+    raise ValueError("Unknown statistics backend: %s" % backend)
+
+
+def get_percentile_ranks(num_values):
+    """ Where each of PERCENTILES falls among sorted values, by linear interpolation,
+    the same definition NumPy uses by default. Shared by both backends.
+
+    :param num_values: Number of values
+    :return: list of (lower position, upper position, fraction of the way from lower to upper)
+    """
+    percentile_ranks = []
+    for percent in PERCENTILES:
+        rank = (num_values - 1) * percent / 100.0
+        lower = int(math.floor(rank))
+        percentile_ranks.append((lower, min(lower + 1, num_values - 1), rank - lower))
+    return percentile_ranks
+
+
+def get_percentiles(sorted_values):
+    """ Interpolated percentiles of values.
+
+    :param sorted_values: Values in ascending order
+    :return: tuple of the value at each of PERCENTILES, or None if there are no values
+    """
+    if not sorted_values:
+        return None
+    return tuple(float(sorted_values[lower]) + (float(sorted_values[upper]) - float(sorted_values[lower])) * fraction
+                 for lower, upper, fraction in get_percentile_ranks(len(sorted_values)))
+
+
+
+
+def get_coordinate(coordinates, positive_key, negative_key):
+    """ :param coordinates: Coordinates of a metro, such as {"S": 33, "W": 71}
+    :param positive_key: "N" or "E"
+    :param negative_key: "S" or "W"
+    :return: Signed degrees, or None if the coordinates do not give them
+    """
+    if is_number(coordinates.get(positive_key)):
+        return coordinates[positive_key]
+    if is_number(coordinates.get(negative_key)):
+        return -coordinates[negative_key]
+    return None
+
+
+def get_metro_values(metro_data):
+    """ Reads the values the statistics use from the data of a metro. Both backends
+    read them through here, so they leave out the same malformed values.
+
+    :param metro_data: Data about a metro
+    :return: (population, timezone, region, continent, latitude, longitude), each None when missing
+    """
+    population, timezone, region, continent = (
+        metro_data.get(key) for key in ("population", "timezone", "region", "continent"))
+    coordinates = metro_data.get("coordinates")
+    latitude = longitude = None
+    if isinstance(coordinates, dict):
+        latitude = get_coordinate(coordinates, "N", "S")
+        longitude = get_coordinate(coordinates, "E", "W")
+    if latitude is None or longitude is None:
+        latitude = longitude = None
+    return (population if is_number(population) else None, timezone if is_number(timezone) else None,
+            region if is_number(region) else None, continent if isinstance(continent, basestring) else None,
+            latitude, longitude)
+
+
+def add_to_histogram(histogram, value):
+    if value is not None:
+        histogram[value] = histogram.get(value, 0) + 1
+
+
+def compute_python_statistics(airline_network):
+    """ Computes every statistic of the network in one traversal. """
+    route_count_histogram = {}
+    timezone_histogram = {}
+    region_histogram = {}
+    continent_totals = {}  # Continent: [cities, cities with a population, total population, smallest, biggest]
+    distances = []
+    populations = []
+    latitudes = []
+    longitudes = []
+    all_metros = airline_network.get_all_nodes()
+    for city_code in all_metros:
+        metro = all_metros[city_code]
+        population, timezone, region, continent, latitude, longitude = get_metro_values(metro.get_data())
+        if population is not None:
+            populations.append(population)
+        add_to_histogram(timezone_histogram, timezone)
+        add_to_histogram(region_histogram, region)
+        if latitude is not None:
+            latitudes.append(latitude)
+            longitudes.append(longitude)
+        if continent is not None:
+            totals = continent_totals.setdefault(continent, [0, 0, 0.0, None, None])
+            totals[0] += 1
+            if population is not None:
+                totals[1] += 1
+                totals[2] += population
+                if totals[3] is None or (population, city_code) < totals[3]:
+                    totals[3] = (population, city_code)
+                if totals[4] is None or (population, city_code) > totals[4]:
+                    totals[4] = (population, city_code)
+        connected_routes = metro.get_connected_nodes()
+        add_to_histogram(route_count_histogram, len(connected_routes))
+        distances.extend(connected_routes[destination_code] for destination_code in connected_routes)
+    continent_summaries = {}
+    for continent in continent_totals:
+        num_cities, num_populations, total_population, smallest_city, biggest_city = continent_totals[continent]
+        if num_populations:
+            continent_summaries[continent] = ContinentSummary(num_cities, total_population / num_populations,
+                                                              biggest_city[1], smallest_city[1])
+        else:
+            continent_summaries[continent] = ContinentSummary(num_cities, None, None, None)
+    coordinate_extent = (min(latitudes), max(latitudes), min(longitudes), max(longitudes)) if latitudes else None
+    return NetworkStatistics(route_count_histogram, get_percentiles(sorted(distances)),
+                             get_percentiles(sorted(populations)), continent_summaries, timezone_histogram,
+                             region_histogram, coordinate_extent)
+
+
+def export_network_columns(airline_network):
+    """ Exports what the statistics read from the network as NumPy arrays.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: NetworkColumns of the network. The continent columns line up with each
+        other and hold every city on a continent, with NaN for a missing population.
+    """
+    route_counts = []
+    distances = []
+    populations = []
+    timezones = []
+    regions = []
+    latitudes = []
+    longitudes = []
+    continents = []
+    continent_codes = []
+    continent_populations = []
+    all_metros = airline_network.get_all_nodes()
+    for city_code in all_metros:
+        metro = all_metros[city_code]
+        population, timezone, region, continent, latitude, longitude = get_metro_values(metro.get_data())
+        if population is not None:
+            populations.append(population)
+        if timezone is not None:
+            timezones.append(timezone)
+        if region is not None:
+            regions.append(region)
+        if latitude is not None:
+            latitudes.append(latitude)
+            longitudes.append(longitude)
+        if continent is not None:
+            continents.append(continent)
+            continent_codes.append(city_code)
+            continent_populations.append(population if population is not None else numpy.nan)
+        connected_routes = metro.get_connected_nodes()
+        route_counts.append(len(connected_routes))
+        distances.extend(connected_routes[destination_code] for destination_code in connected_routes)
+    return NetworkColumns(numpy.array(route_counts, dtype=numpy.int64), numpy.array(distances),
+                          numpy.array(populations), numpy.array(timezones), numpy.array(regions),
+                          numpy.array(latitudes), numpy.array(longitudes), numpy.array(continents, dtype=unicode),
+                          numpy.array(continent_codes, dtype=unicode),
+                          numpy.array(continent_populations, dtype=numpy.float64))
+
+
+def get_numpy_percentiles(column):
+    """ Vectorized counterpart of get_percentiles. """
+    if not len(column):
+        return None
+    sorted_values = numpy.sort(column.astype(numpy.float64))
+    lower, upper, fraction = (numpy.array(positions) for positions in zip(*get_percentile_ranks(len(sorted_values))))
+    return tuple((sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction).tolist())
+
+
+def get_numpy_histogram(column):
+    """ :return: dict of each value in the column to how many times it appears """
+    values, counts = numpy.unique(column, return_counts=True)
+    return dict(zip(values.tolist(), counts.tolist()))
+
+
+def get_numpy_continent_summaries(columns):
+    """ Vectorized counterpart of the continent summaries of compute_python_statistics.
+    Populations are totalled with a weighted bincount, which adds them up in city
+    order like the Python backend, so the averages are identical.
+    """
+    if not len(columns.continents):
+        return {}
+    continent_names, continent_ids = numpy.unique(columns.continents, return_inverse=True)
+    has_population = ~numpy.isnan(columns.continent_populations)
+    num_cities = numpy.bincount(continent_ids, minlength=len(continent_names))
+    num_populations = numpy.bincount(continent_ids[has_population], minlength=len(continent_names))
+    total_populations = numpy.bincount(continent_ids[has_population],
+                                       weights=columns.continent_populations[has_population],
+                                       minlength=len(continent_names))
+    # Cities with a population by continent, then population, then city code.
+    order = numpy.lexsort((columns.continent_codes[has_population], columns.continent_populations[has_population],
+                           continent_ids[has_population]))
+    sorted_ids = continent_ids[has_population][order]
+    sorted_codes = columns.continent_codes[has_population][order].tolist()
+    group_ids = numpy.arange(len(continent_names))
+    smallest_positions = numpy.searchsorted(sorted_ids, group_ids, "left")
+    biggest_positions = numpy.searchsorted(sorted_ids, group_ids, "right") - 1
+    continent_summaries = {}
+    for continent_id, continent in enumerate(continent_names.tolist()):
+        if num_populations[continent_id]:
+            continent_summaries[continent] = ContinentSummary(
+                int(num_cities[continent_id]), float(total_populations[continent_id] / num_populations[continent_id]),
+                sorted_codes[biggest_positions[continent_id]], sorted_codes[smallest_positions[continent_id]])
+        else:
+            continent_summaries[continent] = ContinentSummary(int(num_cities[continent_id]), None, None, None)
+    return continent_summaries
+
+
+def compute_numpy_statistics(airline_network):
+    """ Computes every statistic of the network with vectorized operations over its columns. """
+    columns = export_network_columns(airline_network)
+    route_count_histogram = numpy.bincount(columns.route_counts) if len(columns.route_counts) else numpy.array([])
+    coordinate_extent = None
+    if len(columns.latitudes):
+        coordinate_extent = (columns.latitudes.min().item(), columns.latitudes.max().item(),
+                             columns.longitudes.min().item(), columns.longitudes.max().item())
+    return NetworkStatistics(
+        dict((num_routes, int(num_cities)) for num_routes, num_cities in enumerate(route_count_histogram.tolist())
+             if num_cities),
+        get_numpy_percentiles(columns.distances), get_numpy_percentiles(columns.populations),
+        get_numpy_continent_summaries(columns), get_numpy_histogram(columns.timezones),
+        get_numpy_histogram(columns.regions), coordinate_extent)
@@ -0,0 +1,105 @@
+""" Incremental writer for network files.
+
+Metros and routes are written to the file one at a time as the graph is walked,
+so the document is never built in memory. A pair of connections that go both
+ways with the same distance is written once as a bidirectional route, and any
+other connection is written as a route marked "unidirectional", which the
+loaders honour over the file's own flag. Each metro and route is written on a
+line of its own with its keys sorted, as the output file always had them; the
+compact mode leaves out the line breaks, indentation and the spaces after
+separators.
+
+A patch file holds only the changes recorded by a ChangeJournal since its last
+checkpoint, in a "changes" array that add_file_data_to_graph replays.
+"""
+
+import io
+import json
+
+INDENT = u"    "
+PRETTY_ENCODER = json.JSONEncoder(separators=(", ", ": "), sort_keys=True)
+COMPACT_ENCODER = json.JSONEncoder(separators=(",", ":"), sort_keys=True)
+
+
+def iterate_routes(airline_network):
+    """ Turns the connections of the network into the routes of a network file,
+    one route per symmetric pair of connections.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: generator of route data in city code order
+    """
+    all_metros = airline_network.get_all_nodes()
+    for start_code in sorted(all_metros):
+        connected_nodes = all_metros[start_code].get_connected_nodes()
+        for end_code in sorted(connected_nodes):
+            distance = connected_nodes[end_code]
+            end_metro = all_metros.get(end_code)
+            if end_metro and end_metro.get_connected_nodes().get(start_code) == distance:
+                if start_code <= end_code:
+                    yield {"ports": [start_code, end_code], "distance": distance}
+            else:
+                yield {"ports": [start_code, end_code], "distance": distance, "unidirectional": True}
+
+
+def write_array(json_file, key, values, compact):
+    """ Writes one top-level array of a network file, one value at a time.
+
+    :param json_file: File open for writing text
+    :param key: Key of the array
+    :param values: Iterable of the values of the array
+    :param compact: Whether to leave out whitespace
+    """
+    encoder = COMPACT_ENCODER if compact else PRETTY_ENCODER
+    separator = u"," if compact else u",\n" + 2 * INDENT
+    if compact:
+        json_file.write(u"%s:[" % json.dumps(key))
+    else:
+        json_file.write(u"%s%s: [" % (INDENT, json.dumps(key)))
+    first_value = True
+    for value in values:
+        if first_value:
+            json_file.write(separator[1:])
+            first_value = False
+        else:
+            json_file.write(separator)
+        json_file.write(unicode(encoder.encode(value)))
+    if not compact and not first_value:
+        json_file.write(u"\n" + INDENT)
+    json_file.write(u"]")
+
+
+def write_network_file(airline_network, output_file_path, compact=False):
+    """ Writes the network as a network file that add_file_data_to_graph can load.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param output_file_path: The File Path to write to
+    :param compact: Whether to leave out indentation and whitespace
+    """
+    all_metros = airline_network.get_all_nodes()
+    metros = (all_metros[city_code].get_data() for city_code in sorted(all_metros))
+    newline = u"" if compact else u"\n"
+    with io.open(output_file_path, "w", encoding="utf-8") as json_file:
+        json_file.write(u"{" + newline)
+        if compact:
+            json_file.write(u'"unidirectional":false,')
+        else:
+            json_file.write(u'%s"unidirectional": false,\n' % INDENT)
+        write_array(json_file, "metros", metros, compact)
+        json_file.write(u"," + newline)
+        write_array(json_file, "routes", iterate_routes(airline_network), compact)
+        json_file.write(newline + u"}" + newline)
+
+
+def write_patch_file(changes, output_file_path, compact=False):
+    """ Writes the changes recorded by a ChangeJournal as a patch file that
+    add_file_data_to_graph can replay.
+
+    :param changes: Operations in the order they were made
+    :param output_file_path: The File Path to write to
+    :param compact: Whether to leave out indentation and whitespace
+    """
+    newline = u"" if compact else u"\n"
+    with io.open(output_file_path, "w", encoding="utf-8") as json_file:
+        json_file.write(u"{" + newline)
+        write_array(json_file, "changes", changes, compact)
+        json_file.write(newline + u"}" + newline)
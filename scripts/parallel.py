@@ -0,0 +1,64 @@
+""" Helpers to fan work on the CSAir network out over a process pool.
+
+Each worker receives a copy of the network state once, when the pool starts,
+instead of once per task.
+"""
+
+from multiprocessing import Pool
+
+worker_network = None
+
+
+def get_adjacency(airline_network):
+    """ Copies the routes of a network into plain dictionaries that are cheap to
+    send to worker processes.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: Mapping of each city code to a list of (destination, distance) pairs
+    """
+    all_metros = airline_network.get_all_nodes()
+    adjacency = {}
+    for city_code in all_metros:
+        adjacency[city_code] = all_metros[city_code].get_connected_nodes().items()
+    return adjacency
+
+
+def initialize_worker(network):
+    """ Stores the network state for the tasks run in this worker process.
+
+    :param network: Network state shared by all tasks
+    """
+    global worker_network
+    worker_network = network
+
+
+def call_with_worker_network(task):
+    """ Runs a single task against the network state of this worker process.
+
+    :param task: (function, item) pair
+    :return: function(network, item)
+    """
+    function, item = task
+    return function(worker_network, item)
+
+
+def map_over_network(function, items, network, processes=None):
+    """ Applies a function to every item, spread over a process pool. The function
+    must be defined at module level so that it can be sent to the workers.
+
+    :param function: function(network, item) to apply
+    :param items: Items to apply the function to
+    :param network: Network state shared by all tasks
+    :param processes: Number of worker processes, defaults to the number of CPUs. 1 runs inline.
+    :return: list of results in the order of the items
+    """
+    items = list(items)
+    if processes == 1 or len(items) < 2:
+        return [function(network, item) for item in items]
+    pool = Pool(processes, initializer=initialize_worker, initargs=(network,))
+    try:
+        results = pool.map(call_with_worker_network, [(function, item) for item in items])
+    finally:
+        pool.terminate()
+        pool.join()
+    return results
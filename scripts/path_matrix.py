@@ -0,0 +1,197 @@
+""" Precomputed all-pairs shortest path matrix for the CSAir network.
+
+The matrix is built offline by running a full Dijkstra search from every city,
+spread over a process pool, and is saved next to the network's JSON file. It
+stores the distance and the next city on the shortest route for every pair of
+cities, so a query only walks the route itself.
+
+Usage: python -m scripts.path_matrix [data/map_data.json]
+"""
+
+import json
+import os
+import sys
+import weakref
+
+from scripts.parallel import get_adjacency, map_over_network
+from scripts.routing import ShortestPath, find_shortest_path, search_tree
+
+path_matrices = weakref.WeakKeyDictionary()
+
+
+class PathMatrix:
+    """ Distance and next hop for every ordered pair of cities.
+
+    Cities are numbered by their position in codes. distances[i][j] is the
+    distance of the shortest route from city i to city j (None if there is no
+    route) and next_hops[i][j] is the number of the city after i on that route
+    (-1 if there is no route).
+    """
+    def __init__(self, codes, distances, next_hops):
+        self.codes = codes
+        self.distances = distances
+        self.next_hops = next_hops
+        self.indexes = dict((city_code, i) for i, city_code in enumerate(codes))
+
+    def get_codes(self):
+        return self.codes
+
+    def get_distance(self, start_city, end_city):
+        if start_city not in self.indexes or end_city not in self.indexes:
+            return None
+        return self.distances[self.indexes[start_city]][self.indexes[end_city]]
+
+    def get_shortest_path(self, start_city, end_city):
+        """ Follows the next hops from the start city to the end city.
+
+        :param start_city: The starting city of the route
+        :param end_city: The end city of the route
+        :return: ShortestPath with the route and its distance, or None if there is no route
+        """
+        distance = self.get_distance(start_city, end_city)
+        if distance is None:
+            return None
+        end_index = self.indexes[end_city]
+        path = [start_city]
+        current_index = self.indexes[start_city]
+        while current_index != end_index:
+            current_index = self.next_hops[current_index][end_index]
+            path.append(self.codes[current_index])
+        path[-1] = end_city
+        return ShortestPath(path, distance)
+
+
+def compute_matrix_row(adjacency, start_city):
+    """ Runs a full Dijkstra search from one city and records the distance and
+    first hop towards every city it reaches.
+
+    :param adjacency: Mapping of each city code to a list of (destination, distance) pairs
+    :param start_city: The city to search from
+    :return: (distances, first hops) keyed by city code
+    """
+    distance, previous_node, settled = search_tree(start_city, lambda city_code: adjacency.get(city_code, ()))
+    first_hops = {start_city: start_city}
+    for city_code in settled[1:]:
+        previous_city = previous_node[city_code]
+        first_hops[city_code] = city_code if previous_city == start_city else first_hops[previous_city]
+    return distance, first_hops
+
+
+def build_path_matrix(airline_network, processes=None):
+    """ Builds the all-pairs matrix with one Dijkstra search per city.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param processes: Number of worker processes, defaults to the number of CPUs
+    :return: PathMatrix of the network
+    """
+    adjacency = get_adjacency(airline_network)
+    codes = sorted(adjacency)
+    indexes = dict((city_code, i) for i, city_code in enumerate(codes))
+    rows = map_over_network(compute_matrix_row, codes, adjacency, processes)
+    distances = []
+    next_hops = []
+    for distance, first_hops in rows:
+        distances.append([distance.get(city_code) for city_code in codes])
+        next_hops.append([indexes[first_hops[city_code]] if city_code in first_hops else -1
+                          for city_code in codes])
+    return PathMatrix(codes, distances, next_hops)
+
+
+def get_matrix_file_path(map_file_path):
+    """ The matrix of a network file is stored next to it, e.g. data/map_data.paths.json
+
+    :param map_file_path: The File Path of the network's JSON File
+    :return: The File Path of the matrix
+    """
+    return os.path.splitext(map_file_path)[0] + ".paths.json"
+
+
+def save_path_matrix(path_matrix, matrix_file_path):
+    """ Writes a matrix to disk.
+
+    :param path_matrix: PathMatrix to save
+    :param matrix_file_path: The File Path to write to
+    """
+    with open(matrix_file_path, "w") as matrix_file:
+        json.dump({"codes": path_matrix.codes, "distances": path_matrix.distances,
+                   "next_hops": path_matrix.next_hops}, matrix_file, separators=(",", ":"))
+
+
+def load_path_matrix(matrix_file_path):
+    """ Reads a matrix written by save_path_matrix.
+
+    :param matrix_file_path: The File Path of the matrix
+    :return: PathMatrix that was saved
+    """
+    with open(matrix_file_path, "r") as matrix_file:
+        matrix_data = json.load(matrix_file)
+    return PathMatrix(matrix_data["codes"], matrix_data["distances"], matrix_data["next_hops"])
+
+
+def precompute_path_matrix(map_file_path, processes=None):
+    """ Offline stage: builds the matrix for a network file and saves it next to it.
+
+    :param map_file_path: The File Path of the network's JSON File
+    :param processes: Number of worker processes, defaults to the number of CPUs
+    :return: The File Path of the matrix
+    """
+    from scripts.graph_functions import add_file_data_to_graph
+    from framework.graph import Graph
+    airline_network = add_file_data_to_graph(Graph(), map_file_path)
+    matrix_file_path = get_matrix_file_path(map_file_path)
+    save_path_matrix(build_path_matrix(airline_network, processes), matrix_file_path)
+    return matrix_file_path
+
+
+def attach_saved_path_matrix(airline_network, map_file_path):
+    """ Uses the saved matrix of a network file to answer queries on a network that
+    was just loaded from that file. Matrices older than the file are ignored.
+
+    :param airline_network: Graph Object loaded from the network file
+    :param map_file_path: The File Path of the network's JSON File
+    :return: Whether a matrix was attached
+    """
+    matrix_file_path = get_matrix_file_path(map_file_path)
+    try:
+        if os.path.getmtime(matrix_file_path) < os.path.getmtime(map_file_path):
+            return False
+        path_matrix = load_path_matrix(matrix_file_path)
+    except (IOError, OSError, ValueError, KeyError):
+        return False
+    if set(path_matrix.get_codes()) != set(airline_network.get_all_nodes()):
+        return False
+    path_matrices[airline_network] = (airline_network.get_version(), path_matrix)
+    return True
+
+
+def get_path_matrix(airline_network):
+    """ Gets the matrix attached to a network, if any. A matrix is detached once
+    the network has been modified after it was attached.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: PathMatrix of the network or None
+    """
+    version, path_matrix = path_matrices.get(airline_network, (None, None))
+    if version != airline_network.get_version():
+        path_matrices.pop(airline_network, None)
+        return None
+    return path_matrix
+
+
+def find_shortest_path_in_matrix(airline_network, start_city, end_city):
+    """ Answers a shortest path query from the network's attached matrix, falling
+    back to a Dijkstra search when no matrix is attached.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param start_city: The starting city of the route
+    :param end_city: The end city of the route
+    :return: ShortestPath with the route and its distance, or None if there is no route
+    """
+    path_matrix = get_path_matrix(airline_network)
+    if not path_matrix:
+        return find_shortest_path(airline_network, start_city, end_city)
+    return path_matrix.get_shortest_path(start_city, end_city)
+
+
+if __name__ == "__main__":
+    print "Path matrix written to " + precompute_path_matrix(sys.argv[1] if len(sys.argv) > 1 else "data/map_data.json")
@@ -0,0 +1,109 @@
+""" Reachability queries: every city that can be reached from an origin within a
+distance or travel time budget.
+
+One bounded Dijkstra search answers a query for every destination at once, and
+cities beyond the budget are never put on the queue. Travel times follow
+calculate_time: a flight's time, plus the layover at every city the itinerary
+stops at on the way. Queries from many origins can be spread over a process
+pool; every worker receives a frozen copy of the network once.
+"""
+
+import heapq
+from collections import namedtuple
+
+from scripts.parallel import map_over_network
+from scripts.travel_times import get_travel_time_table
+
+ReachableCity = namedtuple("ReachableCity", ["city_code", "distance", "time", "previous_city"])
+
+
+def find_reachable_cities(airline_network, origin_city, max_distance=None, max_time=None):
+    """ Finds every city reachable from the origin within the budget. Give either a
+    distance budget, in which case each city is reached by its shortest route, or a
+    time budget, in which case each city is reached by its fastest itinerary.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param origin_city: The city to start from
+    :param max_distance: Largest total distance of the route
+    :param max_time: Largest total time of the itinerary in minutes, layovers included
+    :return: list of ReachableCity, nearest first: by distance for a distance budget and
+        by arrival time for a time budget, ties going to the city code. The distance
+        and time are those of the route found, and previous_city is the city before
+        the destination on it. The origin is not listed.
+    """
+    if (max_distance is None) == (max_time is None):
+        raise ValueError("Give exactly one of max_distance and max_time")
+    if not airline_network.get_node(origin_city):
+        return []
+    by_time = max_time is not None
+    budget = max_time if by_time else max_distance
+    travel_time_table = get_travel_time_table(airline_network)
+    distance = {origin_city: 0}
+    arrival_time = {origin_city: 0}
+    departure_time = {origin_city: 0}  # Arrival time plus the layover before flying on.
+    previous_node = {}
+    settled = set()
+    queue = [(0, origin_city)]
+    reachable_cities = []
+    while queue:
+        current_city = heapq.heappop(queue)[1]
+        if current_city in settled:
+            continue  # Stale entry left behind by a better route.
+        settled.add(current_city)
+        if current_city != origin_city:
+            reachable_cities.append(ReachableCity(current_city, distance[current_city], arrival_time[current_city],
+                                                  previous_node[current_city]))
+        connected_nodes = airline_network.get_node(current_city).get_connected_nodes()
+        for connected_code in connected_nodes:
+            if connected_code in settled:
+                continue
+            new_distance = distance[current_city] + connected_nodes[connected_code]
+            new_arrival_time = departure_time[current_city] + \
+                travel_time_table.get_leg_time(current_city, connected_code, True)
+            new_departure_time = departure_time[current_city] + \
+                travel_time_table.get_leg_time(current_city, connected_code, False)
+            label = new_departure_time if by_time else new_distance
+            if (new_arrival_time if by_time else new_distance) > budget:
+                continue
+            current_label = departure_time.get(connected_code) if by_time else distance.get(connected_code)
+            if current_label is None or label < current_label:
+                distance[connected_code] = new_distance
+                arrival_time[connected_code] = new_arrival_time
+                departure_time[connected_code] = new_departure_time
+                previous_node[connected_code] = current_city
+                heapq.heappush(queue, (label, connected_code))
+    if by_time:
+        # Cities are settled by the time they can be left again, layover included, not by arrival.
+        reachable_cities.sort(key=lambda city: (city.time, city.city_code))
+    return reachable_cities
+
+
+def find_reachable_cities_in_worker(airline_network, query):
+    """ Runs one reachability query in a worker process.
+
+    :param airline_network: Network of the worker
+    :param query: (origin city, max distance, max time)
+    :return: list of ReachableCity
+    """
+    origin_city, max_distance, max_time = query
+    return find_reachable_cities(airline_network, origin_city, max_distance, max_time)
+
+
+def find_reachable_cities_from_many(airline_network, origin_cities, max_distance=None, max_time=None,
+                                    processes=None):
+    """ Runs a reachability query from each of many origins.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param origin_cities: Cities to start from
+    :param max_distance: Largest total distance of the route
+    :param max_time: Largest total time of the itinerary in minutes, layovers included
+    :param processes: Number of worker processes, defaults to the number of CPUs. 1 runs inline.
+    :return: dict of origin city to its list of ReachableCity
+    """
+    origin_cities = list(origin_cities)
+    queries = [(origin_city, max_distance, max_time) for origin_city in origin_cities]
+    if processes == 1 or len(queries) < 2:
+        results = [find_reachable_cities_in_worker(airline_network, query) for query in queries]
+    else:
+        results = map_over_network(find_reachable_cities_in_worker, queries, airline_network.freeze(), processes)
+    return dict(zip(origin_cities, results))
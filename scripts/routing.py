@@ -0,0 +1,472 @@
+""" Routing engine used to find shortest paths through the CSAir network.
+
+The searches run on a plain binary heap (heapq) rather than a locking queue.
+Entries that have been superseded by a shorter distance are skipped lazily
+when they are popped, and the search stops as soon as the destination is
+settled. Only the cities the search actually reaches are stored per query.
+"""
+
+import heapq
+import math
+import weakref
+from collections import namedtuple
+
+from scripts.itineraries import COST_PER_KILOMETER_BY_LEG
+from scripts.travel_times import get_travel_time_table
+
+ShortestPath = namedtuple("ShortestPath", ["path", "distance"])
+CoordinateTable = namedtuple("CoordinateTable", ["latitudes", "longitudes", "cosines", "scale"])
+
+EARTH_RADIUS = 6371.0  # in km
+coordinate_tables = weakref.WeakKeyDictionary()
+
+
+def get_weighted_connections(airline_network):
+    """ Builds the neighbour function used by the searches for a network.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: function mapping a city code to its (destination, distance) pairs
+    """
+    def weighted_connections(city_code):
+        node = airline_network.get_node(city_code)
+        if not node:
+            return []
+        return node.get_connected_nodes().items()
+    return weighted_connections
+
+
+def get_reverse_weighted_connections(airline_network):
+    """ Builds the neighbour function of the reversed network, using the Graph's
+    reverse index of the cities with a route to each city.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: function mapping a city code to its (origin, distance) pairs
+    """
+    all_metros = airline_network.get_all_nodes()
+
+    def reverse_weighted_connections(city_code):
+        return [(start_code, all_metros[start_code].get_connected_nodes()[city_code])
+                for start_code in airline_network.get_incoming_nodes(city_code)]
+    return reverse_weighted_connections
+
+
+def search(start_city, end_city, weighted_connections, heuristic=None):
+    """ Label-setting search from the start city to the end city. Without a
+    heuristic this is Dijkstra's algorithm; with a consistent heuristic it is A*.
+
+    :param start_city: The starting city of the route
+    :param end_city: The end city of the route
+    :param weighted_connections: function mapping a city code to (destination, weight) pairs
+    :param heuristic: optional function giving a lower bound on the weight left to the end city
+    :return: ShortestPath with the route and its total weight, or None if unreachable
+    """
+    distance, previous_node, settled = search_tree(start_city, weighted_connections, end_city, heuristic)
+    if not settled or settled[-1] != end_city:
+        return None
+    return ShortestPath(build_path(previous_node, start_city, end_city), distance[end_city])
+
+
+def search_tree(start_city, weighted_connections, end_city=None, heuristic=None):
+    """ Grows the shortest path tree from the start city. The search stops once
+    the end city is settled, or covers every reachable city without an end city.
+
+    :param start_city: The root city of the tree
+    :param weighted_connections: function mapping a city code to (destination, weight) pairs
+    :param end_city: optional city at which to stop the search
+    :param heuristic: optional function giving a lower bound on the weight left to the end city
+    :return: distance and previous node of each reached city, and the settled cities in order
+    """
+    distance = {start_city: 0}
+    previous_node = {}
+    settled = set()
+    settled_order = []
+    queue = [(0, start_city)]
+    while queue:
+        current_city = heapq.heappop(queue)[1]
+        if current_city in settled:
+            continue  # Stale entry left behind by a shorter distance.
+        settled.add(current_city)
+        settled_order.append(current_city)
+        if current_city == end_city:
+            break
+        current_distance = distance[current_city]
+        for connected_code, weight in weighted_connections(current_city):
+            if connected_code in settled:
+                continue
+            new_distance = current_distance + weight
+            if connected_code not in distance or new_distance < distance[connected_code]:
+                distance[connected_code] = new_distance
+                previous_node[connected_code] = current_city
+                priority = new_distance
+                if heuristic:
+                    priority += heuristic(connected_code)
+                heapq.heappush(queue, (priority, connected_code))
+    return distance, previous_node, settled_order
+
+
+def bidirectional_search(start_city, end_city, weighted_connections, reverse_weighted_connections):
+    """ Dijkstra's algorithm run from both ends at once: forward from the start city
+    over the routes leaving each city, and backward from the end city over the
+    routes arriving at each city. The side with the smaller queue is expanded
+    next. Every route relaxed towards a city the other side has reached gives a
+    candidate route through it, and the search stops once the smallest entries
+    of the two queues add up to at least the best candidate, since no route
+    through an unsettled city can be shorter.
+
+    :param start_city: The starting city of the route
+    :param end_city: The end city of the route
+    :param weighted_connections: function mapping a city code to (destination, weight) pairs
+    :param reverse_weighted_connections: function mapping a city code to (origin, weight) pairs
+    :return: ShortestPath with the route and its total weight, or None if unreachable
+    """
+    distances = ({start_city: 0}, {end_city: 0})
+    previous_nodes = ({}, {})
+    settled = (set(), set())
+    queues = ([(0, start_city)], [(0, end_city)])
+    connections = (weighted_connections, reverse_weighted_connections)
+    best_distance = 0 if start_city == end_city else None
+    meeting_city = start_city
+    while queues[0] and queues[1]:
+        if best_distance is not None and queues[0][0][0] + queues[1][0][0] >= best_distance:
+            break
+        side = 0 if len(queues[0]) <= len(queues[1]) else 1
+        current_distance, current_city = heapq.heappop(queues[side])
+        if current_city in settled[side]:
+            continue  # Stale entry left behind by a shorter distance.
+        settled[side].add(current_city)
+        distance = distances[side]
+        other_distance = distances[1 - side]
+        for connected_code, weight in connections[side](current_city):
+            if connected_code in settled[side]:
+                continue
+            new_distance = current_distance + weight
+            if connected_code not in distance or new_distance < distance[connected_code]:
+                distance[connected_code] = new_distance
+                previous_nodes[side][connected_code] = current_city
+                heapq.heappush(queues[side], (new_distance, connected_code))
+            if connected_code in other_distance:
+                route_distance = distance[connected_code] + other_distance[connected_code]
+                if best_distance is None or route_distance < best_distance:
+                    best_distance = route_distance
+                    meeting_city = connected_code
+    if best_distance is None:
+        return None
+    path = build_path(previous_nodes[0], start_city, meeting_city)
+    current_city = meeting_city
+    while current_city != end_city:
+        current_city = previous_nodes[1][current_city]
+        path.append(current_city)
+    path[-1] = end_city
+    return ShortestPath(path, best_distance)
+
+
+def build_path(previous_node, start_city, end_city):
+    """ Walks the previous node links back from the end city in linear time.
+
+    :param previous_node: Mapping of each reached city to the city before it
+    :param start_city: The starting city of the route
+    :param end_city: The end city of the route
+    :return: list of city codes from start to end
+    """
+    path = [end_city]
+    current_city = end_city
+    while current_city != start_city:
+        current_city = previous_node[current_city]
+        path.append(current_city)
+    path.reverse()
+    return path
+
+
+def find_shortest_path(airline_network, start_city, end_city):
+    """ Finds the route with the smallest total distance between two cities.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param start_city: The starting city of the route
+    :param end_city: The end city of the route
+    :return: ShortestPath with the route and its distance, or None if there is no route
+    """
+    if not airline_network.get_node(start_city) or not airline_network.get_node(end_city):
+        return None
+    return search(start_city, end_city, get_weighted_connections(airline_network))
+
+
+def find_shortest_path_bidirectional(airline_network, start_city, end_city):
+    """ Finds the same route distance as find_shortest_path with a bidirectional
+    search, which meets in the middle instead of settling every city closer to
+    the start city than the end city. Works on unidirectional networks, as the
+    backward search follows the Graph's reverse index of incoming routes.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param start_city: The starting city of the route
+    :param end_city: The end city of the route
+    :return: ShortestPath with the route and its distance, or None if there is no route
+    """
+    if not airline_network.get_node(start_city) or not airline_network.get_node(end_city):
+        return None
+    return bidirectional_search(start_city, end_city, get_weighted_connections(airline_network),
+                                get_reverse_weighted_connections(airline_network))
+
+
+def find_fastest_path(airline_network, start_city, end_city):
+    """ Finds the route with the smallest total travel time between two cities: the
+    flight times plus the layover at every city the route stops at on the way.
+    Each flight is weighted by its flight time and, unless it lands at the end
+    city, the layover after it, so the search is Dijkstra's algorithm over times.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param start_city: The starting city of the route
+    :param end_city: The end city of the route
+    :return: ShortestPath with the route and its time in minutes, or None if there is no route
+    """
+    if not airline_network.get_node(start_city) or not airline_network.get_node(end_city):
+        return None
+    travel_time_table = get_travel_time_table(airline_network)
+
+    def timed_connections(city_code):
+        return [(connected_code, travel_time_table.get_leg_time(city_code, connected_code, connected_code == end_city))
+                for connected_code in airline_network.get_node(city_code).get_connected_nodes()]
+    return search(start_city, end_city, timed_connections)
+
+
+def find_cheapest_path(airline_network, start_city, end_city):
+    """ Finds the route with the smallest total cost between two cities. The fare
+    per kilometer falls with every leg flown, so the cost of a flight depends on
+    how many legs came before it, and the cheapest route may have more stops than
+    the shortest one, or even pass through a city twice.
+
+    The search is Dijkstra's algorithm over (city, legs flown) states, where the
+    legs flown stop counting once the fare no longer falls. Arriving at a city
+    with more legs flown makes every later flight no more expensive, so a state is
+    skipped when the same city was already settled, at no greater cost, with at
+    least as many legs flown.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param start_city: The starting city of the route
+    :param end_city: The end city of the route
+    :return: ShortestPath with the route and its cost, or None if there is no route
+    """
+    if not airline_network.get_node(start_city) or not airline_network.get_node(end_city):
+        return None
+    last_fare = len(COST_PER_KILOMETER_BY_LEG) - 1
+    cost = {(start_city, 0): 0}
+    previous_state = {}
+    most_legs_settled = {}
+    queue = [(0, 0, start_city)]  # Among equal costs, states with more legs flown go first.
+    while queue:
+        current_cost, negative_legs, current_city = heapq.heappop(queue)
+        legs = -negative_legs
+        if current_cost > cost[(current_city, legs)] or most_legs_settled.get(current_city, -1) >= legs:
+            continue  # Stale entry, or dominated by a settled state.
+        most_legs_settled[current_city] = legs
+        if current_city == end_city:
+            return ShortestPath(build_state_path(previous_state, start_city, (current_city, legs)), current_cost)
+        cost_per_kilometer = COST_PER_KILOMETER_BY_LEG[legs]
+        next_legs = min(legs + 1, last_fare)
+        connected_nodes = airline_network.get_node(current_city).get_connected_nodes()
+        for connected_code in connected_nodes:
+            if most_legs_settled.get(connected_code, -1) >= next_legs:
+                continue
+            next_state = (connected_code, next_legs)
+            new_cost = current_cost + connected_nodes[connected_code] * cost_per_kilometer
+            if next_state not in cost or new_cost < cost[next_state]:
+                cost[next_state] = new_cost
+                previous_state[next_state] = (current_city, legs)
+                heapq.heappush(queue, (new_cost, -next_legs, connected_code))
+    return None
+
+
+def build_state_path(previous_state, start_city, end_state):
+    """ Walks the previous state links back from the end state.
+
+    :param previous_state: Mapping of each reached (city, legs) state to the state before it
+    :param start_city: The starting city of the route
+    :param end_state: The (city, legs) state the route ends in
+    :return: list of city codes from start to end
+    """
+    path = [end_state[0]]
+    current_state = end_state
+    while current_state in previous_state:
+        current_state = previous_state[current_state]
+        path.append(current_state[0])
+    path[-1] = start_city
+    path.reverse()
+    return path
+
+
+def find_k_shortest_paths(airline_network, start_city, end_city, num_paths):
+    """ Finds the num_paths shortest routes between two cities that never visit a
+    city twice, shortest first, with Yen's algorithm.
+
+    Each alternative is found by a spur search from a city of the previous route
+    that avoids the cities before it and the routes already used from there.
+    Instead of changing the network, the spur searches filter their neighbours.
+    They all share one reverse shortest path tree grown from the end city. Its
+    distances to the end city are exact in the full network and can only
+    underestimate once cities and routes are avoided, so they guide every spur
+    search as an A* heuristic. Cities that cannot reach the end city at all are
+    never expanded.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param start_city: The starting city of the route
+    :param end_city: The end city of the route
+    :param num_paths: Number of routes to find
+    :return: list of up to num_paths ShortestPaths, shortest first
+    """
+    if num_paths < 1 or not airline_network.get_node(start_city) or not airline_network.get_node(end_city):
+        return []
+    distance_to_end = search_tree(end_city, get_reverse_weighted_connections(airline_network))[0]
+    if start_city not in distance_to_end:
+        return []
+    weighted_connections = get_weighted_connections(airline_network)
+    heuristic = distance_to_end.get
+    shortest_paths = [search(start_city, end_city, get_spur_connections(weighted_connections, distance_to_end, (), ()),
+                             heuristic)]
+    candidates = []
+    candidate_paths = set([tuple(shortest_paths[0].path)])
+    while len(shortest_paths) < num_paths:
+        previous_path = shortest_paths[-1].path
+        root_distance = 0
+        for i in range(len(previous_path) - 1):
+            spur_city = previous_path[i]
+            root_path = previous_path[:i + 1]
+            blocked_cities = set(root_path[:-1])
+            blocked_routes = set((path.path[i], path.path[i + 1]) for path in shortest_paths
+                                 if path.path[:i + 1] == root_path)
+            spur_connections = get_spur_connections(weighted_connections, distance_to_end, blocked_cities,
+                                                    blocked_routes)
+            spur_path = search(spur_city, end_city, spur_connections, heuristic)
+            if spur_path:
+                path = root_path[:-1] + spur_path.path
+                if tuple(path) not in candidate_paths:
+                    candidate_paths.add(tuple(path))
+                    heapq.heappush(candidates, (root_distance + spur_path.distance, path))
+            root_distance += dict(weighted_connections(spur_city))[previous_path[i + 1]]
+        if not candidates:
+            break
+        distance, path = heapq.heappop(candidates)
+        shortest_paths.append(ShortestPath(path, distance))
+    return shortest_paths
+
+
+def get_spur_connections(weighted_connections, distance_to_end, blocked_cities, blocked_routes):
+    """ Builds the neighbour function of a spur search, which leaves out the blocked
+    cities and routes and every city that cannot reach the end city.
+
+    :param weighted_connections: function mapping a city code to (destination, weight) pairs
+    :param distance_to_end: Mapping of each city that can reach the end city to its distance
+    :param blocked_cities: Cities the spur search may not enter
+    :param blocked_routes: (start, end) routes the spur search may not take
+    :return: function mapping a city code to its allowed (destination, weight) pairs
+    """
+    def spur_connections(city_code):
+        return [(connected_code, weight) for connected_code, weight in weighted_connections(city_code)
+                if connected_code in distance_to_end and connected_code not in blocked_cities and
+                (city_code, connected_code) not in blocked_routes]
+    return spur_connections
+
+
+def find_shortest_path_astar(airline_network, start_city, end_city):
+    """ Finds the same route as find_shortest_path with an A* search guided by the
+    great-circle distance to the end city. Falls back to Dijkstra's algorithm when
+    the network has no usable coordinates.
+
+    :param airline_network: Graph Object with CSAir Information
+    :param start_city: The starting city of the route
+    :param end_city: The end city of the route
+    :return: ShortestPath with the route and its distance, or None if there is no route
+    """
+    if not airline_network.get_node(start_city) or not airline_network.get_node(end_city):
+        return None
+    coordinate_table = get_coordinate_table(airline_network)
+    if not coordinate_table.scale:
+        return search(start_city, end_city, get_weighted_connections(airline_network))
+    heuristic = get_great_circle_heuristic(coordinate_table, end_city)
+    return search(start_city, end_city, get_weighted_connections(airline_network), heuristic)
+
+
+def get_great_circle_heuristic(coordinate_table, end_city):
+    """ Builds the A* heuristic: the haversine distance to the end city, scaled down
+    so that it never exceeds the distance of any route in the network.
+
+    :param coordinate_table: CoordinateTable of the network
+    :param end_city: The end city of the route
+    :return: function giving a lower bound on the distance from a city to the end city
+    """
+    latitudes = coordinate_table.latitudes
+    longitudes = coordinate_table.longitudes
+    cosines = coordinate_table.cosines
+    end_latitude = latitudes[end_city]
+    end_longitude = longitudes[end_city]
+    end_cosine = cosines[end_city]
+    scaled_diameter = 2 * EARTH_RADIUS * coordinate_table.scale
+
+    def heuristic(city_code):
+        haversine = math.sin((latitudes[city_code] - end_latitude) / 2) ** 2 + \
+            cosines[city_code] * end_cosine * math.sin((longitudes[city_code] - end_longitude) / 2) ** 2
+        return scaled_diameter * math.asin(min(1.0, math.sqrt(haversine)))
+    return heuristic
+
+
+def get_coordinate_table(airline_network):
+    """ Gets the cached coordinate table of a network, building it again whenever
+    the network has been modified since it was cached.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: CoordinateTable of the network
+    """
+    version, coordinate_table = coordinate_tables.get(airline_network, (None, None))
+    if version != airline_network.get_version():
+        coordinate_table = build_coordinate_table(airline_network)
+        coordinate_tables[airline_network] = (airline_network.get_version(), coordinate_table)
+    return coordinate_table
+
+
+def build_coordinate_table(airline_network):
+    """ Converts the coordinates of every metro to radians once and checks the
+    great-circle distances against the route distances. The scale is the largest
+    factor that keeps the heuristic below every route distance (at most 1). It is
+    None when a metro has no usable coordinates or no positive scale exists, in
+    which case A* searches fall back to Dijkstra's algorithm.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: CoordinateTable of the network
+    """
+    latitudes = {}
+    longitudes = {}
+    cosines = {}
+    all_metros = airline_network.get_all_nodes()
+    for city_code in all_metros:
+        coordinates = parse_coordinates(all_metros[city_code].get_data())
+        if not coordinates:
+            return CoordinateTable(latitudes, longitudes, cosines, None)
+        latitudes[city_code], longitudes[city_code] = coordinates
+        cosines[city_code] = math.cos(latitudes[city_code])
+    scale = 1.0
+    for city_code in all_metros:
+        connected_nodes = all_metros[city_code].get_connected_nodes()
+        for destination_code in connected_nodes:
+            if destination_code not in latitudes:
+                continue
+            great_circle_distance = get_great_circle_heuristic(
+                CoordinateTable(latitudes, longitudes, cosines, 1.0), destination_code)(city_code)
+            if great_circle_distance > 0:
+                scale = min(scale, connected_nodes[destination_code] / great_circle_distance)
+    if scale <= 0:
+        return CoordinateTable(latitudes, longitudes, cosines, None)
+    scale *= 1 - 1e-9  # Keep the bound strict despite rounding in the trigonometry.
+    return CoordinateTable(latitudes, longitudes, cosines, scale)
+
+
+def parse_coordinates(metro_data):
+    """ Reads the N/S and E/W coordinates of a metro as radians.
+
+    :param metro_data: Data about the metro
+    :return: (latitude, longitude) in radians, or None if the coordinates are unusable
+    """
+    try:
+        coordinates = metro_data["coordinates"]
+        latitude = coordinates.get("N", 0) - coordinates.get("S", 0)
+        longitude = coordinates.get("E", 0) - coordinates.get("W", 0)
+        return math.radians(latitude), math.radians(longitude)
+    except (KeyError, TypeError, AttributeError):
+        return None
@@ -0,0 +1,252 @@
+""" Compact binary snapshot of a CSAir network file for fast start-up.
+
+A snapshot holds the same metros and routes as its JSON file, written next to
+it (data/map_data.json -> data/map_data.snapshot), and is read back through
+mmap without any JSON parsing. Layout, little-endian:
+
+    header      magic "CSAS", format version, flags, string count, string
+                text bytes, metro count, route count
+    strings     character offsets (uint32, string count + 1) then the UTF-8 text
+                of every distinct string joined together
+    metros      one packed column per attribute in METRO_COLUMNS (uint32 string
+                numbers or float64 values), then uint32 presence masks, uint32
+                integer masks and uint32 extra numbers
+    routes      uint32 start string numbers, uint32 end string numbers and
+                float64 distances
+
+Metro attributes that do not fit their column are kept in the metro's extra
+string as JSON, so every metro is restored exactly.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+MAGIC = "CSAS"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHIIII")
+UNIDIRECTIONAL_FLAG = 1
+INTEGER_DISTANCES_FLAG = 2
+NO_STRING = 0xFFFFFFFF
+
+METRO_COLUMNS = [("code", "string"), ("name", "string"), ("country", "string"),
+                 ("continent", "string"), ("timezone", "number"), ("population", "number"),
+                 ("region", "number"), ("N", "coordinate"), ("S", "coordinate"),
+                 ("E", "coordinate"), ("W", "coordinate")]
+
+
+def get_snapshot_file_path(map_file_path):
+    """ The snapshot of a network file is stored next to it, e.g. data/map_data.snapshot
+
+    :param map_file_path: The File Path of the network's JSON File
+    :return: The File Path of the snapshot
+    """
+    return os.path.splitext(map_file_path)[0] + ".snapshot"
+
+
+def is_snapshot_fresh(map_file_path):
+    """ Checks whether a network file has a snapshot at least as new as the file.
+
+    :param map_file_path: The File Path of the network's JSON File
+    :return: Whether the snapshot can be used instead of the JSON File
+    """
+    try:
+        return os.path.getmtime(get_snapshot_file_path(map_file_path)) >= os.path.getmtime(map_file_path)
+    except OSError:
+        return False
+
+
+def is_number(value):
+    return isinstance(value, (int, long, float)) and not isinstance(value, bool)
+
+
+def pack_array(typecode, values):
+    packed = array(typecode, values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tostring()
+
+
+def unpack_array(typecode, buffer_data, offset, count):
+    """ Reads count packed values from a buffer.
+
+    :raises ValueError: if the buffer ends before the last value
+    """
+    unpacked = array(typecode)
+    end = offset + unpacked.itemsize * count
+    if end > len(buffer_data):
+        raise ValueError("Snapshot is truncated")
+    unpacked.fromstring(buffer_data[offset:end])
+    if sys.byteorder == "big":
+        unpacked.byteswap()
+    return unpacked, end
+
+
+def check_string_numbers(string_numbers, num_strings):
+    """ :raises ValueError: if a string number, other than NO_STRING, is not one of the snapshot's strings """
+    if not string_numbers or max(string_numbers) < num_strings:
+        return
+    if any(string_number >= num_strings for string_number in string_numbers if string_number != NO_STRING):
+        raise ValueError("Snapshot refers to a string it does not hold")
+
+
+def write_snapshot(map_data, snapshot_file_path):
+    """ Writes the metros and routes of a parsed network file as a snapshot. The
+    file is written under a temporary name first so readers never see half of it.
+
+    :param map_data: Parsed contents of the network's JSON File
+    :param snapshot_file_path: The File Path to write to
+    """
+    strings = []
+    string_numbers = {}
+
+    def string_number(value):
+        if value not in string_numbers:
+            string_numbers[value] = len(strings)
+            strings.append(value)
+        return string_numbers[value]
+
+    columns = [[] for _ in METRO_COLUMNS]
+    presence_masks = []
+    integer_masks = []
+    extras = []
+    for metro in map_data["metros"]:
+        extra = dict(metro)
+        coordinates = extra.get("coordinates")
+        coordinates_packed = isinstance(coordinates, dict) and all(
+            key in ("N", "S", "E", "W") and key not in metro and is_number(coordinates[key]) for key in coordinates)
+        if coordinates_packed:
+            del extra["coordinates"]
+            extra.update(coordinates)
+            presence_mask = 1 << len(METRO_COLUMNS)  # Marks that the coordinates were packed.
+        else:
+            presence_mask = 0
+        integer_mask = 0
+        for i, (field, kind) in enumerate(METRO_COLUMNS):
+            value = extra.get(field)
+            if kind == "string" and isinstance(value, basestring):
+                columns[i].append(string_number(value))
+            elif kind != "string" and is_number(value) and (kind == "number" or coordinates_packed):
+                columns[i].append(float(value))
+                if not isinstance(value, float):
+                    integer_mask |= 1 << i
+            else:
+                columns[i].append(NO_STRING if kind == "string" else 0.0)
+                continue
+            presence_mask |= 1 << i
+            del extra[field]
+        presence_masks.append(presence_mask)
+        integer_masks.append(integer_mask)
+        extras.append(string_number(json.dumps(extra)) if extra else NO_STRING)
+
+    unidirectional = map_data.get("unidirectional", False)
+    # Routes with their own flag are stored one direction at a time, as if the file were unidirectional.
+    mixed_directions = any("unidirectional" in route for route in map_data["routes"])
+    flags = UNIDIRECTIONAL_FLAG if unidirectional or mixed_directions else 0
+    starts = []
+    ends = []
+    distances = []
+    for route in map_data["routes"]:
+        starts.append(string_number(route["ports"][0]))
+        ends.append(string_number(route["ports"][1]))
+        distances.append(route["distance"])
+        if mixed_directions and not route.get("unidirectional", unidirectional):
+            starts.append(string_number(route["ports"][1]))
+            ends.append(string_number(route["ports"][0]))
+            distances.append(route["distance"])
+    if all(not isinstance(distance, float) for distance in distances):
+        flags |= INTEGER_DISTANCES_FLAG
+
+    string_offsets = [0]
+    for value in strings:
+        string_offsets.append(string_offsets[-1] + len(value))
+    text = u"".join(unicode(value) for value in strings).encode("utf-8")
+    sections = [HEADER.pack(MAGIC, FORMAT_VERSION, flags, len(strings), len(text),
+                            len(presence_masks), len(distances)),
+                pack_array("I", string_offsets), text]
+    for (field, kind), column in zip(METRO_COLUMNS, columns):
+        sections.append(pack_array("I" if kind == "string" else "d", column))
+    sections += [pack_array("I", presence_masks), pack_array("I", integer_masks), pack_array("I", extras),
+                 pack_array("I", starts), pack_array("I", ends), pack_array("d", distances)]
+
+    temporary_file_path = snapshot_file_path + ".tmp"
+    with open(temporary_file_path, "wb") as snapshot_file:
+        snapshot_file.write("".join(sections))
+    os.rename(temporary_file_path, snapshot_file_path)
+
+
+def read_snapshot(snapshot_file_path):
+    """ Reads a snapshot back into the metros and routes of its network file.
+
+    :param snapshot_file_path: The File Path of the snapshot
+    :return: (metros, routes as (start, end, distance) tuples, unidirectional)
+    """
+    with open(snapshot_file_path, "rb") as snapshot_file:
+        snapshot_data = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return parse_snapshot(snapshot_data)
+    finally:
+        snapshot_data.close()
+
+
+def parse_snapshot(snapshot_data):
+    """ Decodes the sections of a snapshot laid out as described at the top of this file.
+
+    :param snapshot_data: Contents of the snapshot
+    :return: (metros, routes as (start, end, distance) tuples, unidirectional)
+    :raises ValueError: if the snapshot is truncated, refers to strings it does not hold or has another format
+    """
+    magic, version, flags, num_strings, num_text_bytes, num_metros, num_routes = \
+        HEADER.unpack_from(snapshot_data, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("Unsupported snapshot format")
+    string_offsets, offset = unpack_array("I", snapshot_data, HEADER.size, num_strings + 1)
+    if offset + num_text_bytes > len(snapshot_data):
+        raise ValueError("Snapshot is truncated")
+    text = snapshot_data[offset:offset + num_text_bytes].decode("utf-8")
+    offset += num_text_bytes
+    strings = [text[string_offsets[i]:string_offsets[i + 1]] for i in xrange(num_strings)]
+
+    columns = []
+    for field, kind in METRO_COLUMNS:
+        column, offset = unpack_array("I" if kind == "string" else "d", snapshot_data, offset, num_metros)
+        columns.append(column)
+    presence_masks, offset = unpack_array("I", snapshot_data, offset, num_metros)
+    integer_masks, offset = unpack_array("I", snapshot_data, offset, num_metros)
+    extras, offset = unpack_array("I", snapshot_data, offset, num_metros)
+    for column in [column for column, (field, kind) in zip(columns, METRO_COLUMNS) if kind == "string"] + [extras]:
+        check_string_numbers(column, num_strings)
+
+    metros = []
+    for m in xrange(num_metros):
+        metro = json.loads(strings[extras[m]]) if extras[m] != NO_STRING else {}
+        presence_mask = presence_masks[m]
+        coordinates = {} if presence_mask >> len(METRO_COLUMNS) & 1 else None
+        for i, (field, kind) in enumerate(METRO_COLUMNS):
+            if not presence_mask >> i & 1:
+                continue
+            value = columns[i][m]
+            if kind == "string":
+                value = strings[value]
+            elif integer_masks[m] >> i & 1:
+                value = int(value)
+            if kind == "coordinate":
+                coordinates[field] = value
+            else:
+                metro[field] = value
+        if coordinates is not None:
+            metro["coordinates"] = coordinates
+        metros.append(metro)
+
+    starts, offset = unpack_array("I", snapshot_data, offset, num_routes)
+    ends, offset = unpack_array("I", snapshot_data, offset, num_routes)
+    distances, offset = unpack_array("d", snapshot_data, offset, num_routes)
+    check_string_numbers(starts, num_strings)
+    check_string_numbers(ends, num_strings)
+    integer_distances = flags & INTEGER_DISTANCES_FLAG
+    routes = [(strings[starts[r]], strings[ends[r]], int(distances[r]) if integer_distances else distances[r])
+              for r in xrange(num_routes)]
+    return metros, routes, bool(flags & UNIDIRECTIONAL_FLAG)
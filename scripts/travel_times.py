@@ -0,0 +1,120 @@
+""" Flight and layover times of the CSAir network, kept in tables.
+
+The time of a flight only depends on its distance and the layover at a city only
+depends on how many routes leave it, so both are computed once per route and per
+city and updated as the network changes. The time of an itinerary is then a sum
+of table lookups.
+"""
+
+import math
+
+from framework.graph import GraphObserver
+
+ACCELERATION = ((750.0/60)**2)/(2*200)  # a = v^2/(2*d) in km/min^2
+
+
+def calculate_flight_time(distance):
+    """ Time of one flight. The acceleration is understood to take 200 meters to
+    hit 750 kmph, and the plane decelerates the same way.
+
+    :param distance: Distance of the flight
+    :return: Time of the flight in minutes
+    """
+    if distance >= 400:
+        acceleration_time = math.sqrt((2 * 200) / ACCELERATION)  # t = sqrt(2d/a) in minutes
+        cruising_time = (distance - 400.0) / (750.0 / 60)  # t = d/v in minutes
+        return 2 * acceleration_time + cruising_time  # cruising time + acceleration + deceleration
+    acceleration_time = math.sqrt((2 * distance / 2) / ACCELERATION)  # in minutes
+    return 2 * acceleration_time  # acceleration + deceleration
+
+
+def calculate_layover_time(num_routes):
+    """ Layover at a city, which shortens by 10 minutes for every route leaving it.
+
+    :param num_routes: Number of routes leaving the city
+    :return: Time of the layover in minutes
+    """
+    return max(120 - 10 * (num_routes - 1), 0)
+
+
+class TravelTimeTable(GraphObserver):
+    """ Flight time of every route and layover time of every city of a network,
+    kept up to date as the network changes.
+    """
+    def __init__(self, airline_network):
+        self.airline_network = airline_network
+        self.flight_times = {}
+        self.layover_times = {}
+        all_metros = airline_network.get_all_nodes()
+        for city_code in all_metros:
+            connected_routes = all_metros[city_code].get_connected_nodes()
+            self.layover_times[city_code] = calculate_layover_time(len(connected_routes))
+            for destination_code in connected_routes:
+                self.flight_times[(city_code, destination_code)] = \
+                    calculate_flight_time(connected_routes[destination_code])
+        airline_network.add_observer(self)
+
+    def get_flight_time(self, start_code, end_code):
+        """ :return: Minutes of the flight, or None if there is no such route """
+        return self.flight_times.get((start_code, end_code))
+
+    def get_layover_time(self, city_code):
+        """ :return: Minutes of a layover at the city, or None if it is not in the network """
+        return self.layover_times.get(city_code)
+
+    def get_leg_time(self, start_code, end_code, last_leg):
+        """ Time of one leg of an itinerary: the flight, then the layover at its end
+        unless the itinerary finishes there.
+
+        :return: Minutes of the leg, or None if there is no such route
+        """
+        flight_time = self.flight_times.get((start_code, end_code))
+        if flight_time is None or last_leg:
+            return flight_time
+        return flight_time + self.layover_times[end_code]
+
+    def get_itinerary_time(self, city_codes):
+        """ :return: Minutes of the itinerary through the cities in order, or None if a
+            leg is not a route of the network
+        """
+        total_time = 0
+        for i in range(1, len(city_codes)):
+            leg_time = self.get_leg_time(city_codes[i - 1], city_codes[i], i == len(city_codes) - 1)
+            if leg_time is None:
+                return None
+            total_time += leg_time
+        return total_time
+
+    def update_layover_time(self, city_code):
+        metro = self.airline_network.get_node(city_code)
+        if metro:
+            self.layover_times[city_code] = calculate_layover_time(len(metro.get_connected_nodes()))
+
+    def node_added(self, city_code, metro_data):
+        self.update_layover_time(city_code)
+
+    def node_deleted(self, city_code, metro_data, removed_routes):
+        self.layover_times.pop(city_code, None)
+        for start_code, end_code, distance in removed_routes:
+            del self.flight_times[(start_code, end_code)]
+            self.update_layover_time(start_code)
+
+    def connection_added(self, start_code, end_code, distance, old_distance):
+        self.flight_times[(start_code, end_code)] = calculate_flight_time(distance)
+        self.update_layover_time(start_code)
+
+    def connection_deleted(self, start_code, end_code, distance):
+        del self.flight_times[(start_code, end_code)]
+        self.update_layover_time(start_code)
+
+
+def get_travel_time_table(airline_network):
+    """ Gets the flight and layover times of the network, kept up to date by the network.
+
+    :param airline_network: Graph Object with CSAir Information
+    :return: TravelTimeTable of the network
+    """
+    travel_time_table = airline_network.get_observer(TravelTimeTable)
+    if not travel_time_table:
+        travel_time_table = TravelTimeTable(airline_network)
+    return travel_time_table
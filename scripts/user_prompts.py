@@ -1,6 +1,9 @@
 """ File to facilitate incoming queries and outgoing results with the user. """
 
+import os
+
 from graph_functions import *
+from merge_loader import load_network_files
 from colorama import Fore
 import user_prompts
 
@@ -22,7 +25,15 @@ STATISTIC_PROMPT = ("\n0 - Longest Single Flight\n"
                     "6 - List of Cities by Continent in CSAir Network\n"
                     "7 - CSAir's Hub Cities\n"
                     "8 - Get Information About a Route\n"
-                    "9 - Get Shortest Route Between Cities\n")
+                    "9 - Get Shortest Route Between Cities\n"
+                    "10 - Query Cache Statistics\n"
+                    "11 - Distribution of Routes, Distances, Populations and Continents\n"
+                    "12 - CSAir's Top Hub Cities\n"
+                    "13 - Find Cities by Continent, Country, Region or Timezone\n"
+                    "14 - Get Fastest Route Between Cities\n"
+                    "15 - Get Cheapest Route Between Cities\n"
+                    "16 - Get Alternative Routes Between Cities\n"
+                    "17 - Cities Reachable Within a Distance or Time\n")
 
 MODIFICATION_PROMPT = ("\n0 - Remove a City\n"
                        "1 - Remove a Route\n"
@@ -42,6 +53,37 @@ def get_hub_city_threshold():
     return min_hub
 
 
+def get_number_of_hub_cities():
+    """ Get how many of the top hub cities to list.
+
+    :return: Number of hub cities
+    """
+    num_hubs = -1
+    while num_hubs < 0:
+        num_hubs = get_int_input("Number of hub cities to list: ")
+    return num_hubs
+
+
+def get_attribute_criteria():
+    """ Get the values of the indexed city fields to search for, skipping empty answers.
+
+    :return: dict of field to value, with numbers converted
+    """
+    criteria = {}
+    print "Enter the value to search for in each field. Otherwise, enter a new line to skip."
+    for field in INDEXED_FIELDS:
+        value = raw_input("%s: " % field)
+        if value:
+            for number_type in (int, float):
+                try:
+                    value = number_type(value)
+                    break
+                except ValueError:
+                    pass
+            criteria[field] = value
+    return criteria
+
+
 def print_all_cities(airline_network):
     """ Gets all cities from graph object and prints city codes and names.
 
@@ -88,7 +130,7 @@ def prompt_user_for_input(airline_network):
         print_individual_city(airline_network)
     elif response == 2:
         statistic_code = -1
-        while statistic_code < 0 or statistic_code > 9:
+        while statistic_code < 0 or statistic_code > 17:
             statistic_code = get_int_input(STATISTIC_PROMPT)
         print_message(get_statistic(statistic_code, airline_network))
     elif response == 3:
@@ -100,11 +142,23 @@ def prompt_user_for_input(airline_network):
             modification_code = get_int_input(MODIFICATION_PROMPT)
         make_modification(modification_code, airline_network)
     elif response == 5:
-        download_data_to_json(airline_network)
-        print_message("Data outputted to data/output_data.json.")
+        output_file_path = download_changes_to_json(airline_network)
+        if output_file_path:
+            print_message("Data outputted to %s." % output_file_path)
+        else:
+            print_message("No changes since the last download.")
     elif response == 6:
-        file_name = raw_input("Put new JSON file in data folder. Enter the name of the JSON File: ")
-        add_file_data_to_graph(airline_network, "data/" + file_name + ".json")
+        file_name = raw_input("Put new JSON file(s) in data folder. Enter the name of the JSON File, "
+                              "a folder or a pattern such as *_hub. Patches saved next to the file are "
+                              "replayed after it: ")
+        if "*" in file_name or os.path.isdir("data/" + file_name):
+            pattern = "data/" + file_name if "*" not in file_name else "data/" + file_name + ".json"
+            print_message(load_network_files(airline_network, pattern))
+        else:
+            try:
+                add_saved_data_to_graph(airline_network, "data/" + file_name + ".json")
+            except ValueError, e:
+                print_error("Saved changes not loaded. " + str(e))
     elif response == 7:
         return False
     return True
@@ -145,7 +199,47 @@ def get_statistic(statistic_code, airline_network):
     elif statistic_code == 9:
         start_route = get_city_code_input("Enter the start city: ")
         end_route = get_city_code_input("Enter the destination city: ")
-        return get_shortest_path(airline_network, start_route, end_route)
+        if get_path_matrix(airline_network):
+            algorithm = "matrix"
+        elif has_contraction_hierarchy(airline_network):
+            algorithm = "hierarchy"
+        else:
+            algorithm = "astar"
+        return get_shortest_path(airline_network, start_route, end_route, algorithm)
+    elif statistic_code == 10:
+        return get_cache_statistics()
+    elif statistic_code == 11:
+        return get_network_distribution(airline_network)
+    elif statistic_code == 12:
+        num_hubs = user_prompts.get_number_of_hub_cities()
+        return get_top_hub_cities(airline_network, num_hubs)
+    elif statistic_code == 13:
+        return get_cities_by_attribute(airline_network, **user_prompts.get_attribute_criteria())
+    elif statistic_code == 14:
+        start_route = get_city_code_input("Enter the start city: ")
+        end_route = get_city_code_input("Enter the destination city: ")
+        return get_fastest_path(airline_network, start_route, end_route)
+    elif statistic_code == 15:
+        start_route = get_city_code_input("Enter the start city: ")
+        end_route = get_city_code_input("Enter the destination city: ")
+        return get_cheapest_path(airline_network, start_route, end_route)
+    elif statistic_code == 16:
+        start_route = get_city_code_input("Enter the start city: ")
+        end_route = get_city_code_input("Enter the destination city: ")
+        num_routes = -1
+        while num_routes < 1:
+            num_routes = get_int_input("Number of routes to list: ")
+        return get_alternative_routes(airline_network, start_route, end_route, num_routes)
+    elif statistic_code == 17:
+        origin_city = get_city_code_input("Enter the start city: ")
+        budget = -1
+        if get_bidirectional_prompt("Limit by travel time instead of distance? (Y/N): ").lower() == "y":
+            while budget < 0:
+                budget = get_int_input("Maximum travel time in minutes: ")
+            return get_reachable_cities(airline_network, origin_city, max_time=budget)
+        while budget < 0:
+            budget = get_int_input("Maximum distance: ")
+        return get_reachable_cities(airline_network, origin_city, max_distance=budget)
 
 
 def make_modification(modification_code, airline_network):
@@ -179,7 +273,7 @@ def make_modification(modification_code, airline_network):
         add_route(airline_network, bidirectional, start_route, end_route, weight)
     elif modification_code == 4:
         city_code = get_city_code_input("Enter the City Code of the City you want to modify: ")
-        city_data = airline_network.get_node(city_code).get_data()
+        city_data = dict(airline_network.get_node(city_code).get_data())
         print "If you want to modify the following data, enter the new data. Otherwise, enter a new line to skip."
         for data in city_data:
             if data == "code":
@@ -189,6 +283,7 @@ def make_modification(modification_code, airline_network):
                 if data == "population":
                     new_data = int(new_data)
                 city_data[data] = new_data
+        airline_network.set_node(city_code, city_data)
 
 
 def print_message(message):
@@ -0,0 +1,52 @@
+""" Tests for the running GraphAggregates in aggregates.py
+
+PyCharm Error Code Documented: https://youtrack.jetbrains.com/issue/PY-20171
+"""
+
+import unittest
+from framework.aggregates import *
+from scripts.graph_functions import *
+
+MAP_FILE = "../data/map_data.json"
+
+
+class TestGraphAggregates(unittest.TestCase):
+
+    def assertMatchesFullScan(self, test_airline, network_aggregates):
+        all_metros = test_airline.get_all_nodes()
+        flights = [(all_metros[start_code].get_connected_nodes()[end_code], start_code, end_code)
+                   for start_code in all_metros for end_code in all_metros[start_code].get_connected_nodes()]
+        cities = [(all_metros[city_code].get_data()["population"], city_code) for city_code in all_metros
+                  if isinstance(all_metros[city_code].get_data().get("population"), (int, long, float))]
+        self.assertEqual(network_aggregates.get_edge_count(), len(flights))
+        self.assertEqual(network_aggregates.get_edge_total(), sum(flight[0] for flight in flights))
+        self.assertEqual(network_aggregates.get_longest_edge(), max(flights))
+        self.assertEqual(network_aggregates.get_shortest_edge(), min(flights))
+        self.assertEqual(network_aggregates.get_value_count(), len(cities))
+        self.assertEqual(network_aggregates.get_value_total(), sum(city[0] for city in cities))
+        self.assertEqual(network_aggregates.get_largest_value()[1], max(cities)[1])
+        self.assertEqual(network_aggregates.get_smallest_value()[1], min(cities)[1])
+
+    def test_aggregates_follow_modifications(self):
+        """ Test that the aggregates match a full scan after each kind of modification. """
+        test_airline = add_file_data_to_graph(Graph(), MAP_FILE)
+        network_aggregates = GraphAggregates(test_airline, "population")
+        self.assertMatchesFullScan(test_airline, network_aggregates)
+        delete_city(test_airline, "SYD")
+        self.assertMatchesFullScan(test_airline, network_aggregates)
+        add_route(test_airline, "y", "SCL", "TYO", 20000)
+        self.assertMatchesFullScan(test_airline, network_aggregates)
+        add_route(test_airline, "n", "SCL", "TYO", 10)
+        self.assertMatchesFullScan(test_airline, network_aggregates)
+        delete_route(test_airline, "SCL", "TYO", "y")
+        self.assertMatchesFullScan(test_airline, network_aggregates)
+        tokyo_data = dict(test_airline.get_node("TYO").get_data())
+        tokyo_data["population"] = 1
+        test_airline.set_node("TYO", tokyo_data)
+        self.assertMatchesFullScan(test_airline, network_aggregates)
+        add_city(test_airline, {"code": "CMI", "name": "Champaign", "population": "226000"})
+        self.assertMatchesFullScan(test_airline, network_aggregates)
+        test_airline.add_node("LIM", {"code": "LIM", "name": "Lima", "population": 99000000})
+        self.assertMatchesFullScan(test_airline, network_aggregates)
+        self.assertEqual(get_biggest_city(test_airline), "Biggest City: Lima with population 99000000")
+        self.assertTrue(get_network_aggregates(test_airline) is network_aggregates)
@@ -0,0 +1,179 @@
+""" Tests for the ChangeJournal in change_journal.py and the patch files built on it
+
+PyCharm Error Code Documented: https://youtrack.jetbrains.com/issue/PY-20171
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from framework.change_journal import *
+from framework.graph import *
+from scripts.graph_functions import *
+
+MAP_FILE = "../data/map_data.json"
+
+
+class TestChangeJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_directory = tempfile.mkdtemp()
+        self.output_file_path = os.path.join(self.temp_directory, "output_data.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_directory)
+
+    def assert_same_graph(self, test_graph, expected_graph):
+        expected_nodes = expected_graph.get_all_nodes()
+        self.assertEqual(sorted(test_graph.get_all_nodes()), sorted(expected_nodes))
+        for key in expected_nodes:
+            self.assertEqual(test_graph.get_node(key).get_data(), expected_nodes[key].get_data())
+            self.assertEqual(test_graph.get_node(key).get_connected_nodes(),
+                             expected_nodes[key].get_connected_nodes())
+
+    def test_replay_changes(self):
+        """ Test that replaying the journal on a copy of the graph at the checkpoint gives the same graph. """
+        test_graph = Graph()
+        test_graph.add_nodes([("a", "a"), ("b", "b"), ("c", "c")])
+        test_graph.add_connections([("a", "b", 1), ("b", "a", 1), ("c", "a", 2)])
+        copied_graph = Graph()
+        copied_graph.add_nodes([("a", "a"), ("b", "b"), ("c", "c")])
+        copied_graph.add_connections([("a", "b", 1), ("b", "a", 1), ("c", "a", 2)])
+        change_journal = ChangeJournal(test_graph)
+        test_graph.add_node("d", "d")
+        test_graph.add_connections([("d", "a", 3), ("a", "d", 3)])
+        test_graph.add_node("a", "replaced")  # Keeps the edges pointing to a
+        test_graph.delete_connection("b", "a")
+        test_graph.set_node("c", "changed")
+        test_graph.delete_node("b")
+        self.assertEqual(change_journal.get_changes()[:2], [(ADD_NODE, "d", "d"), (ADD_CONNECTION, "d", "a", 3)])
+        self.assert_same_graph(apply_changes(copied_graph, change_journal.get_changes()), test_graph)
+        change_journal.checkpoint("saved")
+        self.assertEqual(change_journal.get_changes(), [])
+        self.assertEqual(change_journal.get_checkpoint_label(), "saved")
+
+    def test_unknown_change(self):
+        """ Test that an operation the journal never records is refused. """
+        self.assertRaises(ValueError, apply_changes, Graph(), [("rename_node", "a", "b")])
+
+    def test_changes_from_other_graph(self):
+        """ Test that changes recorded on another graph are refused before any of them is made. """
+        test_graph = Graph()
+        test_graph.add_nodes([("a", "a"), ("b", "b")])
+        test_graph.add_connection("a", "b", 1)
+        version = test_graph.get_version()
+        changes = [(ADD_NODE, "c", "c"), (ADD_CONNECTION, "c", "a", 2), (DELETE_CONNECTION, "b", "a")]
+        try:
+            apply_changes(test_graph, changes)
+            self.fail("Change applied to a graph without its connection")
+        except ValueError, e:
+            self.assertEqual(str(e), "Change 3 (delete_connection) does not apply: no connection from b to a")
+        self.assertEqual(test_graph.get_version(), version)
+        self.assertEqual(sorted(test_graph.get_all_nodes()), ["a", "b"])
+        for change in [(DELETE_NODE, "d"), (SET_DATA, "d", "d"), (ADD_CONNECTION, "a", "d", 1),
+                       (DELETE_CONNECTION, "d", "a")]:
+            self.assertRaises(ValueError, apply_changes, test_graph, [change])
+
+    def test_changes_checked_in_order(self):
+        """ Test that each change is checked against the graph as the changes before it leave it. """
+        test_graph = Graph()
+        test_graph.add_nodes([("a", "a"), ("b", "b"), ("c", "c")])
+        test_graph.add_connections([("a", "b", 1), ("c", "a", 2), ("c", "b", 3)])
+        copied_graph = Graph()
+        copied_graph.add_nodes([("a", "a"), ("b", "b"), ("c", "c")])
+        copied_graph.add_connections([("a", "b", 1), ("c", "a", 2), ("c", "b", 3)])
+        for changes, problem in [
+                ([(ADD_NODE, "a", "replaced"), (DELETE_CONNECTION, "a", "b")], "no connection from a to b"),
+                ([(DELETE_NODE, "a"), (DELETE_CONNECTION, "c", "a")], "a is not in the graph"),
+                ([(DELETE_NODE, "a"), (ADD_NODE, "a", "a"), (DELETE_CONNECTION, "c", "a")],
+                 "no connection from c to a"),
+                ([(DELETE_CONNECTION, "c", "b"), (SET_DATA, "b", "b"), (DELETE_CONNECTION, "c", "b")],
+                 "no connection from c to b")]:
+            try:
+                apply_changes(test_graph, changes)
+                self.fail("Change applied after the changes before it removed what it needs")
+            except ValueError, e:
+                self.assertTrue(str(e).endswith(problem))
+            self.assert_same_graph(test_graph, copied_graph)
+        apply_changes(test_graph, [(DELETE_NODE, "a"), (ADD_NODE, "a", "a"), (ADD_CONNECTION, "c", "a", 4),
+                                   (DELETE_CONNECTION, "c", "a")])
+        self.assertEqual(test_graph.get_node("c").get_connected_nodes(), {"b": 3})
+
+    def test_patch_saved_against_other_network(self):
+        """ Test that replaying a patch on a network missing its cities names the patch and the city. """
+        test_airline = add_file_data_to_graph(Graph(), MAP_FILE)
+        download_changes_to_json(test_airline, self.output_file_path)
+        delete_city(test_airline, "SYD")
+        patch_file_path = download_changes_to_json(test_airline, self.output_file_path)
+        other_file_path = os.path.join(self.temp_directory, "other_data.json")
+        download_data_to_json(add_file_data_to_graph(Graph(), "../data/test_data.json"), other_file_path)
+        shutil.copy(patch_file_path, get_patch_file_path(other_file_path, 1))
+        try:
+            add_saved_data_to_graph(Graph(), other_file_path)
+            self.fail("Patch replayed on a network without its city")
+        except ValueError, e:
+            self.assertEqual(str(e), "%s: Change 1 (delete_node) does not apply: SYD is not in the graph"
+                             % get_patch_file_path(other_file_path, 1))
+
+    def test_later_patch_saved_against_other_network(self):
+        """ Test that a patch that does not apply leaves out the patches before it as well. """
+        test_airline = add_file_data_to_graph(Graph(), MAP_FILE)
+        download_changes_to_json(test_airline, self.output_file_path)
+        add_route(test_airline, "n", "SCL", "MEX", 100)
+        download_changes_to_json(test_airline, self.output_file_path)
+        with open(get_patch_file_path(self.output_file_path, 2), "w") as patch_file:
+            json.dump({"changes": [["add_connection", "MEX", "SCL", 100], ["delete_node", "CMI"]]}, patch_file)
+        saved_airline = Graph()
+        try:
+            add_saved_data_to_graph(saved_airline, self.output_file_path)
+            self.fail("Patch replayed on a network without its city")
+        except ValueError, e:
+            self.assertTrue(str(e).endswith("Change 2 (delete_node) does not apply: CMI is not in the graph"))
+        self.assert_same_graph(saved_airline, add_file_data_to_graph(Graph(), self.output_file_path))
+
+    def test_download_changes(self):
+        """ Test that saves after the first write patches that replay to the current network. """
+        test_airline = add_file_data_to_graph(Graph(), MAP_FILE)
+        self.assertEqual(download_changes_to_json(test_airline, self.output_file_path), self.output_file_path)
+        self.assertEqual(download_changes_to_json(test_airline, self.output_file_path), None)
+        add_route(test_airline, "y", "SCL", "MEX", 6600)
+        first_patch_file_path = download_changes_to_json(test_airline, self.output_file_path)
+        self.assertEqual(first_patch_file_path, os.path.join(self.temp_directory, "output_data.patch1.json"))
+        with open(first_patch_file_path, "r") as patch_file:
+            self.assertEqual(json.load(patch_file), {"changes": [["add_connection", "SCL", "MEX", 6600],
+                                                                 ["add_connection", "MEX", "SCL", 6600]]})
+        delete_city(test_airline, "LIM")
+        test_airline.set_node("BOG", dict(test_airline.get_node("BOG").get_data(), population=1))
+        add_city(test_airline, {"code": "CMI", "name": "Champaign"})
+        download_changes_to_json(test_airline, self.output_file_path, compact=True)
+        self.assertEqual(get_patch_file_paths(self.output_file_path),
+                         [first_patch_file_path, os.path.join(self.temp_directory, "output_data.patch2.json")])
+        self.assert_same_graph(add_saved_data_to_graph(Graph(), self.output_file_path), test_airline)
+        streamed_airline = add_file_data_to_graph(Graph(), self.output_file_path, streaming=True)
+        for patch_file_path in get_patch_file_paths(self.output_file_path):
+            add_file_data_to_graph(streamed_airline, patch_file_path, streaming=True)
+        self.assert_same_graph(streamed_airline, test_airline)
+
+    def test_compaction(self):
+        """ Test that patches are folded back into the output file once there are too many. """
+        test_airline = add_file_data_to_graph(Graph(), MAP_FILE)
+        download_changes_to_json(test_airline, self.output_file_path, max_patch_files=2)
+        for distance in [100, 200]:
+            add_route(test_airline, "n", "SCL", "MEX", distance)
+            download_changes_to_json(test_airline, self.output_file_path, max_patch_files=2)
+        self.assertEqual(len(get_patch_file_paths(self.output_file_path)), 2)
+        add_route(test_airline, "n", "SCL", "MEX", 300)
+        self.assertEqual(download_changes_to_json(test_airline, self.output_file_path, max_patch_files=2),
+                         self.output_file_path)
+        self.assertEqual(get_patch_file_paths(self.output_file_path), [])
+        self.assert_same_graph(add_saved_data_to_graph(Graph(), self.output_file_path), test_airline)
+
+    def test_other_output_file(self):
+        """ Test that saving to another file writes the whole network there first. """
+        test_airline = add_file_data_to_graph(Graph(), MAP_FILE)
+        download_changes_to_json(test_airline, self.output_file_path)
+        other_file_path = os.path.join(self.temp_directory, "other_data.json")
+        add_route(test_airline, "n", "SCL", "MEX", 100)
+        self.assertEqual(download_changes_to_json(test_airline, other_file_path), other_file_path)
+        self.assert_same_graph(add_saved_data_to_graph(Graph(), other_file_path), test_airline)
@@ -0,0 +1,80 @@
+""" Tests for the contraction hierarchy in contraction_hierarchy.py
+
+PyCharm Error Code Documented: https://youtrack.jetbrains.com/issue/PY-20171
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from scripts.contraction_hierarchy import *
+from scripts.graph_functions import *
+from scripts.routing import *
+
+TEST_FILE = "../data/test_data.json"
+
+
+class TestContractionHierarchy(unittest.TestCase):
+
+    def assertMatchesDijkstra(self, airline_network, contraction_hierarchy):
+        for start_city in airline_network.get_all_nodes():
+            for end_city in airline_network.get_all_nodes():
+                shortest_path = find_shortest_path(airline_network, start_city, end_city)
+                hierarchy_path = contraction_hierarchy.get_shortest_path(start_city, end_city)
+                if shortest_path is None:
+                    self.assertEqual(hierarchy_path, None)
+                else:
+                    self.assertEqual(hierarchy_path.distance, shortest_path.distance)
+                    self.assertEqual(hierarchy_path.path[0], start_city)
+                    self.assertEqual(hierarchy_path.path[-1], end_city)
+
+    def test_matches_dijkstra_on_map(self):
+        """ Test that every query on the map data gives Dijkstra's distance. """
+        map_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path="../data/map_data.json")
+        self.assertMatchesDijkstra(map_airline, build_contraction_hierarchy(map_airline))
+
+    def test_matches_dijkstra_on_random_networks(self):
+        """ Test random one-way networks with shortcuts, zero distances and unreachable cities. """
+        random.seed(4)
+        for trial in range(20):
+            test_network = Graph()
+            city_codes = ["C%i" % i for i in range(12)]
+            for city_code in city_codes:
+                test_network.add_node(city_code, {"code": city_code})
+            for route in range(30):
+                start_code, end_code = random.sample(city_codes, 2)
+                test_network.add_connection(start_code, end_code, random.randint(0, 40))
+            self.assertMatchesDijkstra(test_network, build_contraction_hierarchy(test_network))
+
+    def test_saved_until_network_changes(self):
+        """ Test that the saved hierarchy is reused for the same contents and rebuilt after a change. """
+        temp_directory = tempfile.mkdtemp()
+        try:
+            map_file_path = os.path.join(temp_directory, "test_data.json")
+            shutil.copy(TEST_FILE, map_file_path)
+            test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=map_file_path)
+            self.assertFalse(attach_saved_contraction_hierarchy(test_airline, map_file_path))
+            self.assertFalse(has_contraction_hierarchy(test_airline))
+            contraction_hierarchy = attach_contraction_hierarchy(test_airline, map_file_path)
+            self.assertTrue(has_contraction_hierarchy(test_airline))
+            self.assertTrue(os.path.exists(get_hierarchy_file_path(map_file_path)))
+            self.assertTrue(get_contraction_hierarchy(test_airline) is contraction_hierarchy)
+            reloaded_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=map_file_path)
+            self.assertEqual(get_network_fingerprint(reloaded_airline), contraction_hierarchy.get_fingerprint())
+            saved_hierarchy = attach_contraction_hierarchy(reloaded_airline, map_file_path)
+            self.assertEqual(saved_hierarchy.weights, contraction_hierarchy.weights)
+            self.assertEqual(get_shortest_path(reloaded_airline, "BOG", "SCL", "hierarchy"),
+                             get_shortest_path(reloaded_airline, "BOG", "SCL"))
+            saved_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=map_file_path)
+            self.assertTrue(attach_saved_contraction_hierarchy(saved_airline, map_file_path))
+            self.assertEqual(get_contraction_hierarchy(saved_airline).weights, contraction_hierarchy.weights)
+            add_route(reloaded_airline, "y", "BOG", "SCL", 100)
+            self.assertFalse(has_contraction_hierarchy(reloaded_airline))
+            self.assertFalse(attach_saved_contraction_hierarchy(reloaded_airline, map_file_path))
+            self.assertFalse(get_contraction_hierarchy(reloaded_airline) is saved_hierarchy)
+            self.assertEqual(find_shortest_path_in_hierarchy(reloaded_airline, "BOG", "SCL").distance, 100)
+            self.assertEqual(load_contraction_hierarchy(get_hierarchy_file_path(map_file_path)).get_fingerprint(),
+                             contraction_hierarchy.get_fingerprint())
+        finally:
+            shutil.rmtree(temp_directory)
@@ -0,0 +1,29 @@
+""" Tests for the DegreeIndex in degree_index.py
+
+PyCharm Error Code Documented: https://youtrack.jetbrains.com/issue/PY-20171
+"""
+
+import unittest
+from framework.degree_index import *
+from framework.graph import *
+
+
+class TestDegreeIndex(unittest.TestCase):
+
+    def test_range_queries_follow_edges(self):
+        """ Test that degree ranges and top nodes match the adjacency lists after edits. """
+        test_graph = Graph()
+        for key in "abcd":
+            test_graph.add_node(key, key)
+        degree_index = DegreeIndex(test_graph)
+        test_graph.add_connections([("a", "b", 1), ("a", "c", 1), ("a", "d", 1), ("b", "a", 1), ("c", "a", 1)])
+        test_graph.add_connection("a", "b", 5)
+        self.assertEqual(degree_index.get_nodes_with_degree(1), [(1, set(["b", "c"])), (3, set(["a"]))])
+        self.assertEqual(degree_index.get_nodes_with_degree(0, 1), [(0, set(["d"])), (1, set(["b", "c"]))])
+        self.assertEqual(degree_index.get_top_nodes(2), [(3, "a"), (1, "b")])
+        test_graph.delete_node("a")
+        self.assertEqual(degree_index.get_nodes_with_degree(0), [(0, set(["b", "c", "d"]))])
+        test_graph.add_connection("d", "b", 1)
+        test_graph.add_node("d", "replaced")
+        self.assertEqual(degree_index.get_degree("d"), 0)
+        self.assertEqual(degree_index.get_top_nodes(10), [(0, "b"), (0, "c"), (0, "d")])
@@ -74,3 +74,91 @@ class TestGraph(unittest.TestCase):
         graph.set_node(key, modified_data)
         node = graph.get_node(key)
         self.assertEqual(node.get_data(), modified_data)
+
+    def test_version_changes(self):
+        """ Test that every modification moves the graph to a new, larger version. """
+        graph = Graph()
+        versions = [graph.get_version()]
+        graph.add_node("first_test_key", "first_test_data")
+        versions.append(graph.get_version())
+        graph.add_node("second_test_key", "second_test_data")
+        graph.add_connection("first_test_key", "second_test_key", 0)
+        versions.append(graph.get_version())
+        graph.delete_connection("first_test_key", "second_test_key")
+        versions.append(graph.get_version())
+        graph.set_node("first_test_key", "modified_test_data")
+        versions.append(graph.get_version())
+        graph.delete_node("second_test_key")
+        versions.append(graph.get_version())
+        self.assertEqual(versions, sorted(set(versions)))
+        self.assertFalse(graph.set_node("missing_test_key", "test_data"))
+        self.assertEqual(graph.get_version(), versions[-1])
+        self.assertNotEqual(Graph().get_version(), Graph().get_version())
+
+    def test_freeze(self):
+        """ Test that a frozen graph has the same nodes, data and connections as the graph. """
+        graph = Graph()
+        graph.add_node("first_test_key", "first_test_data")
+        graph.add_node("second_test_key", "second_test_data")
+        graph.add_node("third_test_key", "third_test_data")
+        graph.add_connection("first_test_key", "second_test_key", 5)
+        graph.add_connection("first_test_key", "third_test_key", 7)
+        graph.add_connection("third_test_key", "first_test_key", 2)
+        frozen_graph = graph.freeze()
+        self.assertEqual(frozen_graph.get_version(), graph.get_version())
+        self.assertEqual(sorted(frozen_graph.get_all_nodes()), sorted(graph.get_all_nodes()))
+        for key in graph.get_all_nodes():
+            node = graph.get_node(key)
+            frozen_node = frozen_graph.get_node(key)
+            self.assertEqual(frozen_node.get_data(), node.get_data())
+            self.assertEqual(dict(frozen_node.get_connected_nodes()), node.get_connected_nodes())
+        connected = frozen_graph.get_node("first_test_key").get_connected_nodes()
+        self.assertEqual(connected["third_test_key"], 7)
+        self.assertTrue("first_test_key" not in connected)
+        self.assertFalse(frozen_graph.get_node("missing_test_key"))
+        for key in graph.get_all_nodes():
+            self.assertEqual(frozen_graph.get_incoming_nodes(key), graph.get_incoming_nodes(key))
+        self.assertEqual(frozen_graph.get_incoming_nodes("missing_test_key"), set())
+        graph.delete_connection("first_test_key", "second_test_key")
+        self.assertEqual(len(frozen_graph.get_node("first_test_key").get_connected_nodes()), 2)
+
+    def test_delete_node_removes_incoming_connections(self):
+        """ Test that deleting a node removes the edges pointing to it in both directions. """
+        graph = Graph()
+        graph.add_node("first_test_key", "first_test_data")
+        graph.add_node("second_test_key", "second_test_data")
+        graph.add_node("third_test_key", "third_test_data")
+        graph.add_connection("first_test_key", "second_test_key", 0)
+        graph.add_connection("second_test_key", "first_test_key", 0)
+        graph.add_connection("third_test_key", "second_test_key", 0)
+        self.assertEqual(graph.get_incoming_nodes("second_test_key"), set(["first_test_key", "third_test_key"]))
+        graph.delete_node("second_test_key")
+        self.assertEqual(len(graph.get_node("first_test_key").get_connected_nodes()), 0)
+        self.assertEqual(len(graph.get_node("third_test_key").get_connected_nodes()), 0)
+        self.assertEqual(graph.get_incoming_nodes("first_test_key"), set())
+        graph.add_node("second_test_key", "second_test_data")
+        self.assertEqual(graph.get_incoming_nodes("second_test_key"), set())
+
+    def test_incoming_nodes_follow_connections(self):
+        """ Test that the reverse index is kept in step with added and deleted connections. """
+        graph = Graph()
+        graph.add_node("first_test_key", "first_test_data")
+        graph.add_node("second_test_key", "second_test_data")
+        graph.add_connection("first_test_key", "second_test_key", 0)
+        self.assertEqual(graph.get_incoming_nodes("second_test_key"), set(["first_test_key"]))
+        graph.delete_connection("first_test_key", "second_test_key")
+        self.assertEqual(graph.get_incoming_nodes("second_test_key"), set())
+        graph.add_connection("first_test_key", "second_test_key", 0)
+        graph.add_node("first_test_key", "modified_test_data")
+        self.assertEqual(graph.get_incoming_nodes("second_test_key"), set())
+
+    def test_bulk_add(self):
+        """ Test that nodes and connections can be added in bulk with a single new version. """
+        graph = Graph()
+        graph.add_nodes([("first_test_key", "first_test_data"), ("second_test_key", "second_test_data")])
+        version = graph.get_version()
+        graph.add_connections([("first_test_key", "second_test_key", 1), ("second_test_key", "first_test_key", 2)])
+        self.assertEqual(graph.get_version(), version + 1)
+        self.assertEqual(graph.get_node("first_test_key").get_connected_nodes(), {"second_test_key": 1})
+        self.assertEqual(graph.get_node("second_test_key").get_connected_nodes(), {"first_test_key": 2})
+        self.assertEqual(graph.get_incoming_nodes("first_test_key"), set(["second_test_key"]))
@@ -7,7 +7,7 @@ import unittest
 from scripts.graph_functions import *
 
 TEST_FILE = "../data/test_data.json"
-POSSIBLE_CONNECTIONS = ["", "BOG-LIM", "LIM-BOG", "LIM-MEX", "LIM-SCL", "MEX-LIM", "SCL-LIM"]
+POSSIBLE_CONNECTIONS = ["BOG-LIM", "LIM-MEX", "LIM-SCL"]
 CITY_CODES = ["SCL", "BOG", "MEX", "LIM"]
 CITY_NAMES = ["Santiago", "Bogota", "Mexico City", "Lima"]
 
@@ -35,6 +35,18 @@ class TestGraphFunctions(unittest.TestCase):
         url_connections.sort()
         self.assertEqual(POSSIBLE_CONNECTIONS, url_connections)
 
+    def test_get_map_split_by_length(self):
+        """ Test that a long map is split over URLs within the length limit, drawing every route once. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path="../data/map_data.json")
+        route_urls = get_map_urls(test_airline, 200)
+        self.assertTrue(len(route_urls) > 1)
+        self.assertTrue(all(len(route_url) <= 200 for route_url in route_urls))
+        segments = [segment for route_url in route_urls for segment in route_url.split("=")[1].split(",")]
+        self.assertEqual(len(segments), len(set(segments)))
+        self.assertEqual(len(segments), len(get_map_urls(test_airline)[0].split("=")[1].split(",")))
+        self.assertEqual(get_map_of_routes(test_airline, False, 200), "\n".join(route_urls))
+        self.assertEqual(get_map_urls(Graph()), [MAP_BASE_URL])
+
     def test_get_all_cities(self):
         """ Test that all cities are returned correctly. """
         test_airline = add_file_data_to_graph(map_file_path=TEST_FILE)
@@ -51,14 +63,44 @@ class TestGraphFunctions(unittest.TestCase):
         hub_string_2_threshold = get_hub_cities(test_airline, 2)
         self.assertEqual(hub_string_2_threshold, "3 routes: Lima\n")
         hub_string_1_threshold = get_hub_cities(test_airline, 1)
-        self.assertEqual(hub_string_1_threshold, "1 routes: Santiago, Bogota, Mexico City\n3 routes: Lima\n")
+        self.assertEqual(hub_string_1_threshold, "1 routes: Bogota, Mexico City, Santiago\n3 routes: Lima\n")
+
+    def test_top_hub_cities(self):
+        """ Test that the top hubs follow modifications, most routes first and ties by city code. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        self.assertEqual(get_top_hub_cities(test_airline, 2), "Lima (3 routes)\nBogota (1 routes)\n")
+        add_route(test_airline, "y", "SCL", "MEX", 6000)
+        self.assertEqual(get_top_hub_cities(test_airline, 3),
+                         "Lima (3 routes)\nMexico City (2 routes)\nSantiago (2 routes)\n")
+        delete_city(test_airline, "LIM")
+        self.assertEqual(get_hub_cities(test_airline, 1), "1 routes: Mexico City, Santiago\n")
+        self.assertEqual(get_hub_cities(test_airline, 0), "0 routes: Bogota\n1 routes: Mexico City, Santiago\n")
 
     def test_cities_by_continent(self):
         """ Test that cities are grouped correctly by continent. """
         test_airline = add_file_data_to_graph(map_file_path=TEST_FILE)
         continent_separated_string = get_cities_by_continent(test_airline)
         self.assertEqual(continent_separated_string, "North America: Mexico City\n"
-                                                     "South America: Santiago, Bogota, Lima\n")
+                                                     "South America: Bogota, Lima, Santiago\n")
+
+    def test_cities_by_attribute(self):
+        """ Test that indexed queries follow every kind of modification, including in-place edits. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        self.assertEqual(get_cities_by_attribute(test_airline, continent="South America", region=1),
+                         "Bogota, Lima, Santiago")
+        self.assertEqual(get_cities_by_attribute(test_airline, country="MX"), "Mexico City")
+        self.assertEqual(get_cities_by_attribute(test_airline, country="MX", region=2), "No cities match.")
+        lima_data = test_airline.get_node("LIM").get_data()
+        lima_data["country"] = "MX"
+        test_airline.set_node("LIM", lima_data)
+        self.assertEqual(get_cities_by_attribute(test_airline, country="PE"), "No cities match.")
+        self.assertEqual(get_cities_by_attribute(test_airline, country="MX"), "Lima, Mexico City")
+        delete_city(test_airline, "MEX")
+        add_city(test_airline, {"code": "CMI", "name": "Champaign", "country": "US", "continent": "North America"})
+        self.assertEqual(get_cities_by_continent(test_airline), "North America: Champaign\n"
+                                                                "South America: Bogota, Lima, Santiago\n")
+        self.assertEqual(test_airline.find_nodes(country="MX"), set(["LIM"]))
+        self.assertRaises(ValueError, test_airline.find_nodes, population=1)
 
     def test_average_population(self):
         """ Test that the average population is determined correctly. """
@@ -150,3 +192,28 @@ class TestGraphFunctions(unittest.TestCase):
                           "Total Cost = $1393.55\nTotal Time = 8hrs 30mins"
         actual_result = get_shortest_path(test_airline, "BOG", "SCL")
         self.assertEqual(expected_result, actual_result)
+
+    def test_cached_shortest_path_after_modification(self):
+        """ Test that a cached route is not returned once the network has changed. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        get_shortest_path(test_airline, "BOG", "SCL")
+        hits = query_cache.get_statistics()["hits"]
+        get_shortest_path(test_airline, "BOG", "SCL")
+        self.assertEqual(query_cache.get_statistics()["hits"], hits + 1)
+        add_route(test_airline, "y", "BOG", "SCL", 100)
+        self.assertEqual(get_shortest_path(test_airline, "BOG", "SCL"),
+                         "['BOG', 'SCL']\nTotal Distance = 100\nTotal Cost = $35.00\nTotal Time = 0hrs 32mins")
+
+    def test_statistics_on_frozen_graph(self):
+        """ Test that statistics and routes are the same on a frozen snapshot of the network. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        frozen_airline = test_airline.freeze()
+        self.assertEqual(get_average_distance(frozen_airline), get_average_distance(test_airline))
+        self.assertEqual(get_biggest_city(frozen_airline), get_biggest_city(test_airline))
+        self.assertEqual(get_average_population(frozen_airline), get_average_population(test_airline))
+        self.assertEqual(get_hub_cities(frozen_airline, 3), "3 routes: Lima\n")
+        self.assertEqual(get_cities_by_continent(frozen_airline), get_cities_by_continent(test_airline))
+        self.assertEqual(get_cities_by_attribute(frozen_airline, country="MX"), "Mexico City")
+        self.assertEqual(get_route_data(frozen_airline, ["SCL", "LIM", "BOG"]),
+                         get_route_data(test_airline, ["SCL", "LIM", "BOG"]))
+        self.assertEqual(find_shortest_path(frozen_airline, "BOG", "SCL").distance, 4332)
@@ -0,0 +1,39 @@
+""" Tests for the IndexedHeap in indexed_heap.py
+
+PyCharm Error Code Documented: https://youtrack.jetbrains.com/issue/PY-20171
+"""
+
+import random
+import unittest
+from framework.indexed_heap import *
+
+
+class TestIndexedHeap(unittest.TestCase):
+
+    def test_min_and_max_heap(self):
+        """ Test that the top entry is the smallest, or largest for a max heap. """
+        min_heap = IndexedHeap()
+        max_heap = IndexedHeap(max_heap=True)
+        for key, priority in [("a", 5), ("b", 2), ("c", 9)]:
+            min_heap.push(key, priority)
+            max_heap.push(key, priority)
+        self.assertEqual(min_heap.peek(), (2, "b"))
+        self.assertEqual(max_heap.peek(), (9, "c"))
+        self.assertEqual(IndexedHeap().peek(), None)
+
+    def test_update_and_remove(self):
+        """ Test that entries stay ordered through random updates and removals. """
+        random.seed(7)
+        heap = IndexedHeap()
+        priorities = {}
+        for step in range(2000):
+            key = random.randint(0, 50)
+            if key in priorities and random.random() < 0.4:
+                heap.remove(key)
+                del priorities[key]
+            else:
+                priorities[key] = random.randint(0, 100)
+                heap.push(key, priorities[key])
+            self.assertEqual(len(heap), len(priorities))
+            if priorities:
+                self.assertEqual(heap.peek(), min((priority, key) for key, priority in priorities.items()))
@@ -0,0 +1,55 @@
+""" Tests for the batch itinerary evaluation in itineraries.py
+
+PyCharm Error Code Documented: https://youtrack.jetbrains.com/issue/PY-20171
+"""
+
+import os
+import tempfile
+import unittest
+from scripts.graph_functions import *
+from scripts.itineraries import *
+
+TEST_FILE = "../data/test_data.json"
+
+
+class TestItineraries(unittest.TestCase):
+
+    def test_structured_results(self):
+        """ Test that valid and invalid itineraries give the expected records. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        results = evaluate_itineraries(test_airline, [["BOG", "LIM", "SCL"], ["BOG"], ["BOG", "XXX"], ["BOG", "SCL"]])
+        self.assertEqual(results[0].city_codes, ("BOG", "LIM", "SCL"))
+        self.assertEqual(results[0].distance, 4332)
+        self.assertEqual(results[0].cost, 1879 * 0.35 + 2453 * (0.35 - 0.05))
+        self.assertEqual(results[0].error, None)
+        self.assertEqual([result.error for result in results[1:]],
+                         ["Not enough city codes entered", "Invalid City Code: XXX", "Invalid Route"])
+        self.assertEqual(describe_itinerary(results[0]), get_route_data(test_airline, ["BOG", "LIM", "SCL"]))
+
+    def test_declining_fare_reproduced(self):
+        """ Test that long itineraries are priced exactly as by decrementing the fare after every leg. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        city_codes = ["LIM", "BOG"] * 6
+        expected_cost = 0
+        cost_per_kilometer = 0.35
+        for i in range(1, len(city_codes)):
+            expected_cost += test_airline.get_node(city_codes[i - 1]).get_connected_nodes()[city_codes[i]] * \
+                cost_per_kilometer
+            if cost_per_kilometer >= 0.05:
+                cost_per_kilometer -= 0.05
+        self.assertEqual(evaluate_itinerary(test_airline, city_codes).cost, expected_cost)
+
+    def test_itinerary_file_in_parallel(self):
+        """ Test that a file of itineraries gives the same records inline and over a process pool. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        itinerary_file, itinerary_file_path = tempfile.mkstemp(suffix=".txt")
+        try:
+            with os.fdopen(itinerary_file, "w") as itinerary_file:
+                itinerary_file.write("# pricing batch\nBOG,LIM,SCL\n\nmex-lim\nLIM BOG LIM\nSCL MEX\n")
+            inline_results = evaluate_itinerary_file(test_airline, itinerary_file_path)
+            self.assertEqual([result.city_codes for result in inline_results],
+                             [("BOG", "LIM", "SCL"), ("MEX", "LIM"), ("LIM", "BOG", "LIM"), ("SCL", "MEX")])
+            self.assertEqual(evaluate_itineraries(test_airline, read_itinerary_file(itinerary_file_path),
+                                                  processes=2, chunk_size=1), inline_results)
+        finally:
+            os.remove(itinerary_file_path)
@@ -0,0 +1,73 @@
+""" Tests for the incremental network file reader in json_stream.py
+
+PyCharm Error Code Documented: https://youtrack.jetbrains.com/issue/PY-20171
+"""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from scripts.graph_functions import *
+from scripts.json_stream import *
+
+MAP_FILE = "../data/map_data.json"
+OUTPUT_FILE = "../data/output_data.json"
+
+
+class TestJSONStream(unittest.TestCase):
+
+    def test_iterate_network_file(self):
+        """ Test that every metro and route is read one at a time, even across small chunks. """
+        with open(MAP_FILE, "r") as map_file:
+            map_data = json.load(map_file)
+        with open_network_file(MAP_FILE) as map_file:
+            members = list(iterate_network_file(map_file, chunk_size=7))
+        self.assertEqual([value for kind, value in members if kind == "metro"], map_data["metros"])
+        self.assertEqual([value for kind, value in members if kind == "route"], map_data["routes"])
+        self.assertEqual([value for kind, value in members if kind == "data sources"], [map_data["data sources"]])
+
+    def test_top_level_numbers_across_chunks(self):
+        """ Test that a number split between two chunks is read whole. """
+        json_file = io.StringIO(u'{"metros": [], "distance": 123456, "routes": []}')
+        members = list(iterate_network_file(json_file, chunk_size=4))
+        self.assertEqual(members, [("distance", 123456)])
+
+    def test_changes_after_metros_and_routes(self):
+        """ Test that streamed changes see the metros and routes read before them, however they are batched. """
+        json_file = io.StringIO(u'{"metros": [{"code": "A"}, {"code": "B"}], '
+                                u'"routes": [{"ports": ["A", "B"], "distance": 1}], '
+                                u'"changes": [["delete_connection", "B", "A"], ["set_data", "B", {"code": "C"}]]}')
+        test_airline = stream_network_data_to_graph(Graph(), json_file, False, batch_size=10)
+        self.assertEqual(test_airline.get_node("A").get_connected_nodes(), {"B": 1})
+        self.assertEqual(test_airline.get_node("B").get_connected_nodes(), {})
+        self.assertEqual(test_airline.get_node("B").get_data(), {"code": "C"})
+
+    def test_streaming_matches_json_load(self):
+        """ Test that streaming a file builds the same network as loading it whole. """
+        for map_file_path in [MAP_FILE, OUTPUT_FILE]:
+            loaded_airline = add_file_data_to_graph(Graph(), map_file_path)
+            streamed_airline = add_file_data_to_graph(Graph(), map_file_path, streaming=True)
+            loaded_metros = loaded_airline.get_all_nodes()
+            streamed_metros = streamed_airline.get_all_nodes()
+            self.assertEqual(sorted(loaded_metros), sorted(streamed_metros))
+            for city_code in loaded_metros:
+                self.assertEqual(loaded_metros[city_code].get_data(), streamed_metros[city_code].get_data())
+                self.assertEqual(loaded_metros[city_code].get_connected_nodes(),
+                                 streamed_metros[city_code].get_connected_nodes())
+
+    def test_routes_before_metros(self):
+        """ Test that routes listed before their metros and a late unidirectional flag are handled. """
+        temp_directory = tempfile.mkdtemp()
+        try:
+            map_file_path = os.path.join(temp_directory, "reordered.json")
+            with open(map_file_path, "w") as map_file:
+                map_file.write('{"routes": [{"ports": ["AAA", "BBB"], "distance": 10}],'
+                               ' "metros": [{"code": "AAA"}, {"code": "BBB"}], "unidirectional": true}')
+            self.assertEqual(find_top_level_value(map_file_path, "unidirectional"), True)
+            test_airline = add_file_data_to_graph(Graph(), map_file_path, streaming=True)
+            self.assertEqual(test_airline.get_node("AAA").get_connected_nodes(), {"BBB": 10})
+            self.assertEqual(test_airline.get_node("BBB").get_connected_nodes(), {})
+        finally:
+            shutil.rmtree(temp_directory)
@@ -0,0 +1,33 @@
+""" Tests for the LRUCache in lru_cache.py
+
+PyCharm Error Code Documented: https://youtrack.jetbrains.com/issue/PY-20171
+"""
+
+import unittest
+from framework.lru_cache import *
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_get_and_put(self):
+        """ Test that stored values are returned and missing keys count as misses. """
+        cache = LRUCache(2)
+        cache.put("first_test_key", "first_test_data")
+        self.assertEqual(cache.get("first_test_key"), "first_test_data")
+        self.assertEqual(cache.get("second_test_key"), None)
+        statistics = cache.get_statistics()
+        self.assertEqual(statistics["hits"], 1)
+        self.assertEqual(statistics["misses"], 1)
+
+    def test_evicts_least_recently_used(self):
+        """ Test that the least recently used entry is evicted when the cache is full. """
+        cache = LRUCache(2)
+        cache.put("first_test_key", "first_test_data")
+        cache.put("second_test_key", "second_test_data")
+        cache.get("first_test_key")
+        cache.put("third_test_key", "third_test_data")
+        self.assertEqual(cache.get("second_test_key"), None)
+        self.assertEqual(cache.get("first_test_key"), "first_test_data")
+        self.assertEqual(cache.get("third_test_key"), "third_test_data")
+        self.assertEqual(cache.get_statistics()["evictions"], 1)
+        self.assertEqual(cache.get_statistics()["size"], 2)
@@ -0,0 +1,68 @@
+""" Tests for merging network files in merge_loader.py
+
+PyCharm Error Code Documented: https://youtrack.jetbrains.com/issue/PY-20171
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from scripts.contraction_hierarchy import get_hierarchy_file_path
+from scripts.graph_functions import *
+from scripts.merge_loader import *
+from scripts.path_matrix import get_matrix_file_path
+
+MAP_FILE = "../data/map_data.json"
+HUB_FILE = "../data/cmi_hub.json"
+
+
+class TestMergeLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_directory = tempfile.mkdtemp()
+        shutil.copy(MAP_FILE, os.path.join(self.temp_directory, "map_data.json"))
+        shutil.copy(HUB_FILE, os.path.join(self.temp_directory, "cmi_hub.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_directory)
+
+    def test_merge_resolves_routes_across_files(self):
+        """ Test that routes resolve against metros from another file, whatever the file order. """
+        test_airline = Graph()
+        map_file_paths = find_network_files(self.temp_directory)
+        self.assertEqual([os.path.basename(path) for path in map_file_paths], ["cmi_hub.json", "map_data.json"])
+        unresolved_routes, unreadable_files = merge_network_files(test_airline, map_file_paths, processes=2)
+        self.assertEqual(unresolved_routes, [])
+        self.assertEqual(unreadable_files, [])
+        expected_airline = add_file_data_to_graph(Graph(), MAP_FILE)
+        add_file_data_to_graph(expected_airline, HUB_FILE)
+        for city_code in expected_airline.get_all_nodes():
+            self.assertEqual(test_airline.get_node(city_code).get_connected_nodes(),
+                             expected_airline.get_node(city_code).get_connected_nodes())
+
+    def test_sidecar_files_skipped(self):
+        """ Test that the files saved next to a network file are not taken for network files. """
+        map_file_path = os.path.join(self.temp_directory, "map_data.json")
+        for sidecar_file_path in [get_matrix_file_path(map_file_path), get_hierarchy_file_path(map_file_path),
+                                  get_patch_file_path(map_file_path, 1), get_patch_file_path(map_file_path, 12)]:
+            with open(sidecar_file_path, "w") as sidecar_file:
+                json.dump({}, sidecar_file)
+        with open(os.path.join(self.temp_directory, "paths.json"), "w") as network_file:
+            json.dump({"metros": [], "routes": []}, network_file)
+        self.assertEqual([os.path.basename(path) for path in find_network_files(self.temp_directory)],
+                         ["cmi_hub.json", "map_data.json", "paths.json"])
+        self.assertEqual(find_network_files(os.path.join(self.temp_directory, "map_data*.json")), [map_file_path])
+
+    def test_consolidated_report(self):
+        """ Test that unresolved routes and unreadable files are reported together. """
+        with open(os.path.join(self.temp_directory, "broken.json"), "w") as broken_file:
+            broken_file.write("{not json")
+        with open(os.path.join(self.temp_directory, "extra_hub.json"), "w") as hub_file:
+            json.dump({"metros": [], "routes": [{"ports": ["CMI", "XXX"], "distance": 5}]}, hub_file)
+        report = load_network_files(Graph(), os.path.join(self.temp_directory, "*.json"), processes=1)
+        self.assertEqual(report.split("\n"), [
+            "Merged 3 of 4 network files.",
+            "Not a readable network file: %s" % os.path.join(self.temp_directory, "broken.json"),
+            "1 route(s) not created because a city is not in the network:",
+            "\tCMI-XXX (XXX missing) in %s" % os.path.join(self.temp_directory, "extra_hub.json")])
@@ -0,0 +1,90 @@
+""" Tests for the distribution statistics in network_statistics.py
+
+PyCharm Error Code Documented: https://youtrack.jetbrains.com/issue/PY-20171
+"""
+
+import unittest
+from scripts.graph_functions import *
+from scripts.network_statistics import *
+
+TEST_FILE = "../data/test_data.json"
+
+
+class TestNetworkStatistics(unittest.TestCase):
+
+    def test_statistics_cached_until_modified(self):
+        """ Test that statistics are reused until the network is modified. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        network_statistics = get_network_statistics(test_airline)
+        self.assertTrue(get_network_statistics(test_airline) is network_statistics)
+        add_route(test_airline, "n", "SCL", "MEX", 9000)
+        self.assertEqual(get_network_statistics(test_airline).route_count_histogram, {1: 2, 2: 1, 3: 1})
+        self.assertEqual(get_network_statistics(test_airline).distance_percentiles[-1], 9000.0)
+
+    def test_distribution_statistics(self):
+        """ Test the route count histogram and the interpolated percentiles. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        network_statistics = compute_network_statistics(test_airline, "python")
+        self.assertEqual(network_statistics.route_count_histogram, {1: 3, 3: 1})
+        self.assertEqual(network_statistics.distance_percentiles,
+                         (1879.0, 1879.0, 2022.5, 2453.0, 3786.5, 4231.0, 4231.0))
+        self.assertEqual(network_statistics.population_percentiles[3], 8825000.0)
+        self.assertEqual(get_percentiles([1, 2, 3, 4]), (1.0, 1.3, 1.75, 2.5, 3.25, 3.7, 4.0))
+        self.assertEqual(get_percentiles([]), None)
+        self.assertEqual(network_statistics.timezone_histogram, {-6: 1, -5: 2, -4: 1})
+        self.assertEqual(network_statistics.region_histogram, {1: 4})
+        self.assertEqual(network_statistics.coordinate_extent, (-33, 19, -99, -71))
+
+    def test_continent_summaries(self):
+        """ Test the summary of each continent, with ties and cities without a population. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        add_city(test_airline, {"code": "AAA", "name": "Tie", "continent": "South America", "population": 6000000})
+        add_city(test_airline, {"code": "CMI", "name": "Champaign", "continent": "Antarctica"})
+        continent_summaries = compute_network_statistics(test_airline, "python").continent_summaries
+        self.assertEqual(continent_summaries, {
+            "South America": ContinentSummary(4, 7412500.0, "LIM", "AAA"),
+            "North America": ContinentSummary(1, 23400000.0, "MEX", "MEX"),
+            "Antarctica": ContinentSummary(1, None, None, None)})
+        self.assertIn("South America: 4 cities, average population 7412500.0, biggest Lima, smallest Tie\n",
+                      get_network_distribution(test_airline))
+        self.assertIn("Antarctica: 1 cities\n", get_network_distribution(test_airline))
+        self.assertIn("Coordinates: 33S to 19N, 99W to 71W\n", get_network_distribution(test_airline))
+
+    def test_numpy_backend_needs_numpy(self):
+        """ Test that asking for the NumPy backend without NumPy is refused rather than failing part way. """
+        import scripts.network_statistics as network_statistics
+        installed_numpy = network_statistics.numpy
+        network_statistics.numpy = None
+        try:
+            self.assertEqual(get_default_backend(), "python")
+            self.assertRaises(ValueError, compute_network_statistics, Graph(), "numpy")
+        finally:
+            network_statistics.numpy = installed_numpy
+
+    def test_percentile_ranks(self):
+        """ Test the interpolation positions that both backends gather their percentiles from. """
+        self.assertEqual(get_percentile_ranks(1), [(0, 0, 0.0)] * len(PERCENTILES))
+        self.assertEqual(get_percentile_ranks(5), [(0, 1, 0.0), (0, 1, 0.4), (1, 2, 0.0), (2, 3, 0.0),
+                                                   (3, 4, 0.0), (3, 4, 0.6000000000000001), (4, 4, 0.0)])
+        for lower, upper, fraction in get_percentile_ranks(11):
+            self.assertTrue(0 <= lower <= upper <= 10)
+            self.assertTrue(0 <= fraction < 1)
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_numpy_backend_matches_python(self):
+        """ Test that both backends give identical statistics as the network changes. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path="../data/map_data.json")
+        self.assertEqual(compute_network_statistics(test_airline, "numpy"),
+                         compute_network_statistics(test_airline, "python"))
+        add_route(test_airline, "n", "SCL", "TYO", 17000.5)
+        add_city(test_airline, {"code": "CMI", "name": "Champaign", "population": "226000"})
+        add_city(test_airline, {"code": "AAA", "name": "Tie", "continent": "Asia", "population": 34000000.25,
+                                "timezone": 5.5, "region": 3, "coordinates": {"N": 90, "E": 180}})
+        add_city(test_airline, {"code": "XXX", "name": "Nowhere", "continent": "Antarctica", "timezone": "UTC",
+                                "coordinates": {"S": 90}})
+        tokyo_data = dict(test_airline.get_node("TYO").get_data())
+        tokyo_data["population"] = 34000000.25
+        test_airline.set_node("TYO", tokyo_data)
+        self.assertEqual(compute_network_statistics(test_airline, "numpy"),
+                         compute_network_statistics(test_airline, "python"))
+        self.assertEqual(compute_network_statistics(Graph(), "numpy"), compute_network_statistics(Graph(), "python"))
@@ -0,0 +1,122 @@
+""" Tests for writing network files in network_writer.py
+
+PyCharm Error Code Documented: https://youtrack.jetbrains.com/issue/PY-20171
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from scripts.graph_functions import *
+from scripts.merge_loader import *
+from scripts.network_writer import *
+
+MAP_FILE = "../data/map_data.json"
+
+
+class TestNetworkWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_directory = tempfile.mkdtemp()
+        self.test_airline = add_file_data_to_graph(Graph(), MAP_FILE)
+        self.test_airline.delete_connection("LIM", "MEX")  # One way only
+        self.test_airline.add_connection("SCL", "LIM", 1000)  # Different distance each way
+        self.test_airline.add_connection("BOG", "BOG", 5)  # To itself
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_directory)
+
+    def assert_same_network(self, test_airline, expected_airline):
+        expected_metros = expected_airline.get_all_nodes()
+        self.assertEqual(sorted(test_airline.get_all_nodes()), sorted(expected_metros))
+        for city_code in expected_metros:
+            self.assertEqual(test_airline.get_node(city_code).get_data(), expected_metros[city_code].get_data())
+            self.assertEqual(test_airline.get_node(city_code).get_connected_nodes(),
+                             expected_metros[city_code].get_connected_nodes())
+
+    def test_round_trip(self):
+        """ Test that every loader builds the written network back, in both modes. """
+        for compact in [False, True]:
+            output_file_path = os.path.join(self.temp_directory, "output_%s.json" % compact)
+            download_data_to_json(self.test_airline, output_file_path, compact)
+            self.assert_same_network(add_file_data_to_graph(Graph(), output_file_path), self.test_airline)
+            self.assert_same_network(add_file_data_to_graph(Graph(), output_file_path, streaming=True),
+                                     self.test_airline)
+            add_file_data_to_graph(Graph(), output_file_path, use_snapshot=True)
+            self.assert_same_network(add_file_data_to_graph(Graph(), output_file_path, use_snapshot=True),
+                                     self.test_airline)
+            merged_airline = Graph()
+            merge_network_files(merged_airline, [output_file_path], processes=1)
+            self.assert_same_network(merged_airline, self.test_airline)
+
+    def test_matches_old_writer(self):
+        """ Test that metros and connections are written with the data and key order of the old writer. """
+        old_file_path = os.path.join(self.temp_directory, "old.json")
+        old_data = {"unidirectional": True, "metros": [], "routes": []}
+        all_metros = self.test_airline.get_all_nodes()
+        for city_code in all_metros:
+            old_data["metros"].append(all_metros[city_code].get_data())
+            connected_nodes = all_metros[city_code].get_connected_nodes()
+            for end_code in connected_nodes:
+                old_data["routes"].append({"ports": [city_code, end_code], "distance": connected_nodes[end_code]})
+        with open(old_file_path, "w") as old_file:
+            json.dump(old_data, old_file, indent=4, sort_keys=True)
+        with open(old_file_path, "r") as old_file:
+            old_output = json.load(old_file, object_pairs_hook=list)
+        old_output = dict(old_output)
+        for compact in [False, True]:
+            output_file_path = os.path.join(self.temp_directory, "output_%s.json" % compact)
+            write_network_file(self.test_airline, output_file_path, compact)
+            with open(output_file_path, "r") as output_file:
+                output = dict(json.load(output_file, object_pairs_hook=list))
+            self.assertEqual(output["metros"], sorted(old_output["metros"], key=lambda metro: dict(metro)["code"]))
+            connections = []
+            for route in output["routes"]:
+                self.assertEqual([key for key, value in route], sorted(key for key, value in route))
+                route = dict(route)
+                connections.append((route["ports"][0], route["ports"][1], route["distance"]))
+                if not route.get("unidirectional"):
+                    connections.append((route["ports"][1], route["ports"][0], route["distance"]))
+            self.assertEqual(sorted(set(connections)),
+                             sorted((dict(route)["ports"][0], dict(route)["ports"][1], dict(route)["distance"])
+                                    for route in old_output["routes"]))
+
+    def test_symmetric_routes_written_once(self):
+        """ Test that a route flown both ways at the same distance is written as one route. """
+        output_file_path = os.path.join(self.temp_directory, "output.json")
+        download_data_to_json(self.test_airline, output_file_path)
+        with open(output_file_path, "r") as output_file:
+            output_data = json.load(output_file)
+        self.assertEqual(output_data["unidirectional"], False)
+        routes = sorted((route["ports"], route.get("unidirectional", False)) for route in output_data["routes"])
+        with open(MAP_FILE, "r") as map_file:
+            self.assertEqual(len(routes), len(json.load(map_file)["routes"]) + 2)
+        self.assertIn(([u"BOG", u"BOG"], False), routes)
+        self.assertIn(([u"MEX", u"LIM"], True), routes)
+        self.assertIn(([u"LIM", u"SCL"], True), routes)
+        self.assertIn(([u"SCL", u"LIM"], True), routes)
+        self.assertNotIn(([u"LIM", u"MEX"], False), routes)
+
+    def test_compact_mode(self):
+        """ Test that the compact mode writes the same data without whitespace. """
+        pretty_file_path = os.path.join(self.temp_directory, "pretty.json")
+        compact_file_path = os.path.join(self.temp_directory, "compact.json")
+        write_network_file(self.test_airline, pretty_file_path)
+        write_network_file(self.test_airline, compact_file_path, compact=True)
+        with open(pretty_file_path, "r") as pretty_file:
+            pretty_text = pretty_file.read()
+        with open(compact_file_path, "r") as compact_file:
+            compact_text = compact_file.read()
+        self.assertEqual(json.loads(pretty_text), json.loads(compact_text))
+        self.assertNotIn("\n", compact_text)
+        self.assertNotIn(": ", compact_text)
+        self.assertLess(len(compact_text), len(pretty_text))
+
+    def test_empty_network(self):
+        """ Test that a network without metros is written as empty arrays. """
+        output_file_path = os.path.join(self.temp_directory, "empty.json")
+        for compact in [False, True]:
+            write_network_file(Graph(), output_file_path, compact)
+            with open(output_file_path, "r") as output_file:
+                self.assertEqual(json.load(output_file), {"unidirectional": False, "metros": [], "routes": []})
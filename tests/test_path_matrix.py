@@ -0,0 +1,55 @@
+""" Tests for the all-pairs shortest path matrix in path_matrix.py
+
+PyCharm Error Code Documented: https://youtrack.jetbrains.com/issue/PY-20171
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from scripts.graph_functions import *
+from scripts.path_matrix import *
+
+TEST_FILE = "../data/test_data.json"
+MAP_FILE = "../data/map_data.json"
+
+
+class TestPathMatrix(unittest.TestCase):
+
+    def test_matrix_matches_dijkstra(self):
+        """ Test that every matrix lookup has the distance found by a Dijkstra search. """
+        map_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=MAP_FILE)
+        path_matrix = build_path_matrix(map_airline, processes=2)
+        for start_city in path_matrix.get_codes():
+            for end_city in path_matrix.get_codes():
+                shortest_path = find_shortest_path(map_airline, start_city, end_city)
+                matrix_path = path_matrix.get_shortest_path(start_city, end_city)
+                self.assertEqual(shortest_path.distance, matrix_path.distance)
+                self.assertEqual(matrix_path.path[0], start_city)
+                self.assertEqual(matrix_path.path[-1], end_city)
+
+    def test_unreachable_pairs(self):
+        """ Test that pairs without a route have no path in the matrix. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        delete_route(test_airline, "LIM", "SCL", "y")
+        path_matrix = build_path_matrix(test_airline, processes=1)
+        self.assertEqual(path_matrix.get_shortest_path("BOG", "SCL"), None)
+        self.assertEqual(path_matrix.get_shortest_path("BOG", "MEX").path, ["BOG", "LIM", "MEX"])
+
+    def test_save_and_attach_matrix(self):
+        """ Test that a saved matrix is used for queries until the network is modified. """
+        temp_directory = tempfile.mkdtemp()
+        try:
+            map_file_path = os.path.join(temp_directory, "test_data.json")
+            shutil.copy(TEST_FILE, map_file_path)
+            matrix_file_path = precompute_path_matrix(map_file_path, processes=1)
+            self.assertEqual(matrix_file_path, os.path.join(temp_directory, "test_data.paths.json"))
+            test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=map_file_path)
+            self.assertTrue(attach_saved_path_matrix(test_airline, map_file_path))
+            self.assertEqual(get_shortest_path(test_airline, "BOG", "SCL", "matrix"),
+                             get_shortest_path(test_airline, "BOG", "SCL"))
+            add_route(test_airline, "y", "BOG", "SCL", 100)
+            self.assertEqual(get_path_matrix(test_airline), None)
+            self.assertEqual(find_shortest_path_in_matrix(test_airline, "BOG", "SCL").distance, 100)
+        finally:
+            shutil.rmtree(temp_directory)
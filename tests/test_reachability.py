@@ -0,0 +1,62 @@
+""" Tests for the reachability queries in reachability.py
+
+PyCharm Error Code Documented: https://youtrack.jetbrains.com/issue/PY-20171
+"""
+
+import unittest
+from scripts.graph_functions import *
+from scripts.reachability import *
+from scripts.routing import *
+
+MAP_FILE = "../data/map_data.json"
+
+
+class TestReachability(unittest.TestCase):
+
+    def test_within_distance(self):
+        """ Test that the distance budget gives the shortest route distance of every city within it. """
+        map_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=MAP_FILE)
+        reachable_cities = find_reachable_cities(map_airline, "CHI", max_distance=3000)
+        for city_code in map_airline.get_all_nodes():
+            shortest_path = find_shortest_path(map_airline, "CHI", city_code)
+            if city_code != "CHI" and shortest_path and shortest_path.distance <= 3000:
+                self.assertIn((city_code, shortest_path.distance),
+                              [(city.city_code, city.distance) for city in reachable_cities])
+        self.assertTrue(all(city.distance <= 3000 for city in reachable_cities))
+        self.assertEqual([city.distance for city in reachable_cities],
+                         sorted(city.distance for city in reachable_cities))
+
+    def test_within_time(self):
+        """ Test that the time budget gives the fastest itinerary time of every city within it. """
+        map_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=MAP_FILE)
+        reachable_cities = dict((city.city_code, city) for city in
+                                find_reachable_cities(map_airline, "CHI", max_time=6 * 60))
+        for city_code in map_airline.get_all_nodes():
+            fastest_path = find_fastest_path(map_airline, "CHI", city_code)
+            if city_code != "CHI" and fastest_path and fastest_path.distance <= 6 * 60:
+                self.assertEqual(reachable_cities[city_code].time, fastest_path.distance)
+            elif city_code != "CHI":
+                self.assertNotIn(city_code, reachable_cities)
+        self.assertRaises(ValueError, find_reachable_cities, map_airline, "CHI")
+
+    def test_time_order_ignores_last_layover(self):
+        """ Test that a time budget lists cities by arrival, not by when their layover lets them fly on. """
+        test_airline = Graph()
+        test_airline.add_nodes([(city_code, {"code": city_code}) for city_code in ["ORG", "AAA", "BBB", "CCC"]])
+        test_airline.add_connections([("ORG", "AAA", 500), ("ORG", "BBB", 600), ("AAA", "ORG", 500),
+                                      ("BBB", "ORG", 600), ("BBB", "AAA", 700), ("BBB", "CCC", 800),
+                                      ("CCC", "BBB", 800)])
+        reachable_cities = find_reachable_cities(test_airline, "ORG", max_time=24 * 60)
+        self.assertEqual([city.city_code for city in reachable_cities], ["AAA", "BBB", "CCC"])
+        self.assertEqual([city.time for city in reachable_cities], sorted(city.time for city in reachable_cities))
+
+    def test_many_origins_in_parallel(self):
+        """ Test that queries from many origins match single queries. """
+        map_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=MAP_FILE)
+        origin_cities = ["CHI", "LON", "SYD", "XXX"]
+        results = find_reachable_cities_from_many(map_airline, origin_cities, max_time=300, processes=2)
+        for origin_city in origin_cities:
+            self.assertEqual(results[origin_city], find_reachable_cities(map_airline, origin_city, max_time=300))
+        self.assertEqual(results["XXX"], [])
+        self.assertEqual(get_reachable_cities(map_airline, "CHI", max_distance=1000),
+                         "Toronto (YYZ): 684 km, 1hrs 26mins\nAtlanta (ATL): 958 km, 1hrs 48mins\n")
@@ -0,0 +1,171 @@
+""" Tests for the routing engine in routing.py
+
+PyCharm Error Code Documented: https://youtrack.jetbrains.com/issue/PY-20171
+"""
+
+import unittest
+from scripts.graph_functions import *
+from scripts.routing import *
+
+TEST_FILE = "../data/test_data.json"
+
+
+class TestRouting(unittest.TestCase):
+
+    def test_find_shortest_path(self):
+        """ Test that the structured result holds the route and its total distance. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        shortest_path = find_shortest_path(test_airline, "BOG", "SCL")
+        self.assertEqual(shortest_path.path, ["BOG", "LIM", "SCL"])
+        self.assertEqual(shortest_path.distance, 4332)
+
+    def test_same_start_and_end(self):
+        """ Test that a route from a city to itself has no distance. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        shortest_path = find_shortest_path(test_airline, "LIM", "LIM")
+        self.assertEqual(shortest_path.path, ["LIM"])
+        self.assertEqual(shortest_path.distance, 0)
+
+    def test_unreachable_city(self):
+        """ Test that no path is returned when the end city cannot be reached. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        delete_route(test_airline, "LIM", "SCL", "y")
+        self.assertEqual(find_shortest_path(test_airline, "BOG", "SCL"), None)
+        self.assertEqual(get_shortest_path(test_airline, "BOG", "SCL"), "No Route from BOG to SCL")
+        self.assertEqual(find_shortest_path(test_airline, "BOG", "XXX"), None)
+
+    def test_shorter_path_with_more_stops(self):
+        """ Test that a longer direct flight is not preferred over a shorter path with stops. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        add_route(test_airline, "y", "BOG", "SCL", 5000)
+        shortest_path = find_shortest_path(test_airline, "BOG", "SCL")
+        self.assertEqual(shortest_path.path, ["BOG", "LIM", "SCL"])
+        self.assertEqual(shortest_path.distance, 4332)
+
+    def test_astar_matches_dijkstra(self):
+        """ Test that A* finds routes of the same distance as Dijkstra's algorithm on the full network. """
+        map_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path="../data/map_data.json")
+        all_cities = map_airline.get_all_nodes().keys()
+        for start_city in all_cities:
+            for end_city in all_cities:
+                dijkstra_path = find_shortest_path(map_airline, start_city, end_city)
+                astar_path = find_shortest_path_astar(map_airline, start_city, end_city)
+                self.assertEqual(dijkstra_path.distance, astar_path.distance)
+
+    def test_astar_settles_fewer_cities(self):
+        """ Test that the great-circle heuristic reduces the cities expanded on a long query. """
+        map_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path="../data/map_data.json")
+        weighted_connections = get_weighted_connections(map_airline)
+        expanded = {"dijkstra": [], "astar": []}
+
+        def counting_connections(algorithm):
+            def connections(city_code):
+                expanded[algorithm].append(city_code)
+                return weighted_connections(city_code)
+            return connections
+        heuristic = get_great_circle_heuristic(get_coordinate_table(map_airline), "SYD")
+        dijkstra_path = search("SCL", "SYD", counting_connections("dijkstra"))
+        astar_path = search("SCL", "SYD", counting_connections("astar"), heuristic)
+        self.assertEqual(dijkstra_path.distance, astar_path.distance)
+        self.assertTrue(len(expanded["astar"]) < len(expanded["dijkstra"]))
+
+    def test_astar_without_coordinates(self):
+        """ Test that A* falls back to Dijkstra's algorithm when a city has no coordinates. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        add_city(test_airline, {"code": "XXX", "coordinates": "unknown"})
+        self.assertEqual(get_coordinate_table(test_airline).scale, None)
+        shortest_path = find_shortest_path_astar(test_airline, "BOG", "SCL")
+        self.assertEqual(shortest_path.path, ["BOG", "LIM", "SCL"])
+
+    def test_fastest_path_avoids_layovers(self):
+        """ Test that the fastest route trades distance for fewer layovers, and is timed like get_route_data. """
+        test_airline = Graph()
+        for city_code in ["A", "B", "C"]:
+            add_city(test_airline, {"code": city_code, "name": city_code})
+        add_route(test_airline, "y", "A", "B", 100)
+        add_route(test_airline, "y", "B", "C", 100)
+        add_route(test_airline, "y", "A", "C", 1000)
+        self.assertEqual(find_shortest_path(test_airline, "A", "C").path, ["A", "B", "C"])
+        fastest_path = find_fastest_path(test_airline, "A", "C")
+        self.assertEqual(fastest_path.path, ["A", "C"])
+        self.assertEqual(fastest_path.distance, get_travel_time_table(test_airline).get_itinerary_time(["A", "C"]))
+        self.assertEqual(get_fastest_path(test_airline, "A", "C"), "['A', 'C']\n" + get_route_data(test_airline,
+                                                                                                     ["A", "C"]))
+
+    def test_fastest_path_is_fastest_itinerary(self):
+        """ Test that no route found by the distance search is faster than the fastest route. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path="../data/map_data.json")
+        travel_time_table = get_travel_time_table(test_airline)
+        city_codes = sorted(test_airline.get_all_nodes())
+        for start_city in city_codes[::7]:
+            for end_city in city_codes[::5]:
+                fastest_path = find_fastest_path(test_airline, start_city, end_city)
+                self.assertEqual(fastest_path.distance, travel_time_table.get_itinerary_time(fastest_path.path))
+                shortest_path = find_shortest_path(test_airline, start_city, end_city)
+                self.assertTrue(fastest_path.distance <= travel_time_table.get_itinerary_time(shortest_path.path))
+
+    def test_cheapest_path_uses_falling_fares(self):
+        """ Test that the cheapest route takes extra legs when the falling fare makes them cheaper. """
+        test_airline = Graph()
+        for city_code in ["A", "B", "C", "D"]:
+            add_city(test_airline, {"code": city_code, "name": city_code})
+        add_route(test_airline, "n", "A", "D", 1000)
+        add_route(test_airline, "n", "A", "B", 100)
+        add_route(test_airline, "n", "B", "C", 100)
+        add_route(test_airline, "n", "C", "D", 1000)
+        self.assertEqual(find_shortest_path(test_airline, "A", "D").path, ["A", "D"])
+        cheapest_path = find_cheapest_path(test_airline, "A", "D")
+        self.assertEqual(cheapest_path.path, ["A", "B", "C", "D"])
+        self.assertEqual(cheapest_path.distance,
+                         evaluate_itinerary(test_airline, ["A", "B", "C", "D"]).cost)
+        self.assertEqual(get_cheapest_path(test_airline, "A", "D"),
+                         "['A', 'B', 'C', 'D']\n" + get_route_data(test_airline, ["A", "B", "C", "D"]))
+        self.assertEqual(find_cheapest_path(test_airline, "A", "A").path, ["A"])
+
+    def test_k_shortest_paths(self):
+        """ Test that alternative routes come shortest first, loopless, without modifying the network. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        add_route(test_airline, "y", "BOG", "MEX", 3000)
+        version = test_airline.get_version()
+        shortest_paths = find_k_shortest_paths(test_airline, "BOG", "SCL", 5)
+        self.assertEqual(shortest_paths, [ShortestPath(["BOG", "LIM", "SCL"], 4332),
+                                          ShortestPath(["BOG", "MEX", "LIM", "SCL"], 9684)])
+        self.assertEqual(test_airline.get_version(), version)
+        self.assertEqual(find_k_shortest_paths(test_airline, "BOG", "SCL", 1), shortest_paths[:1])
+        self.assertEqual(get_alternative_routes(test_airline, "BOG", "SCL", 2).split("\n")[4],
+                         "2. ['BOG', 'MEX', u'LIM', 'SCL']")
+        frozen_airline = test_airline.freeze()
+        self.assertEqual(find_k_shortest_paths(frozen_airline, "BOG", "SCL", 5), shortest_paths)
+        frozen_routes = get_alternative_routes(frozen_airline, "BOG", "SCL", 3)  # Before the cache holds them
+        self.assertEqual(frozen_routes, get_alternative_routes(test_airline, "BOG", "SCL", 3))
+        delete_route(test_airline, "LIM", "SCL", "y")
+        self.assertEqual(find_k_shortest_paths(test_airline, "BOG", "SCL", 3), [])
+
+    def test_bidirectional_matches_dijkstra(self):
+        """ Test that the bidirectional search finds routes as short as Dijkstra's algorithm. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path="../data/map_data.json")
+        city_codes = sorted(test_airline.get_all_nodes())
+        for start_city in city_codes[::3]:
+            for end_city in city_codes[::4]:
+                self.assertEqual(find_shortest_path_bidirectional(test_airline, start_city, end_city).distance,
+                                 find_shortest_path(test_airline, start_city, end_city).distance)
+        self.assertEqual(get_shortest_path(test_airline, "BOG", "SCL", "bidirectional"),
+                         get_shortest_path(test_airline, "BOG", "SCL"))
+        frozen_airline = test_airline.freeze()
+        self.assertEqual(find_shortest_path_bidirectional(frozen_airline, "BOG", "SCL"),
+                         find_shortest_path(test_airline, "BOG", "SCL"))
+        self.assertEqual(get_shortest_path(frozen_airline, "BOG", "SCL", "bidirectional"),
+                         get_shortest_path(test_airline, "BOG", "SCL"))
+
+    def test_bidirectional_unidirectional_routes(self):
+        """ Test that the backward search follows one-way routes against their direction. """
+        test_airline = Graph()
+        for city_code in ["A", "B", "C", "D"]:
+            add_city(test_airline, {"code": city_code, "name": city_code})
+        add_route(test_airline, "n", "A", "B", 5)
+        add_route(test_airline, "n", "B", "C", 5)
+        add_route(test_airline, "n", "A", "C", 20)
+        add_route(test_airline, "n", "C", "D", 1)
+        self.assertEqual(find_shortest_path_bidirectional(test_airline, "A", "D"), ShortestPath(["A", "B", "C", "D"], 11))
+        self.assertEqual(find_shortest_path_bidirectional(test_airline, "D", "A"), None)
+        self.assertEqual(find_shortest_path_bidirectional(test_airline, "C", "C"), ShortestPath(["C"], 0))
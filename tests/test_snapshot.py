@@ -0,0 +1,90 @@
+""" Tests for the binary network snapshots in snapshot.py
+
+PyCharm Error Code Documented: https://youtrack.jetbrains.com/issue/PY-20171
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from scripts.graph_functions import *
+from scripts.snapshot import *
+
+MAP_FILE = "../data/map_data.json"
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_directory = tempfile.mkdtemp()
+        self.map_file_path = os.path.join(self.temp_directory, "map_data.json")
+        shutil.copy(MAP_FILE, self.map_file_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_directory)
+
+    def assertSameNetwork(self, first_airline, second_airline):
+        first_metros = first_airline.get_all_nodes()
+        second_metros = second_airline.get_all_nodes()
+        self.assertEqual(sorted(first_metros), sorted(second_metros))
+        for city_code in first_metros:
+            self.assertEqual(first_metros[city_code].get_data(), second_metros[city_code].get_data())
+            self.assertEqual(first_metros[city_code].get_connected_nodes(),
+                             second_metros[city_code].get_connected_nodes())
+
+    def test_snapshot_matches_json(self):
+        """ Test that a network loaded from its snapshot is the same as one loaded from JSON. """
+        json_airline = add_file_data_to_graph(Graph(), self.map_file_path, use_snapshot=True)
+        snapshot_file_path = get_snapshot_file_path(self.map_file_path)
+        self.assertTrue(is_snapshot_fresh(self.map_file_path))
+        metros, routes, unidirectional = read_snapshot(snapshot_file_path)
+        self.assertEqual(len(metros), 48)
+        self.assertFalse(unidirectional)
+        snapshot_airline = add_file_data_to_graph(Graph(), self.map_file_path, use_snapshot=True)
+        self.assertSameNetwork(json_airline, snapshot_airline)
+
+    def test_unusual_metro_data(self):
+        """ Test that metros with data that does not fit the packed columns are restored exactly. """
+        map_data = {"unidirectional": True, "metros": [
+            {"code": u"AAA", "name": u"S\u00e3o Tom\u00e9", "timezone": 5.5, "population": 10,
+             "coordinates": "unknown", "notes": [1, 2]},
+            {"code": u"BBB", "region": "north", "coordinates": {"N": 1.5, "E": 2}}],
+            "routes": [{"ports": [u"AAA", u"BBB"], "distance": 12.5}]}
+        snapshot_file_path = os.path.join(self.temp_directory, "unusual.snapshot")
+        write_snapshot(map_data, snapshot_file_path)
+        metros, routes, unidirectional = read_snapshot(snapshot_file_path)
+        self.assertEqual(metros, map_data["metros"])
+        self.assertEqual(type(metros[0]["population"]), int)
+        self.assertEqual(type(metros[1]["coordinates"]["E"]), int)
+        self.assertEqual(routes, [(u"AAA", u"BBB", 12.5)])
+        self.assertTrue(unidirectional)
+
+    def test_stale_snapshot_is_ignored(self):
+        """ Test that the JSON File is used when it is newer than its snapshot. """
+        add_file_data_to_graph(Graph(), self.map_file_path, use_snapshot=True)
+        with open(self.map_file_path, "r") as map_file:
+            map_data = json.load(map_file)
+        map_data["metros"] = map_data["metros"][:1]
+        map_data["routes"] = []
+        with open(self.map_file_path, "w") as map_file:
+            json.dump(map_data, map_file)
+        snapshot_file_path = get_snapshot_file_path(self.map_file_path)
+        os.utime(snapshot_file_path, (0, 0))
+        self.assertFalse(is_snapshot_fresh(self.map_file_path))
+        test_airline = add_file_data_to_graph(Graph(), self.map_file_path, use_snapshot=True)
+        self.assertEqual(len(test_airline.get_all_nodes()), 1)
+        self.assertTrue(is_snapshot_fresh(self.map_file_path))
+
+    def test_truncated_snapshot_is_ignored(self):
+        """ Test that a snapshot cut short, even between two values, is refused and the JSON File used instead. """
+        json_airline = add_file_data_to_graph(Graph(), self.map_file_path, use_snapshot=True)
+        snapshot_file_path = get_snapshot_file_path(self.map_file_path)
+        with open(snapshot_file_path, "rb") as snapshot_file:
+            snapshot_data = snapshot_file.read()
+        for length in xrange(HEADER.size, len(snapshot_data), 4):
+            self.assertRaises(ValueError, parse_snapshot, snapshot_data[:length])
+        with open(snapshot_file_path, "wb") as snapshot_file:
+            snapshot_file.write(snapshot_data[:len(snapshot_data) - 8])
+        self.assertTrue(is_snapshot_fresh(self.map_file_path))
+        self.assertSameNetwork(add_file_data_to_graph(Graph(), self.map_file_path, use_snapshot=True), json_airline)
@@ -0,0 +1,38 @@
+""" Tests for the flight and layover time tables in travel_times.py
+
+PyCharm Error Code Documented: https://youtrack.jetbrains.com/issue/PY-20171
+"""
+
+import unittest
+from scripts.graph_functions import *
+from scripts.travel_times import *
+
+TEST_FILE = "../data/test_data.json"
+
+
+class TestTravelTimes(unittest.TestCase):
+
+    def test_leg_times(self):
+        """ Test that flight and layover times match the per-leg time calculation. """
+        self.assertEqual(calculate_flight_time(100), calculate_time(100, ["A", "B"], {}, 1))
+        self.assertEqual(calculate_layover_time(3), 100)
+        self.assertEqual(calculate_layover_time(20), 0)
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        travel_time_table = get_travel_time_table(test_airline)
+        self.assertEqual(travel_time_table.get_itinerary_time(["BOG", "LIM", "SCL"]),
+                         calculate_flight_time(1879) + 100 + calculate_flight_time(2453))
+        self.assertEqual(travel_time_table.get_itinerary_time(["BOG", "SCL"]), None)
+
+    def test_tables_follow_modifications(self):
+        """ Test that the tables match freshly built ones after the network is modified. """
+        test_airline = add_file_data_to_graph(airline_network=Graph(), map_file_path=TEST_FILE)
+        travel_time_table = get_travel_time_table(test_airline)
+        add_route(test_airline, "y", "SCL", "MEX", 6000)
+        delete_route(test_airline, "LIM", "BOG", "n")
+        add_city(test_airline, {"code": "CMI", "name": "Champaign"})
+        add_route(test_airline, "n", "CMI", "MEX", 300)
+        delete_city(test_airline, "LIM")
+        test_airline.add_node("MEX", {"code": "MEX", "name": "Mexico City"})
+        rebuilt_table = TravelTimeTable(test_airline)
+        self.assertEqual(travel_time_table.flight_times, rebuilt_table.flight_times)
+        self.assertEqual(travel_time_table.layover_times, rebuilt_table.layover_times)